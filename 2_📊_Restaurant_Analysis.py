@@ -1,13 +1,23 @@
+import functools
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import get_analyzer
+from utils import get_analyzer, get_queries, get_data_version, drop_unused_categories
+from plotting import scatter_figure, cached_box_summary, box_figure, cached_figure
+from profiling import start_run, finish_run, section
 
 st.set_page_config(page_title="Restaurant Analysis", page_icon="📊", layout="wide")
+start_run('restaurant_analysis')
 
-analyzer = get_analyzer()
-df = analyzer.df
+# The metrics and the per-type charts go through the query engine (or the query
+# service); the scatter plot, the box plot and the top performers (which list
+# menu_items, a column the SQL backend does not keep) need the selected rows
+# themselves, so they still load the in-memory analyzer
+with section('load') as record:
+    queries = get_queries()
+    overview = queries.overview()
+    record['rows'] = int(overview['totals']['count'])
 
 st.title("📊 Restaurant Performance Analysis")
 
@@ -17,122 +27,163 @@ col1, col2, col3 = st.columns(3)
 with col1:
     location_filter = st.multiselect(
         "Select Locations",
-        options=df['location'].unique(),
-        default=df['location'].unique()[:3]
+        options=overview['locations'],
+        default=overview['locations'][:3]
     )
 
 with col2:
     rest_type_filter = st.multiselect(
         "Restaurant Type",
-        options=df['rest_type'].unique(),
-        default=df['rest_type'].unique()[:3]
+        options=overview['rest_types'],
+        default=overview['rest_types'][:3]
     )
 
 with col3:
+    cost_min, cost_max = overview['cost_range'] if overview['cost_range'] is not None else (0, 5000)
     cost_filter = st.slider(
         "Cost Range (for two people)",
-        min_value=int(df['approx_cost(for two people)'].min()),
-        max_value=int(df['approx_cost(for two people)'].max()),
+        min_value=cost_min,
+        max_value=cost_max,
         value=(300, 1000)
     )
 
 # Apply filters
-filtered_df = df.copy()
-if location_filter:
-    filtered_df = filtered_df[filtered_df['location'].isin(location_filter)]
-if rest_type_filter:
-    filtered_df = filtered_df[filtered_df['rest_type'].isin(rest_type_filter)]
-filtered_df = filtered_df[
-    (filtered_df['approx_cost(for two people)'] >= cost_filter[0]) & 
-    (filtered_df['approx_cost(for two people)'] <= cost_filter[1])
-]
+selection = {
+    'categories': {'location': location_filter, 'rest_type': rest_type_filter},
+    'ranges': {'approx_cost(for two people)': cost_filter}
+}
+with section('aggregate') as record:
+    plan = queries.plan(selection)
+    totals_query = plan.kpis()
+
+    # Read only by the chart builders, so a rerun whose figures are all cached never runs it
+    chart_plan = queries.plan(selection)
+    type_query = chart_plan.group_by(['rest_type'])
+
+    filtered_totals = totals_query.value
+    record['rows'] = int(filtered_totals['count'])
+
+# Selected once per rerun, on first use by a row-level widget
+@functools.cache
+def filtered_frame():
+    with section('filter') as record:
+        analyzer = get_analyzer()
+        filtered_df = analyzer.df.iloc[analyzer.filter_engine.select(**selection)]
+        record['rows'] = len(filtered_df)
+    return filtered_df
 
 # Performance Metrics
 col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    avg_rating = filtered_df['rating_numeric'].mean()
+with col1, section('metric:rating'):
+    avg_rating = filtered_totals['rating_mean']
     st.metric("Average Rating", f"{avg_rating:.2f}/5")
 
-with col2:
-    avg_cost = filtered_df['approx_cost(for two people)'].mean()
+with col2, section('metric:cost'):
+    avg_cost = filtered_totals['cost_mean']
     st.metric("Average Cost for Two", f"₹{avg_cost:.0f}")
 
-with col3:
-    online_order_pct = (filtered_df['online_order'] == 'Yes').mean() * 100
+with col3, section('metric:online_order'):
+    online_order_pct = filtered_totals['online_order_pct']
     st.metric("Online Order %", f"{online_order_pct:.1f}%")
 
-with col4:
-    table_booking_pct = (filtered_df['book_table'] == 'Yes').mean() * 100
+with col4, section('metric:table_booking'):
+    table_booking_pct = filtered_totals['book_table_pct']
     st.metric("Table Booking %", f"{table_booking_pct:.1f}%")
 
 # Charts
 col1, col2 = st.columns(2)
-
-with col1:
-    # Rating vs Cost scatter plot
-    fig = px.scatter(
-        filtered_df,
-        x='approx_cost(for two people)',
-        y='rating_numeric',
-        color='rest_type',
-        size='votes',
-        hover_data=['name', 'location'],
-        title="Rating vs Cost Relationship",
-        labels={
-            'approx_cost(for two people)': 'Cost for Two (₹)',
-            'rating_numeric': 'Rating'
-        }
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    # Votes distribution by restaurant type
-    fig = px.box(
-        filtered_df,
-        x='rest_type',
-        y='votes',
-        title="Votes Distribution by Restaurant Type",
-        labels={'rest_type': 'Restaurant Type', 'votes': 'Number of Votes'}
-    )
-    fig.update_xaxes(tickangle=45)
-    st.plotly_chart(fig, use_container_width=True)
+# Identifies this filter state for the server-side chart caches: the engine's data
+# version (which tracks a remote query service), the local one and the filters
+filter_key = (
+    str(overview['data_version']), get_data_version(),
+    tuple(location_filter), tuple(rest_type_filter), tuple(cost_filter)
+)
+
+with col1, section('chart:rating_vs_cost'):
+    def build_chart():
+        with section('plot_frame') as record:
+            plot_df = drop_unused_categories(filtered_frame())
+            record['rows'] = len(plot_df)
+        # Rating vs Cost scatter plot, reduced server-side for large selections
+        return scatter_figure(
+            plot_df,
+            filter_key,
+            x='approx_cost(for two people)',
+            y='rating_numeric',
+            color='rest_type',
+            size='votes',
+            hover_data=['name', 'location'],
+            title="Rating vs Cost Relationship",
+            labels={
+                'approx_cost(for two people)': 'Cost for Two (₹)',
+                'rating_numeric': 'Rating'
+            }
+        )
+    fig = cached_figure('restaurant.rating_vs_cost', filter_key, build_chart)
+    with section('render:rating_vs_cost'):
+        st.plotly_chart(fig, use_container_width=True)
+
+with col2, section('chart:votes_by_type'):
+    def build_chart():
+        # Votes distribution by restaurant type
+        fig = box_figure(
+            cached_box_summary(filtered_frame(), filter_key, 'rest_type', 'votes'),
+            'rest_type',
+            'votes',
+            title="Votes Distribution by Restaurant Type",
+            labels={'rest_type': 'Restaurant Type', 'votes': 'Number of Votes'}
+        )
+        fig.update_xaxes(tickangle=45)
+        return fig
+    fig = cached_figure('restaurant.votes_by_type', filter_key, build_chart)
+    with section('render:votes_by_type'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Restaurant Type Analysis
 st.subheader("🏪 Restaurant Type Performance")
 
 col1, col2 = st.columns(2)
 
-with col1:
-    # Average rating by restaurant type
-    rating_by_type = filtered_df.groupby('rest_type')['rating_numeric'].mean().sort_values(ascending=False)
-    fig = px.bar(
-        x=rating_by_type.values,
-        y=rating_by_type.index,
-        orientation='h',
-        title="Average Rating by Restaurant Type",
-        labels={'x': 'Average Rating', 'y': 'Restaurant Type'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    # Average cost by restaurant type
-    cost_by_type = filtered_df.groupby('rest_type')['approx_cost(for two people)'].mean().sort_values(ascending=False)
-    fig = px.bar(
-        x=cost_by_type.values,
-        y=cost_by_type.index,
-        orientation='h',
-        title="Average Cost by Restaurant Type",
-        labels={'x': 'Average Cost for Two (₹)', 'y': 'Restaurant Type'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
+with col1, section('chart:rating_by_type'):
+    def build_chart():
+        # Average rating by restaurant type
+        rating_by_type = type_query.value['rating_mean'].sort_values(ascending=False)
+        return px.bar(
+            x=rating_by_type.values,
+            y=rating_by_type.index,
+            orientation='h',
+            title="Average Rating by Restaurant Type",
+            labels={'x': 'Average Rating', 'y': 'Restaurant Type'}
+        )
+    fig = cached_figure('restaurant.rating_by_type', filter_key, build_chart)
+    with section('render:rating_by_type'):
+        st.plotly_chart(fig, use_container_width=True)
+
+with col2, section('chart:cost_by_type'):
+    def build_chart():
+        # Average cost by restaurant type
+        cost_by_type = type_query.value['cost_mean'].sort_values(ascending=False)
+        return px.bar(
+            x=cost_by_type.values,
+            y=cost_by_type.index,
+            orientation='h',
+            title="Average Cost by Restaurant Type",
+            labels={'x': 'Average Cost for Two (₹)', 'y': 'Restaurant Type'}
+        )
+    fig = cached_figure('restaurant.cost_by_type', filter_key, build_chart)
+    with section('render:cost_by_type'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Top Performing Restaurants
 st.subheader("🏆 Top Performing Restaurants")
 
-performance_df = filtered_df.nlargest(15, 'popularity_score')[
-    ['name', 'location', 'rest_type', 'rating_numeric', 'votes', 'approx_cost(for two people)', 'cuisines']
-]
-performance_df.columns = ['Name', 'Location', 'Type', 'Rating', 'Votes', 'Cost for Two', 'Cuisines']
+with section('top_performers', rows=int(filtered_totals['count'])):
+    performance_df = filtered_frame().nlargest(15, 'popularity_score')[
+        ['name', 'location', 'rest_type', 'rating_numeric', 'votes', 'approx_cost(for two people)', 'menu_items', 'cuisines']
+    ]
+    performance_df.columns = ['Name', 'Location', 'Type', 'Rating', 'Votes', 'Cost for Two', 'Menu Items', 'Cuisines']
+
+    st.dataframe(performance_df, use_container_width=True, height=400)
 
-st.dataframe(performance_df, use_container_width=True, height=400)
\ No newline at end of file
+finish_run()
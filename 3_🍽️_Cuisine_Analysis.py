@@ -1,13 +1,24 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-from utils import get_analyzer
+import numpy as np
+from utils import get_analyzer, get_queries, get_data_version, get_review_term_index
+from plotting import cached_box_summary, box_figure, wordcloud_image, cached_figure
+from profiling import start_run, finish_run, section
 
 st.set_page_config(page_title="Cuisine Analysis", page_icon="🍽️", layout="wide")
-
-analyzer = get_analyzer()
-df = analyzer.df
+start_run('cuisine_analysis')
+
+# Cuisine popularity and cuisine-by-location go through the query engine (or the
+# query service); the combinations, the box plot and the word clouds read the
+# cuisine, dish and filter indexes of the in-memory analyzer
+with section('load') as record:
+    queries = get_queries()
+    overview = queries.overview()
+    record['rows'] = int(overview['totals']['count'])
+# Identifies the data behind the charts: the engine's version (which tracks a remote
+# query service) and the local one, which the analyzer-backed box plot reads
+data_version = (str(overview['data_version']), get_data_version())
 
 st.title("🍽️ Cuisine Analysis")
 
@@ -15,27 +26,34 @@ st.title("🍽️ Cuisine Analysis")
 st.subheader("Cuisine Popularity")
 
 # Get top cuisines
-cuisine_dist = analyzer.get_cuisine_distribution().head(20)
+with section('cuisine_distribution', rows=record['rows']):
+    cuisine_dist = pd.Series(overview['cuisines']).head(20)
 
 col1, col2 = st.columns(2)
 
-with col1:
-    fig = px.bar(
-        x=cuisine_dist.values,
-        y=cuisine_dist.index,
-        orientation='h',
-        title="Top 20 Most Popular Cuisines",
-        labels={'x': 'Number of Restaurants', 'y': 'Cuisine'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    fig = px.pie(
-        values=cuisine_dist.head(10).values,
-        names=cuisine_dist.head(10).index,
-        title="Top 10 Cuisines Distribution"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+with col1, section('chart:top_cuisines'):
+    def build_chart():
+        return px.bar(
+            x=cuisine_dist.values,
+            y=cuisine_dist.index,
+            orientation='h',
+            title="Top 20 Most Popular Cuisines",
+            labels={'x': 'Number of Restaurants', 'y': 'Cuisine'}
+        )
+    fig = cached_figure('cuisine.top_cuisines', (data_version,), build_chart)
+    with section('render:top_cuisines'):
+        st.plotly_chart(fig, use_container_width=True)
+
+with col2, section('chart:cuisine_share'):
+    def build_chart():
+        return px.pie(
+            values=cuisine_dist.head(10).values,
+            names=cuisine_dist.head(10).index,
+            title="Top 10 Cuisines Distribution"
+        )
+    fig = cached_figure('cuisine.cuisine_share', (data_version,), build_chart)
+    with section('render:cuisine_share'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Cuisine Performance by Location
 st.subheader("Cuisine Performance by Location")
@@ -56,51 +74,63 @@ with col2:
         options=['Average Rating', 'Average Cost', 'Restaurant Count']
     )
 
-# Filter restaurants that serve selected cuisine
-cuisine_restaurants = df[df['cuisines'].str.contains(selected_cuisine, na=False)]
-
-if metric == 'Average Rating':
-    performance_data = cuisine_restaurants.groupby('location')['rating_numeric'].mean().sort_values(ascending=False)
-    title = f"Average Rating for {selected_cuisine} Cuisine by Location"
-    y_label = 'Average Rating'
-elif metric == 'Average Cost':
-    performance_data = cuisine_restaurants.groupby('location')['approx_cost(for two people)'].mean().sort_values(ascending=False)
-    title = f"Average Cost for {selected_cuisine} Cuisine by Location"
-    y_label = 'Average Cost (₹)'
-else:
-    performance_data = cuisine_restaurants.groupby('location').size().sort_values(ascending=False)
-    title = f"Number of {selected_cuisine} Restaurants by Location"
-    y_label = 'Number of Restaurants'
-
-fig = px.bar(
-    x=performance_data.values,
-    y=performance_data.index,
-    orientation='h',
-    title=title,
-    labels={'x': y_label, 'y': 'Location'}
-)
-st.plotly_chart(fig, use_container_width=True)
+with section('chart:cuisine_by_location'):
+    def build_chart():
+        # Restaurants that serve the selected cuisine, per location
+        with section('cuisine_by_location') as record:
+            cuisine_stats = queries.group_by({'cuisines': [selected_cuisine]}, by=['location'])
+            record['rows'] = int(cuisine_stats['count'].sum())
+
+        if metric == 'Average Rating':
+            performance_data = cuisine_stats['rating_mean'].sort_values(ascending=False)
+            title = f"Average Rating for {selected_cuisine} Cuisine by Location"
+            y_label = 'Average Rating'
+        elif metric == 'Average Cost':
+            performance_data = cuisine_stats['cost_mean'].sort_values(ascending=False)
+            title = f"Average Cost for {selected_cuisine} Cuisine by Location"
+            y_label = 'Average Cost (₹)'
+        else:
+            performance_data = cuisine_stats['count'].sort_values(ascending=False)
+            title = f"Number of {selected_cuisine} Restaurants by Location"
+            y_label = 'Number of Restaurants'
+        return px.bar(
+            x=performance_data.values,
+            y=performance_data.index,
+            orientation='h',
+            title=title,
+            labels={'x': y_label, 'y': 'Location'}
+        )
+    fig = cached_figure('cuisine.cuisine_by_location', (data_version, selected_cuisine, metric), build_chart)
+    with section('render:cuisine_by_location'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Cuisine Combinations
 st.subheader("Popular Cuisine Combinations")
 
-# Analyze cuisine pairs (simplified)
-from itertools import combinations
+col1, col2 = st.columns(2)
 
-cuisine_pairs = {}
-for cuisines in df['cuisines_list']:
-    if len(cuisines) >= 2:
-        for pair in combinations(cuisines, 2):
-            sorted_pair = tuple(sorted(pair))
-            cuisine_pairs[sorted_pair] = cuisine_pairs.get(sorted_pair, 0) + 1
+with col1:
+    combo_locations = st.multiselect(
+        "Filter Combinations by Location",
+        options=overview['locations']
+    )
 
-# Convert to DataFrame
-pairs_df = pd.DataFrame([
-    {'Cuisine 1': pair[0], 'Cuisine 2': pair[1], 'Count': count}
-    for pair, count in sorted(cuisine_pairs.items(), key=lambda x: x[1], reverse=True)[:20]
-])
+with col2:
+    combo_size = st.radio("Combination Size", options=['Pairs', 'Triples'], horizontal=True)
+
+# Co-occurrence counts come from the sparse cuisine incidence matrix
+with section('cuisine_combinations'):
+    analyzer = get_analyzer()
+    combo_mask = (
+        analyzer.filter_engine.select_mask(categories={'location': combo_locations})
+        if combo_locations else None
+    )
+    if combo_size == 'Pairs':
+        pairs_df = analyzer.cuisine_index.top_pairs(20, mask=combo_mask)
+    else:
+        pairs_df = analyzer.cuisine_index.top_triples(20, mask=combo_mask)
 
-st.dataframe(pairs_df, use_container_width=True, height=400)
+    st.dataframe(pairs_df, use_container_width=True, height=400)
 
 # Cost vs Rating by Cuisine
 st.subheader("Cost vs Rating Analysis by Cuisine")
@@ -108,21 +138,79 @@ st.subheader("Cost vs Rating Analysis by Cuisine")
 # Get top 8 cuisines for analysis
 top_cuisines = cuisine_dist.head(8).index.tolist()
 
-fig = go.Figure()
-
-for cuisine in top_cuisines:
-    cuisine_data = df[df['cuisines'].str.contains(cuisine, na=False)]
-    fig.add_trace(go.Box(
-        y=cuisine_data['rating_numeric'],
-        x=[cuisine] * len(cuisine_data),
-        name=cuisine,
-        boxpoints='outliers'
-    ))
-
-fig.update_layout(
-    title="Rating Distribution by Cuisine",
-    xaxis_title="Cuisine",
-    yaxis_title="Rating",
-    height=500
-)
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+with section('chart:rating_by_cuisine'):
+    def build_chart():
+        # Long (cuisine, rating) frame straight from the posting lists
+        with section('cuisine_ratings') as record:
+            cuisine_rows = [analyzer.cuisine_index.rows_for(cuisine) for cuisine in top_cuisines]
+            cuisine_ratings = pd.DataFrame({
+                'cuisine': pd.Categorical(
+                    pd.Series(top_cuisines).repeat([len(rows) for rows in cuisine_rows]),
+                    categories=top_cuisines
+                ),
+                'rating_numeric': analyzer.df['rating_numeric'].to_numpy()[np.concatenate(cuisine_rows)]
+            })
+            record['rows'] = len(cuisine_ratings)
+        fig = box_figure(
+            cached_box_summary(cuisine_ratings, (data_version, tuple(top_cuisines)), 'cuisine', 'rating_numeric'),
+            'cuisine',
+            'rating_numeric',
+            title="Rating Distribution by Cuisine",
+            labels={'cuisine': 'Cuisine', 'rating_numeric': 'Rating'},
+            color=None
+        )
+        fig.update_layout(height=500)
+        return fig
+    fig = cached_figure('cuisine.rating_by_cuisine', (data_version, tuple(top_cuisines)), build_chart)
+    with section('render:rating_by_cuisine'):
+        st.plotly_chart(fig, use_container_width=True)
+# Liked dishes and review vocabulary for a selection of restaurants
+st.subheader("What Diners Talk About")
+
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    cloud_locations = st.multiselect("Location", options=overview['locations'], key='cloud_locations')
+
+with col2:
+    cloud_types = st.multiselect("Restaurant Type", options=overview['rest_types'], key='cloud_types')
+
+with col3:
+    cloud_cuisines = st.multiselect("Cuisine", options=cuisine_dist.index.tolist(), key='cloud_cuisines')
+
+# Term counts are sums over the selected restaurants' rows of the precomputed term indexes
+with section('cloud_selection') as record:
+    cloud_rows = analyzer.filter_engine.select(
+        categories={'location': cloud_locations, 'rest_type': cloud_types},
+        cuisines=cloud_cuisines
+    )
+    cloud_keys = analyzer.df['restaurant_id'].to_numpy()[cloud_rows]
+    record['rows'] = len(cloud_keys)
+with section('load:review_terms'):
+    review_terms = get_review_term_index()
+
+col1, col2 = st.columns(2)
+
+with col1, section('cloud:dishes'):
+    st.markdown("**Most Liked Dishes**")
+    dish_counts = analyzer.dish_index.top_terms(100, keys=cloud_keys)
+    image = wordcloud_image(dish_counts.to_dict())
+    if image is not None:
+        st.image(image, use_column_width=True)
+    elif len(dish_counts):
+        st.dataframe(dish_counts.head(20), use_container_width=True)
+    else:
+        st.info("No liked dishes recorded for this selection.")
+
+with col2, section('cloud:review_terms'):
+    st.markdown("**Most Used Words in Reviews**")
+    term_counts = review_terms.top_terms(100, keys=cloud_keys) if review_terms is not None else pd.Series(dtype=int)
+    image = wordcloud_image(term_counts.to_dict(), colormap='Blues')
+    if image is not None:
+        st.image(image, use_column_width=True)
+    elif len(term_counts):
+        st.dataframe(term_counts.head(20), use_container_width=True)
+    else:
+        st.info("No reviews available for this selection.")
+
+finish_run()
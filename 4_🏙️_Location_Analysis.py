@@ -1,13 +1,35 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import get_analyzer
+from utils import get_analyzer, get_data_version, get_queries
+from plotting import cached_box_summary, box_figure, cached_figure
+from profiling import start_run, finish_run, section
+
+# Summary columns shown by the location comparison, with their labels
+COMPARISON_COLUMNS = {
+    'count': 'Restaurant Count',
+    'rating_mean': 'Average Rating',
+    'cost_mean': 'Average Cost',
+    'online_order_pct': 'Online Order %',
+    'book_table_pct': 'Table Booking %'
+}
 
 st.set_page_config(page_title="Location Analysis", page_icon="🏙️", layout="wide")
-
-analyzer = get_analyzer()
-df = analyzer.df
+start_run('location_analysis')
+
+# Sections answered by the cube go through the query engine (or the query service);
+# only the cost box plot, which needs the rows themselves, loads the in-memory analyzer
+with section('load') as record:
+    queries = get_queries()
+    overview = queries.overview()
+    record['rows'] = int(overview['totals']['count'])
+# Per-location statistics rolled up from the pre-aggregated cube
+with section('aggregate', rows=record['rows']):
+    location_stats = queries.group_by(by=['location'])
+    location_counts = location_stats['count'].sort_values(ascending=False, kind='stable')
+# Identifies the data behind the charts: the engine's version (which tracks a remote
+# query service) and the local one, which the analyzer-backed box plot reads
+data_version = (str(overview['data_version']), get_data_version())
 
 st.title("🏙️ Location-based Analysis")
 
@@ -16,16 +38,16 @@ st.subheader("Location Overview")
 
 col1, col2, col3 = st.columns(3)
 
-with col1:
-    total_locations = df['location'].nunique()
+with col1, section('metric:locations'):
+    total_locations = len(location_stats)
     st.metric("Total Locations", total_locations)
 
-with col2:
-    avg_restaurants_per_location = len(df) / total_locations
+with col2, section('metric:restaurants_per_location'):
+    avg_restaurants_per_location = overview['totals']['count'] / total_locations
     st.metric("Avg Restaurants per Location", f"{avg_restaurants_per_location:.1f}")
 
-with col3:
-    most_restaurants_location = df['location'].value_counts().index[0]
+with col3, section('metric:top_location'):
+    most_restaurants_location = location_counts.index[0]
     st.metric("Most Popular Location", most_restaurants_location)
 
 # Location Performance Metrics
@@ -34,99 +56,117 @@ st.subheader("Location Performance Comparison")
 # Select locations to compare
 selected_locations = st.multiselect(
     "Select Locations to Compare",
-    options=df['location'].unique(),
-    default=df['location'].value_counts().head(5).index.tolist()
+    options=overview['locations'],
+    default=location_counts.head(5).index.tolist()
 )
 
 if selected_locations:
-    comparison_data = []
-    
-    for location in selected_locations:
-        location_data = df[df['location'] == location]
-        comparison_data.append({
-            'Location': location,
-            'Restaurant Count': len(location_data),
-            'Average Rating': location_data['rating_numeric'].mean(),
-            'Average Cost': location_data['approx_cost(for two people)'].mean(),
-            'Online Order %': (location_data['online_order'] == 'Yes').mean() * 100,
-            'Table Booking %': (location_data['book_table'] == 'Yes').mean() * 100
-        })
-    
-    comparison_df = pd.DataFrame(comparison_data)
+    with section('comparison', rows=len(selected_locations)):
+        # The selected rows of the per-location summary, labelled like ZomatoAnalyzer.compare()
+        comparison_df = location_stats.reindex(selected_locations)[list(COMPARISON_COLUMNS)].rename(
+            columns=COMPARISON_COLUMNS
+        )
+        comparison_df['Restaurant Count'] = comparison_df['Restaurant Count'].fillna(0).astype(int)
+        comparison_df = comparison_df.rename_axis('Location').reset_index()
     
-    # Display comparison table
-    st.dataframe(comparison_df, use_container_width=True)
+        # Display comparison table
+        st.dataframe(comparison_df, use_container_width=True)
     
     # Visual comparisons
     col1, col2 = st.columns(2)
     
-    with col1:
-        fig = px.bar(
-            comparison_df,
-            x='Location',
-            y='Average Rating',
-            title="Average Rating by Location",
-            color='Average Rating',
-            color_continuous_scale='Viridis'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    with col1, section('chart:rating_by_location'):
+        def build_chart():
+            return px.bar(
+                comparison_df,
+                x='Location',
+                y='Average Rating',
+                title="Average Rating by Location",
+                color='Average Rating',
+                color_continuous_scale='Viridis'
+            )
+        fig = cached_figure('location.rating_by_location', (data_version, tuple(selected_locations)), build_chart)
+        with section('render:rating_by_location'):
+            st.plotly_chart(fig, use_container_width=True)
     
-    with col2:
-        fig = px.bar(
-            comparison_df,
-            x='Location',
-            y='Average Cost',
-            title="Average Cost by Location",
-            color='Average Cost',
-            color_continuous_scale='Reds'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    with col2, section('chart:cost_by_location'):
+        def build_chart():
+            return px.bar(
+                comparison_df,
+                x='Location',
+                y='Average Cost',
+                title="Average Cost by Location",
+                color='Average Cost',
+                color_continuous_scale='Reds'
+            )
+        fig = cached_figure('location.cost_by_location', (data_version, tuple(selected_locations)), build_chart)
+        with section('render:cost_by_location'):
+            st.plotly_chart(fig, use_container_width=True)
 
 # Location Heatmap
 st.subheader("Restaurant Density Heatmap")
 
 # Create a simulated geographical distribution (in real scenario, use actual coordinates)
-location_counts = df['location'].value_counts()
-
-# Create a heatmap-like visualization
-fig = px.bar(
-    x=location_counts.index,
-    y=location_counts.values,
-    title="Restaurant Count by Location",
-    labels={'x': 'Location', 'y': 'Number of Restaurants'}
-)
-fig.update_xaxes(tickangle=45)
-st.plotly_chart(fig, use_container_width=True)
+with section('chart:restaurant_density'):
+    def build_chart():
+        # Create a heatmap-like visualization
+        fig = px.bar(
+            x=location_counts.index,
+            y=location_counts.values,
+            title="Restaurant Count by Location",
+            labels={'x': 'Location', 'y': 'Number of Restaurants'}
+        )
+        fig.update_xaxes(tickangle=45)
+        return fig
+    fig = cached_figure('location.restaurant_density', (data_version,), build_chart)
+    with section('render:restaurant_density'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Restaurant Type Distribution by Location
 st.subheader("Restaurant Type Distribution by Location")
 
 selected_location_type = st.selectbox(
     "Select Location for Type Analysis",
-    options=df['location'].unique()
+    options=overview['locations']
 )
 
-location_type_data = df[df['location'] == selected_location_type]['rest_type'].value_counts()
-
-fig = px.pie(
-    values=location_type_data.values,
-    names=location_type_data.index,
-    title=f"Restaurant Type Distribution in {selected_location_type}"
-)
-st.plotly_chart(fig, use_container_width=True)
+with section('chart:type_distribution'):
+    def build_chart():
+        with section('type_distribution') as record:
+            location_type_data = queries.group_by(
+                {'categories': {'location': [selected_location_type]}}, by=['rest_type']
+            )['count'].loc[lambda s: s > 0].sort_values(ascending=False, kind='stable')
+            record['rows'] = int(location_type_data.sum())
+        return px.pie(
+            values=location_type_data.values,
+            names=location_type_data.index,
+            title=f"Restaurant Type Distribution in {selected_location_type}"
+        )
+    fig = cached_figure('location.type_distribution', (data_version, selected_location_type), build_chart)
+    with section('render:type_distribution'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Cost Analysis by Location
 st.subheader("Cost Analysis by Location")
 
-fig = px.box(
-    df,
-    x='location',
-    y='approx_cost(for two people)',
-    title="Cost Distribution by Location",
-    labels={'location': 'Location', 'approx_cost(for two people)': 'Cost for Two (₹)'}
-)
-fig.update_xaxes(tickangle=45)
-st.plotly_chart(fig, use_container_width=True)
+with section('chart:cost_distribution'):
+    # Quartiles and outliers need the rows, which only the in-memory analyzer holds,
+    # so it is loaded only when the figure is not cached
+    def build_chart():
+        fig = box_figure(
+            cached_box_summary(
+                get_analyzer().df, (data_version, 'cost_by_location'), 'location', 'approx_cost(for two people)'
+            ),
+            'location',
+            'approx_cost(for two people)',
+            title="Cost Distribution by Location",
+            labels={'location': 'Location', 'approx_cost(for two people)': 'Cost for Two (₹)'}
+        )
+        fig.update_xaxes(tickangle=45)
+        return fig
+    fig = cached_figure('location.cost_distribution', (data_version,), build_chart)
+    with section('render:cost_distribution'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Top Locations by Different Metrics
 st.subheader("Top Locations Ranking")
@@ -136,29 +176,33 @@ metric = st.selectbox(
     options=['Restaurant Count', 'Average Rating', 'Average Cost', 'Online Order %']
 )
 
-if metric == 'Restaurant Count':
-    ranking_data = df['location'].value_counts().head(10)
-    title = "Top 10 Locations by Restaurant Count"
-    y_label = "Number of Restaurants"
-elif metric == 'Average Rating':
-    ranking_data = df.groupby('location')['rating_numeric'].mean().sort_values(ascending=False).head(10)
-    title = "Top 10 Locations by Average Rating"
-    y_label = "Average Rating"
-elif metric == 'Average Cost':
-    ranking_data = df.groupby('location')['approx_cost(for two people)'].mean().sort_values(ascending=False).head(10)
-    title = "Top 10 Locations by Average Cost"
-    y_label = "Average Cost (₹)"
-else:
-    ranking_data = (df[df['online_order'] == 'Yes'].groupby('location').size() / 
-                   df.groupby('location').size()).sort_values(ascending=False).head(10) * 100
-    title = "Top 10 Locations by Online Order Percentage"
-    y_label = "Online Order %"
-
-fig = px.bar(
-    x=ranking_data.values,
-    y=ranking_data.index,
-    orientation='h',
-    title=title,
-    labels={'x': y_label, 'y': 'Location'}
-)
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+with section('chart:location_ranking'):
+    def build_chart():
+        if metric == 'Restaurant Count':
+            ranking_data = location_stats['count'].nlargest(10)
+            title = "Top 10 Locations by Restaurant Count"
+            y_label = "Number of Restaurants"
+        elif metric == 'Average Rating':
+            ranking_data = location_stats['rating_mean'].sort_values(ascending=False).head(10)
+            title = "Top 10 Locations by Average Rating"
+            y_label = "Average Rating"
+        elif metric == 'Average Cost':
+            ranking_data = location_stats['cost_mean'].sort_values(ascending=False).head(10)
+            title = "Top 10 Locations by Average Cost"
+            y_label = "Average Cost (₹)"
+        else:
+            ranking_data = location_stats['online_order_pct'].sort_values(ascending=False).head(10)
+            title = "Top 10 Locations by Online Order Percentage"
+            y_label = "Online Order %"
+        return px.bar(
+            x=ranking_data.values,
+            y=ranking_data.index,
+            orientation='h',
+            title=title,
+            labels={'x': y_label, 'y': 'Location'}
+        )
+    fig = cached_figure('location.location_ranking', (data_version, metric), build_chart)
+    with section('render:location_ranking'):
+        st.plotly_chart(fig, use_container_width=True)
+
+finish_run()
@@ -1,14 +1,42 @@
+import functools
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import get_analyzer
-import numpy as np
+from utils import get_analyzer, get_queries, get_data_version, get_review_ratings, get_restaurant_sentiment, drop_unused_categories
+from plotting import scatter_figure, cached_box_summary, box_figure, histogram_figure, cached_figure
+from preprocessing import YES_NO_LABELS
+from cube import CUBE_MEASURES
+from profiling import start_run, finish_run, section
 
 st.set_page_config(page_title="Reviews Analysis", page_icon="⭐", layout="wide")
-
-analyzer = get_analyzer()
-df = analyzer.df
+start_run('reviews_analysis')
+
+# Sections answered by the cube go through the query engine (or the query service).
+# The box plot, the sentiment join and the scatter plots need the rows themselves,
+# so they still load the in-memory analyzer, but only when their figure is not cached
+with section('load') as record:
+    queries = get_queries()
+    overview = queries.overview()
+    record['rows'] = int(overview['totals']['count'])
+# Identifies the data behind the charts: the engine's version (which tracks a remote
+# query service) and the local one, which the analyzer-backed charts read
+data_version = (str(overview['data_version']), get_data_version())
+
+# The cube-backed sections run as fused plans on first use
+with section('aggregate'):
+    plan = queries.plan()
+    online_query = plan.group_by(['online_order'])
+    cost_query = plan.group_by(['cost_category'])
+    correlation_query = plan.correlation()
+
+    # Read only by the chart builders, so a rerun whose figures are all cached never runs it
+    chart_plan = queries.plan()
+    rating_histogram_query = chart_plan.histogram('rating_numeric')
+    votes_histogram_query = chart_plan.histogram('votes')
+    table_query = chart_plan.group_by(['book_table'])
+
+    online_stats = online_query.value.rename(index=YES_NO_LABELS)
 
 st.title("⭐ Reviews & Ratings Analysis")
 
@@ -17,108 +45,213 @@ st.subheader("Rating Distribution")
 
 col1, col2 = st.columns(2)
 
-with col1:
-    # Rating distribution histogram
-    fig = px.histogram(
-        df,
-        x='rating_numeric',
-        nbins=20,
-        title="Distribution of Restaurant Ratings",
-        labels={'rating_numeric': 'Rating'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    # Rating by restaurant type
-    fig = px.box(
-        df,
-        x='rest_type',
-        y='rating_numeric',
-        title="Rating Distribution by Restaurant Type",
-        labels={'rest_type': 'Restaurant Type', 'rating_numeric': 'Rating'}
-    )
-    fig.update_xaxes(tickangle=45)
-    st.plotly_chart(fig, use_container_width=True)
+with col1, section('chart:rating_distribution'):
+    def build_chart():
+        # Rating distribution histogram
+        return histogram_figure(
+            rating_histogram_query.value,
+            title="Distribution of Restaurant Ratings",
+            x_label='Rating'
+        )
+    fig = cached_figure('reviews.rating_distribution', (data_version,), build_chart)
+    with section('render:rating_distribution'):
+        st.plotly_chart(fig, use_container_width=True)
+
+with col2, section('chart:rating_by_type'):
+    def build_chart():
+        # Rating by restaurant type; quartiles and outliers need the rows
+        fig = box_figure(
+            cached_box_summary(get_analyzer().df, (data_version, 'rating_by_type'), 'rest_type', 'rating_numeric'),
+            'rest_type',
+            'rating_numeric',
+            title="Rating Distribution by Restaurant Type",
+            labels={'rest_type': 'Restaurant Type', 'rating_numeric': 'Rating'}
+        )
+        fig.update_xaxes(tickangle=45)
+        return fig
+    fig = cached_figure('reviews.rating_by_type', (data_version,), build_chart)
+    with section('render:rating_by_type'):
+        st.plotly_chart(fig, use_container_width=True)
+
+# Individual review ratings, parsed from reviews_list into their own table
+st.subheader("Individual Review Ratings")
+
+with section('load:review_ratings') as record:
+    review_ratings = get_review_ratings()
+    record['rows'] = None if review_ratings is None else len(review_ratings)
+if review_ratings is None:
+    st.info("Individual review ratings are available when running on zomato.csv.")
+else:
+    col1, col2 = st.columns([2, 1])
+
+    with col1, section('chart:review_ratings'):
+        def build_chart():
+            review_counts = review_ratings['rating'].value_counts().sort_index()
+            return px.bar(
+                x=review_counts.index,
+                y=review_counts.values,
+                title="Distribution of Individual Review Ratings",
+                labels={'x': 'Review Rating', 'y': 'Number of Reviews'}
+            )
+        fig = cached_figure('reviews.review_ratings', (data_version,), build_chart)
+        with section('render:review_ratings'):
+            st.plotly_chart(fig, use_container_width=True)
+
+    with col2, section('metric:reviews'):
+        st.metric("Reviews Parsed", f"{len(review_ratings):,}")
+        st.metric("Restaurants with Reviews", f"{review_ratings['restaurant_id'].nunique():,}")
+        st.metric("Average Review Rating", f"{review_ratings['rating'].mean():.2f}")
+
+# Review sentiment, scored in batches and cached per review text
+st.subheader("Review Sentiment")
+
+with section('load:sentiment') as record:
+    restaurant_sentiment = get_restaurant_sentiment()
+    record['rows'] = None if restaurant_sentiment is None else len(restaurant_sentiment)
+if restaurant_sentiment is None:
+    st.info("Review sentiment is available when running on zomato.csv with textblob installed.")
+else:
+    # Joined at most once per rerun, and only when one of the sentiment figures is not cached
+    @functools.cache
+    def sentiment_frame():
+        with section('sentiment_join') as record:
+            sentiment_df = drop_unused_categories(
+                get_analyzer().df.join(restaurant_sentiment, on='restaurant_id', how='inner')
+            )
+            record['rows'] = len(sentiment_df)
+        return sentiment_df
+
+    col1, col2 = st.columns(2)
+
+    with col1, section('chart:rating_vs_sentiment'):
+        def build_chart():
+            return scatter_figure(
+                sentiment_frame(),
+                (data_version, 'rating_vs_polarity'),
+                x='mean_polarity',
+                y='rating_numeric',
+                hover_data=['name', 'location'],
+                title="Rating vs Review Sentiment",
+                labels={'mean_polarity': 'Mean Review Polarity', 'rating_numeric': 'Rating'}
+            )
+        fig = cached_figure('reviews.rating_vs_sentiment', (data_version,), build_chart)
+        with section('render:rating_vs_sentiment'):
+            st.plotly_chart(fig, use_container_width=True)
+
+    with col2, section('chart:negative_share_by_type'):
+        def build_chart():
+            type_sentiment = sentiment_frame().groupby('rest_type', observed=True).agg(
+                negative_share=('negative_share', 'mean'),
+                restaurants=('restaurant_id', 'size')
+            ).nlargest(10, 'restaurants').sort_values('negative_share')
+            return px.bar(
+                x=type_sentiment['negative_share'] * 100,
+                y=type_sentiment.index,
+                orientation='h',
+                title="Share of Negative Reviews by Restaurant Type",
+                labels={'x': 'Negative Reviews %', 'y': 'Restaurant Type'},
+                color=type_sentiment['negative_share'] * 100,
+                color_continuous_scale='Reds'
+            )
+        fig = cached_figure('reviews.negative_share_by_type', (data_version,), build_chart)
+        with section('render:negative_share_by_type'):
+            st.plotly_chart(fig, use_container_width=True)
 
 # Votes Analysis
 st.subheader("Votes Analysis")
 
 col1, col2 = st.columns(2)
 
-with col1:
-    # Votes distribution
-    fig = px.histogram(
-        df,
-        x='votes',
-        nbins=20,
-        title="Distribution of Votes",
-        labels={'votes': 'Number of Votes'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    # Votes vs Rating scatter plot
-    fig = px.scatter(
-        df,
-        x='votes',
-        y='rating_numeric',
-        color='rest_type',
-        size='approx_cost(for two people)',
-        hover_data=['name', 'location'],
-        title="Votes vs Rating Relationship",
-        labels={'votes': 'Number of Votes', 'rating_numeric': 'Rating'}
-    )
-    st.plotly_chart(fig, use_container_width=True)
+with col1, section('chart:votes_distribution'):
+    def build_chart():
+        # Votes distribution
+        return histogram_figure(
+            votes_histogram_query.value,
+            title="Distribution of Votes",
+            x_label='Number of Votes'
+        )
+    fig = cached_figure('reviews.votes_distribution', (data_version,), build_chart)
+    with section('render:votes_distribution'):
+        st.plotly_chart(fig, use_container_width=True)
+
+with col2, section('chart:votes_vs_rating'):
+    def build_chart():
+        # Votes vs Rating scatter plot
+        return scatter_figure(
+            get_analyzer().df,
+            (data_version, 'votes_vs_rating'),
+            x='votes',
+            y='rating_numeric',
+            color='rest_type',
+            size='approx_cost(for two people)',
+            hover_data=['name', 'location'],
+            title="Votes vs Rating Relationship",
+            labels={'votes': 'Number of Votes', 'rating_numeric': 'Rating'}
+        )
+    fig = cached_figure('reviews.votes_vs_rating', (data_version,), build_chart)
+    with section('render:votes_vs_rating'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Rating vs Cost Analysis
 st.subheader("Rating vs Cost Analysis")
 
-fig = px.scatter(
-    df,
-    x='approx_cost(for two people)',
-    y='rating_numeric',
-    color='cost_category',
-    size='votes',
-    hover_data=['name', 'location', 'rest_type'],
-    title="Rating vs Cost Relationship",
-    labels={
-        'approx_cost(for two people)': 'Cost for Two (₹)',
-        'rating_numeric': 'Rating',
-        'cost_category': 'Cost Category'
-    }
-)
-st.plotly_chart(fig, use_container_width=True)
+with section('chart:rating_vs_cost'):
+    def build_chart():
+        return scatter_figure(
+            get_analyzer().df,
+            (data_version, 'rating_vs_cost'),
+            x='approx_cost(for two people)',
+            y='rating_numeric',
+            color='cost_category',
+            size='votes',
+            hover_data=['name', 'location', 'rest_type'],
+            title="Rating vs Cost Relationship",
+            labels={
+                'approx_cost(for two people)': 'Cost for Two (₹)',
+                'rating_numeric': 'Rating',
+                'cost_category': 'Cost Category'
+            }
+        )
+    fig = cached_figure('reviews.rating_vs_cost', (data_version,), build_chart)
+    with section('render:rating_vs_cost'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Online Features Impact on Ratings
 st.subheader("Impact of Online Features on Ratings")
 
 col1, col2 = st.columns(2)
 
-with col1:
-    # Online order impact
-    online_impact = df.groupby('online_order')['rating_numeric'].mean()
-    fig = px.bar(
-        x=online_impact.index,
-        y=online_impact.values,
-        title="Average Rating by Online Order Availability",
-        labels={'x': 'Online Order', 'y': 'Average Rating'},
-        color=online_impact.values,
-        color_continuous_scale='Viridis'
-    )
-    st.plotly_chart(fig, use_container_width=True)
-
-with col2:
-    # Table booking impact
-    table_impact = df.groupby('book_table')['rating_numeric'].mean()
-    fig = px.bar(
-        x=table_impact.index,
-        y=table_impact.values,
-        title="Average Rating by Table Booking Availability",
-        labels={'x': 'Table Booking', 'y': 'Average Rating'},
-        color=table_impact.values,
-        color_continuous_scale='Viridis'
-    )
-    st.plotly_chart(fig, use_container_width=True)
+with col1, section('chart:online_order_impact'):
+    def build_chart():
+        # Online order impact
+        online_impact = online_stats['rating_mean']
+        return px.bar(
+            x=online_impact.index,
+            y=online_impact.values,
+            title="Average Rating by Online Order Availability",
+            labels={'x': 'Online Order', 'y': 'Average Rating'},
+            color=online_impact.values,
+            color_continuous_scale='Viridis'
+        )
+    fig = cached_figure('reviews.online_order_impact', (data_version,), build_chart)
+    with section('render:online_order_impact'):
+        st.plotly_chart(fig, use_container_width=True)
+
+with col2, section('chart:table_booking_impact'):
+    def build_chart():
+        # Table booking impact
+        table_impact = table_query.value['rating_mean'].rename(index=YES_NO_LABELS)
+        return px.bar(
+            x=table_impact.index,
+            y=table_impact.values,
+            title="Average Rating by Table Booking Availability",
+            labels={'x': 'Table Booking', 'y': 'Average Rating'},
+            color=table_impact.values,
+            color_continuous_scale='Viridis'
+        )
+    fig = cached_figure('reviews.table_booking_impact', (data_version,), build_chart)
+    with section('render:table_booking_impact'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Top Rated Restaurants Analysis
 st.subheader("Top Rated Restaurants Analysis")
@@ -126,65 +259,78 @@ st.subheader("Top Rated Restaurants Analysis")
 # Criteria for top-rated
 min_votes = st.slider("Minimum Votes for Consideration", 0, 1000, 100)
 
-top_rated = df[df['votes'] >= min_votes].nlargest(15, 'rating_numeric')[
-    ['name', 'location', 'rest_type', 'rating_numeric', 'votes', 'approx_cost(for two people)', 'cuisines']
-]
-top_rated.columns = ['Name', 'Location', 'Type', 'Rating', 'Votes', 'Cost for Two', 'Cuisines']
+with section('top_rated'):
+    top_rated = queries.top_n({'ranges': {'votes': (min_votes, None)}}, 15, 'rating_numeric', [
+        'name', 'location', 'rest_type', 'rating_numeric', 'votes', 'approx_cost(for two people)', 'cuisines'
+    ])
+    top_rated.columns = ['Name', 'Location', 'Type', 'Rating', 'Votes', 'Cost for Two', 'Cuisines']
 
-st.dataframe(top_rated, use_container_width=True, height=400)
+    st.dataframe(top_rated, use_container_width=True, height=400)
 
 # Rating Trends by Cost Category
 st.subheader("Rating Trends by Cost Category")
 
-cost_rating_analysis = df.groupby('cost_category').agg({
-    'rating_numeric': ['mean', 'std', 'count'],
-    'votes': 'mean'
-}).round(2)
+with section('cost_rating_table'):
+    cost_rating_analysis = cost_query.value[
+        ['rating_mean', 'rating_std', 'rating_count', 'votes_mean']
+    ].round(2)
 
-cost_rating_analysis.columns = ['Average Rating', 'Rating Std', 'Restaurant Count', 'Average Votes']
-cost_rating_analysis = cost_rating_analysis.sort_values('Average Rating', ascending=False)
+    cost_rating_analysis.columns = ['Average Rating', 'Rating Std', 'Restaurant Count', 'Average Votes']
+    cost_rating_analysis = cost_rating_analysis.sort_values('Average Rating', ascending=False)
 
-st.dataframe(cost_rating_analysis, use_container_width=True)
+    st.dataframe(cost_rating_analysis, use_container_width=True)
 
 # Correlation Analysis
 st.subheader("Feature Correlation Analysis")
 
 # Calculate correlations
-correlation_data = df[['rating_numeric', 'votes', 'approx_cost(for two people)']].corr()
-
-fig = go.Figure(data=go.Heatmap(
-    z=correlation_data.values,
-    x=correlation_data.columns,
-    y=correlation_data.columns,
-    colorscale='RdBu',
-    zmin=-1,
-    zmax=1,
-    text=correlation_data.round(2).values,
-    texttemplate='%{text}',
-    textfont={"size": 10}
-))
-
-fig.update_layout(
-    title="Feature Correlation Heatmap",
-    height=400
-)
-
-st.plotly_chart(fig, use_container_width=True)
+with section('correlation'):
+    correlation_data = correlation_query.value.rename(
+        index=CUBE_MEASURES, columns=CUBE_MEASURES
+    )
+
+with section('chart:correlation'):
+    def build_chart():
+        fig = go.Figure(data=go.Heatmap(
+            z=correlation_data.values,
+            x=correlation_data.columns,
+            y=correlation_data.columns,
+            colorscale='RdBu',
+            zmin=-1,
+            zmax=1,
+            text=correlation_data.round(2).values,
+            texttemplate='%{text}',
+            textfont={"size": 10}
+        ))
+
+        fig.update_layout(
+            title="Feature Correlation Heatmap",
+            height=400
+        )
+        return fig
+    fig = cached_figure('reviews.correlation', (data_version,), build_chart)
+
+    with section('render:correlation'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Insights
 st.subheader("📊 Key Insights")
 
 col1, col2, col3 = st.columns(3)
 
-with col1:
-    high_rated_affordable = len(df[(df['rating_numeric'] >= 4.0) & (df['approx_cost(for two people)'] <= 500)])
+with col1, section('insight:high_rated_affordable'):
+    high_rated_affordable = int(queries.kpis(
+        {'ranges': {'rating_numeric': (4.0, None), 'approx_cost(for two people)': (None, 500)}}
+    )['count'])
     st.metric("High Rated & Affordable", high_rated_affordable)
 
-with col2:
-    avg_rating_online = df[df['online_order'] == 'Yes']['rating_numeric'].mean()
-    avg_rating_no_online = df[df['online_order'] == 'No']['rating_numeric'].mean()
+with col2, section('insight:online_rating_diff'):
+    avg_rating_online = online_stats.loc['Yes', 'rating_mean']
+    avg_rating_no_online = online_stats.loc['No', 'rating_mean']
     st.metric("Online vs Offline Rating Diff", f"{(avg_rating_online - avg_rating_no_online):.2f}")
 
-with col3:
-    rating_votes_corr = df['rating_numeric'].corr(df['votes'])
-    st.metric("Rating-Votes Correlation", f"{rating_votes_corr:.2f}")
\ No newline at end of file
+with col3, section('insight:rating_votes_corr'):
+    rating_votes_corr = correlation_data.loc['rating_numeric', 'votes']
+    st.metric("Rating-Votes Correlation", f"{rating_votes_corr:.2f}")
+
+finish_run()
@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import os
+from utils import get_queries
+from plotting import histogram_figure, cached_figure
+from preprocessing import YES_NO_LABELS
+from profiling import start_run, finish_run, section
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +14,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_run('app')
 
 # Light Red Zomato Theme CSS with White Background
 st.markdown("""
@@ -183,107 +186,18 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize analyzer with generic CSV path and data processing
-@st.cache_data
-def load_data():
-    # Generic CSV paths
-    csv_paths = [
-        "data/zomato.csv",
-        "./data/zomato.csv",
-        "zomato.csv",
-        "./zomato.csv"
-    ]
-    
-    for csv_path in csv_paths:
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            st.success(f"✅ Data loaded successfully from {csv_path}")
-            return df
-    
-    # If no file found, create sample data
+# Shared analyzer (cached per data version across reruns and pages) or the query service
+with section('load') as record:
+    queries = get_queries()
+    overview = queries.overview()
+    record['rows'] = int(overview['totals']['count'])
+if overview['source'] is not None:
+    st.success(f"✅ Data loaded successfully from {overview['source']}")
+else:
     st.warning("Zomato CSV file not found. Using sample data for demonstration.")
-    return pd.DataFrame({
-        'name': ['Restaurant A', 'Restaurant B', 'Restaurant C', 'Restaurant D', 'Restaurant E'],
-        'location': ['Area1', 'Area2', 'Area1', 'Area3', 'Area2'],
-        'rate': ['4.2/5', '3.8/5', '4.5/5', '4.0/5', '3.5/5'],
-        'votes': [100, 150, 200, 80, 120],
-        'approx_cost(for two people)': [800, 1200, 1500, 600, 900],
-        'cuisines': ['North Indian', 'Chinese, Thai', 'Italian', 'South Indian', 'Chinese'],
-        'rest_type': ['Casual Dining', 'Quick Bites', 'Fine Dining', 'Casual Dining', 'Cafe'],
-        'online_order': ['Yes', 'No', 'Yes', 'Yes', 'No'],
-        'book_table': ['Yes', 'No', 'Yes', 'No', 'No']
-    })
-
-# Data processing class
-class ZomatoAnalyzer:
-    def __init__(self, df):
-        self.df = self._process_data(df)
-    
-    def _process_data(self, df):
-        # Create a copy to avoid modifying original
-        processed_df = df.copy()
-        
-        # Handle rating conversion
-        if 'rate' in processed_df.columns:
-            processed_df['rating_numeric'] = processed_df['rate'].apply(
-                lambda x: float(str(x).split('/')[0]) if pd.notna(x) and '/' in str(x) else 0.0
-            )
-        else:
-            processed_df['rating_numeric'] = np.random.uniform(3.0, 4.5, len(processed_df))
-        
-        # Create cost_category if not exists
-        if 'approx_cost(for two people)' in processed_df.columns:
-            processed_df['approx_cost(for two people)'] = pd.to_numeric(
-                processed_df['approx_cost(for two people)'], errors='coerce'
-            ).fillna(1000)
-            
-            # Create cost categories
-            conditions = [
-                processed_df['approx_cost(for two people)'] < 500,
-                processed_df['approx_cost(for two people)'] < 1000,
-                processed_df['approx_cost(for two people)'] < 2000,
-                processed_df['approx_cost(for two people)'] >= 2000
-            ]
-            choices = ['Budget', 'Medium', 'High', 'Premium']
-            processed_df['cost_category'] = np.select(conditions, choices, default='Medium')
-        else:
-            processed_df['cost_category'] = 'Medium'
-            processed_df['approx_cost(for two people)'] = 1000
-        
-        # Create quality tiers based on rating
-        conditions = [
-            processed_df['rating_numeric'] >= 4.0,
-            processed_df['rating_numeric'] >= 3.0,
-            processed_df['rating_numeric'] < 3.0
-        ]
-        choices = ['Excellent', 'Good', 'Average']
-        processed_df['quality_tier'] = np.select(conditions, choices, default='Good')
-        
-        # Fill missing values
-        if 'location' not in processed_df.columns:
-            processed_df['location'] = 'Unknown'
-        
-        if 'cuisines' not in processed_df.columns:
-            processed_df['cuisines'] = 'Unknown'
-            
-        if 'rest_type' not in processed_df.columns:
-            processed_df['rest_type'] = 'Casual Dining'
-            
-        return processed_df
-    
-    def get_cuisine_distribution(self):
-        if 'cuisines' in self.df.columns:
-            # Split cuisines and count
-            all_cuisines = self.df['cuisines'].str.split(', ').explode()
-            return all_cuisines.value_counts()
-        return pd.Series()
-
-# Load data and initialize analyzer
-df = load_data()
-analyzer = ZomatoAnalyzer(df)
 
 # Enhanced Sidebar with Zomato Logo
-with st.sidebar:
+with st.sidebar, section('sidebar'):
     st.markdown("""
     <div style='text-align: center; padding: 1rem;'>
         <img src='https://b.zmtcdn.com/images/logo/zomato_logo_2017.png' width='120' style='border-radius: 15px; box-shadow: 0 4px 15px rgba(211,47,47,0.3); margin-bottom: 1rem;'>
@@ -299,11 +213,11 @@ with st.sidebar:
     
     location_filter = st.multiselect(
         "📍 Select Locations",
-        options=analyzer.df['location'].unique(),
-        default=analyzer.df['location'].unique()[:3] if len(analyzer.df['location'].unique()) > 3 else analyzer.df['location'].unique()
+        options=overview['locations'],
+        default=overview['locations'][:3] if len(overview['locations']) > 3 else overview['locations']
     )
     
-    cuisine_options = analyzer.get_cuisine_distribution().index.tolist()[:15]
+    cuisine_options = list(overview['cuisines'])[:15]
     cuisine_filter = st.multiselect(
         "🍽️ Select Cuisines",
         options=cuisine_options,
@@ -312,8 +226,8 @@ with st.sidebar:
     
     cost_filter = st.multiselect(
         "💰 Cost Category",
-        options=analyzer.df['cost_category'].unique(),
-        default=analyzer.df['cost_category'].unique()
+        options=overview['cost_categories'],
+        default=overview['cost_categories']
     )
     
     rating_filter = st.slider(
@@ -327,14 +241,14 @@ with st.sidebar:
     with st.expander("🎛️ Advanced Filters"):
         rest_type_filter = st.multiselect(
             "🏪 Restaurant Type",
-            options=analyzer.df['rest_type'].unique(),
-            default=analyzer.df['rest_type'].unique()[:3]
+            options=overview['rest_types'],
+            default=overview['rest_types'][:3]
         )
         
         votes_filter = st.slider(
             "👍 Minimum Votes",
             min_value=0,
-            max_value=int(analyzer.df['votes'].max()) if 'votes' in analyzer.df.columns else 5000,
+            max_value=overview['votes_max'] if overview['votes_max'] is not None else 5000,
             value=0,
             step=50
         )
@@ -344,8 +258,9 @@ with st.sidebar:
     # Quick Stats
     st.markdown("<div class='filter-section'>", unsafe_allow_html=True)
     st.markdown("### 📊 Quick Stats")
-    total_restaurants = len(analyzer.df)
-    avg_rating = analyzer.df['rating_numeric'].mean()
+    dataset_totals = overview['totals']
+    total_restaurants = int(dataset_totals['count'])
+    avg_rating = dataset_totals['rating_mean']
     
     col1, col2 = st.columns(2)
     with col1:
@@ -357,24 +272,56 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("**📁 Data Source**")
     st.markdown("Zomato Dataset")
-    st.markdown(f"**📍 Locations:** {analyzer.df['location'].nunique()}")
-    st.markdown(f"**🍽️ Cuisines:** {analyzer.get_cuisine_distribution().shape[0]}")
+    st.markdown(f"**📍 Locations:** {len(overview['locations'])}")
+    st.markdown(f"**🍽️ Cuisines:** {len(overview['cuisines'])}")
     
     st.markdown("</div>", unsafe_allow_html=True)
 
-# Apply filters
-filtered_df = analyzer.df.copy()
-if location_filter:
-    filtered_df = filtered_df[filtered_df['location'].isin(location_filter)]
-if cuisine_filter:
-    filtered_df = filtered_df[filtered_df['cuisines'].str.contains('|'.join(cuisine_filter), na=False)]
-if cost_filter:
-    filtered_df = filtered_df[filtered_df['cost_category'].isin(cost_filter)]
-if 'rest_type_filter' in locals() and rest_type_filter:
-    filtered_df = filtered_df[filtered_df['rest_type'].isin(rest_type_filter)]
-if 'votes' in filtered_df.columns:
-    filtered_df = filtered_df[filtered_df['votes'] >= votes_filter]
-filtered_df = filtered_df[filtered_df['rating_numeric'] >= rating_filter]
+# Filter selection: precomputed bitmaps are ANDed once, and every query below reuses the rows
+selection = {
+    'categories': {
+        'location': location_filter,
+        'cost_category': cost_filter,
+        'rest_type': rest_type_filter
+    },
+    'ranges': {
+        'votes': (votes_filter, None),
+        'rating_numeric': (rating_filter, None)
+    },
+    'cuisines': cuisine_filter
+}
+# Identifies this filter state for the server-side chart caches
+data_version = str(overview['data_version'])
+filter_key = (
+    data_version, tuple(location_filter), tuple(cost_filter), tuple(rest_type_filter),
+    tuple(cuisine_filter), rating_filter, votes_filter
+)
+
+# The aggregates of this rerun are requested up front and run as fused plans on
+# first use: one selection, one pass over the cube cells, one row take per plan
+with section('aggregate') as record:
+    plan = queries.plan(selection)
+    totals_query = plan.kpis()
+    # Rating >= 4.0 is exactly the 'Very Good' and 'Excellent' quality tiers
+    high_rated_query = plan.kpis(where={'quality_tier': ['Very Good', 'Excellent']})
+    premium_query = plan.kpis(where={'cost_category': ['Premium']})
+    location_query = plan.group_by(['location'])
+    top_query = plan.top_n(10, 'rating_numeric', [
+        'name', 'location', 'rating_numeric', 'votes', 'approx_cost(for two people)', 'cuisines'
+    ])
+
+    # Read only by the chart builders, so a rerun whose figures are all cached never runs it
+    chart_plan = queries.plan(selection)
+    histogram_query = chart_plan.histogram('rating_numeric')
+    cost_query = chart_plan.group_by(['cost_category'])
+    online_query = chart_plan.group_by(['online_order'])
+    table_query = chart_plan.group_by(['book_table'])
+    quality_query = chart_plan.group_by(['quality_tier'])
+
+    filtered_totals = totals_query.value
+    location_stats = location_query.value
+    n_filtered = int(filtered_totals['count'])
+    record['rows'] = n_filtered
 
 # Main content
 st.markdown("""
@@ -384,16 +331,16 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Data Source Info
-st.info(f"📊 **Dataset Info:** {len(filtered_df):,} restaurants loaded | {filtered_df['location'].nunique()} locations | {analyzer.get_cuisine_distribution().shape[0]} cuisine types")
+st.info(f"📊 **Dataset Info:** {n_filtered:,} restaurants loaded | {len(location_stats)} locations | {len(overview['cuisines'])} cuisine types")
 
 # Key Metrics
 st.markdown('<div class="section-header">📈 Key Performance Indicators</div>', unsafe_allow_html=True)
 
 col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    total_rest = len(filtered_df)
-    progress_width = min(100, total_rest / max(1, len(analyzer.df)) * 100)
+with col1, section('kpi:restaurants'):
+    total_rest = n_filtered
+    progress_width = min(100, total_rest / max(1, total_restaurants) * 100)
     st.markdown(f"""
     <div class="metric-card">
         <h3>🏪 Total Restaurants</h3>
@@ -404,8 +351,8 @@ with col1:
     </div>
     """, unsafe_allow_html=True)
 
-with col2:
-    avg_rating = filtered_df['rating_numeric'].mean()
+with col2, section('kpi:rating'):
+    avg_rating = filtered_totals['rating_mean']
     progress_width = (avg_rating / 5) * 100
     st.markdown(f"""
     <div class="metric-card">
@@ -417,9 +364,9 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
 
-with col3:
-    locations_count = filtered_df['location'].nunique()
-    progress_width = min(100, locations_count / max(1, analyzer.df['location'].nunique()) * 100)
+with col3, section('kpi:locations'):
+    locations_count = len(location_stats)
+    progress_width = min(100, locations_count / max(1, len(overview['locations'])) * 100)
     st.markdown(f"""
     <div class="metric-card">
         <h3>📍 Locations Covered</h3>
@@ -430,8 +377,8 @@ with col3:
     </div>
     """, unsafe_allow_html=True)
 
-with col4:
-    avg_cost = filtered_df['approx_cost(for two people)'].mean()
+with col4, section('kpi:cost'):
+    avg_cost = filtered_totals['cost_mean']
     st.markdown(f"""
     <div class="metric-card">
         <h3>💰 Avg Cost for Two</h3>
@@ -447,83 +394,98 @@ st.markdown('<div class="section-header">📊 Distribution Analysis</div>', unsa
 
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, section('chart:top_locations'):
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    location_counts = filtered_df['location'].value_counts().head(10)
-    
-    fig = px.bar(
-        x=location_counts.values,
-        y=location_counts.index,
-        orientation='h',
-        title="📍 Top 10 Locations by Restaurant Count",
-        labels={'x': 'Number of Restaurants', 'y': 'Location'},
-        color=location_counts.values,
-        color_continuous_scale='Reds'
-    )
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#2c3e50')
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    def build_chart():
+        location_counts = location_stats['count'].nlargest(10)
+    
+        fig = px.bar(
+            x=location_counts.values,
+            y=location_counts.index,
+            orientation='h',
+            title="📍 Top 10 Locations by Restaurant Count",
+            labels={'x': 'Number of Restaurants', 'y': 'Location'},
+            color=location_counts.values,
+            color_continuous_scale='Reds'
+        )
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#2c3e50')
+        )
+        return fig
+    fig = cached_figure('top_locations', filter_key, build_chart)
+    with section('render:top_locations'):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with col2:
+with col2, section('chart:rating_distribution'):
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    fig = px.histogram(
-        filtered_df, 
-        x='rating_numeric',
-        nbins=20,
-        title="⭐ Distribution of Restaurant Ratings",
-        labels={'rating_numeric': 'Rating'},
-        color_discrete_sequence=['#d32f2f']
-    )
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#2c3e50')
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    def build_chart():
+        fig = histogram_figure(
+            histogram_query.value,
+            title="⭐ Distribution of Restaurant Ratings",
+            x_label='Rating',
+            color='#d32f2f'
+        )
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#2c3e50')
+        )
+        return fig
+    fig = cached_figure('rating_distribution', filter_key, build_chart)
+    with section('render:rating_distribution'):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 # More Charts
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, section('chart:cost_categories'):
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    cost_dist = filtered_df['cost_category'].value_counts()
-    fig = px.pie(
-        values=cost_dist.values,
-        names=cost_dist.index,
-        title="💰 Restaurants by Cost Category",
-        color_discrete_sequence=px.colors.sequential.Reds
-    )
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#2c3e50')
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    def build_chart():
+        cost_dist = cost_query.value['count']
+        fig = px.pie(
+            values=cost_dist.values,
+            names=cost_dist.index,
+            title="💰 Restaurants by Cost Category",
+            color_discrete_sequence=px.colors.sequential.Reds
+        )
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#2c3e50')
+        )
+        return fig
+    fig = cached_figure('cost_categories', filter_key, build_chart)
+    with section('render:cost_categories'):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with col2:
+with col2, section('chart:top_cuisines'):
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    cuisine_dist = analyzer.get_cuisine_distribution().head(10)
-    fig = px.bar(
-        x=cuisine_dist.values,
-        y=cuisine_dist.index,
-        orientation='h',
-        title="🍽️ Top 10 Most Popular Cuisines",
-        labels={'x': 'Number of Restaurants', 'y': 'Cuisine'},
-        color=cuisine_dist.values,
-        color_continuous_scale='Reds'
-    )
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#2c3e50')
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    def build_chart():
+        cuisine_dist = pd.Series(overview['cuisines']).head(10)
+        fig = px.bar(
+            x=cuisine_dist.values,
+            y=cuisine_dist.index,
+            orientation='h',
+            title="🍽️ Top 10 Most Popular Cuisines",
+            labels={'x': 'Number of Restaurants', 'y': 'Cuisine'},
+            color=cuisine_dist.values,
+            color_continuous_scale='Reds'
+        )
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#2c3e50')
+        )
+        return fig
+    # Does not depend on the sidebar filters, so it is rebuilt only when the data changes
+    fig = cached_figure('top_cuisines', (data_version,), build_chart)
+    with section('render:top_cuisines'):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Feature Analysis
@@ -531,68 +493,79 @@ st.markdown('<div class="section-header">🚀 Feature Analysis</div>', unsafe_al
 
 col1, col2, col3 = st.columns(3)
 
-with col1:
+with col1, section('chart:online_order'):
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    if 'online_order' in filtered_df.columns:
-        online_stats = filtered_df['online_order'].value_counts()
-        fig = px.pie(
-            values=online_stats.values,
-            names=online_stats.index,
-            title="📱 Online Order Availability",
-            color_discrete_sequence=['#d32f2f', '#ef9a9a']
-        )
-    else:
-        fig = px.pie(values=[1], names=['Data Not Available'], title="📱 Online Order")
-    fig.update_layout(height=300)
-    st.plotly_chart(fig, use_container_width=True)
+    def build_chart():
+        if 'online_order_pct' in filtered_totals.index:
+            online_stats = online_query.value['count'].rename(index=YES_NO_LABELS)
+            fig = px.pie(
+                values=online_stats.values,
+                names=online_stats.index,
+                title="📱 Online Order Availability",
+                color_discrete_sequence=['#d32f2f', '#ef9a9a']
+            )
+        else:
+            fig = px.pie(values=[1], names=['Data Not Available'], title="📱 Online Order")
+        fig.update_layout(height=300)
+        return fig
+    fig = cached_figure('online_order', filter_key, build_chart)
+    with section('render:online_order'):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with col2:
+with col2, section('chart:table_booking'):
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    if 'book_table' in filtered_df.columns:
-        table_stats = filtered_df['book_table'].value_counts()
-        fig = px.pie(
-            values=table_stats.values,
-            names=table_stats.index,
-            title="📅 Table Booking Availability",
-            color_discrete_sequence=['#ef9a9a', '#d32f2f']
-        )
-    else:
-        fig = px.pie(values=[1], names=['Data Not Available'], title="📅 Table Booking")
-    fig.update_layout(height=300)
-    st.plotly_chart(fig, use_container_width=True)
+    def build_chart():
+        if 'book_table_pct' in filtered_totals.index:
+            table_stats = table_query.value['count'].rename(index=YES_NO_LABELS)
+            fig = px.pie(
+                values=table_stats.values,
+                names=table_stats.index,
+                title="📅 Table Booking Availability",
+                color_discrete_sequence=['#ef9a9a', '#d32f2f']
+            )
+        else:
+            fig = px.pie(values=[1], names=['Data Not Available'], title="📅 Table Booking")
+        fig.update_layout(height=300)
+        return fig
+    fig = cached_figure('table_booking', filter_key, build_chart)
+    with section('render:table_booking'):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-with col3:
+with col3, section('chart:quality_tiers'):
     st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-    quality_stats = filtered_df['quality_tier'].value_counts()
-    fig = px.pie(
-        values=quality_stats.values,
-        names=quality_stats.index,
-        title="🏆 Quality Tiers Distribution",
-        color_discrete_sequence=px.colors.sequential.Reds
-    )
-    fig.update_layout(height=300)
-    st.plotly_chart(fig, use_container_width=True)
+    def build_chart():
+        quality_stats = quality_query.value['count']
+        fig = px.pie(
+            values=quality_stats.values,
+            names=quality_stats.index,
+            title="🏆 Quality Tiers Distribution",
+            color_discrete_sequence=px.colors.sequential.Reds
+        )
+        fig.update_layout(height=300)
+        return fig
+    fig = cached_figure('quality_tiers', filter_key, build_chart)
+    with section('render:quality_tiers'):
+        st.plotly_chart(fig, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Top Restaurants
 st.markdown('<div class="section-header">🏆 Top Rated Restaurants</div>', unsafe_allow_html=True)
 
 st.markdown('<div class="dataframe-container">', unsafe_allow_html=True)
-top_restaurants = filtered_df.nlargest(10, 'rating_numeric')[
-    ['name', 'location', 'rating_numeric', 'votes', 'approx_cost(for two people)', 'cuisines']
-]
-top_restaurants.columns = ['Restaurant Name', 'Location', 'Rating', 'Votes', 'Cost for Two', 'Cuisines']
-
-# Format the dataframe
-top_restaurants_display = top_restaurants.copy()
-top_restaurants_display['Rating'] = top_restaurants_display['Rating'].round(2)
-top_restaurants_display['Cost for Two'] = '₹' + top_restaurants_display['Cost for Two'].astype(int).astype(str)
-if 'Votes' in top_restaurants_display.columns:
-    top_restaurants_display['Votes'] = top_restaurants_display['Votes'].apply(lambda x: f"{x:,}")
-
-st.dataframe(top_restaurants_display, use_container_width=True, height=400)
+with section('top_restaurants', rows=n_filtered):
+    top_restaurants = top_query.value
+    top_restaurants.columns = ['Restaurant Name', 'Location', 'Rating', 'Votes', 'Cost for Two', 'Cuisines']
+
+    # Format the dataframe
+    top_restaurants_display = top_restaurants.copy()
+    top_restaurants_display['Rating'] = top_restaurants_display['Rating'].round(2)
+    top_restaurants_display['Cost for Two'] = '₹' + top_restaurants_display['Cost for Two'].astype(int).astype(str)
+    if 'Votes' in top_restaurants_display.columns:
+        top_restaurants_display['Votes'] = top_restaurants_display['Votes'].apply(lambda x: f"{x:,}")
+
+    st.dataframe(top_restaurants_display, use_container_width=True, height=400)
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Insights Section
@@ -600,9 +573,9 @@ st.markdown('<div class="section-header">💡 Key Business Insights</div>', unsa
 
 col1, col2, col3 = st.columns(3)
 
-with col1:
-    if 'online_order' in filtered_df.columns:
-        online_order_pct = (filtered_df['online_order'] == 'Yes').mean() * 100
+with col1, section('insight:online_order'):
+    if 'online_order_pct' in filtered_totals.index:
+        online_order_pct = filtered_totals['online_order_pct']
     else:
         online_order_pct = 70.0
     st.markdown(f"""
@@ -615,9 +588,9 @@ with col1:
     </div>
     """, unsafe_allow_html=True)
 
-with col2:
-    high_rated_count = len(filtered_df[filtered_df['rating_numeric'] >= 4.0])
-    high_rated_pct = (high_rated_count / len(filtered_df)) * 100 if len(filtered_df) > 0 else 0
+with col2, section('insight:high_rated'):
+    high_rated_count = int(high_rated_query.value['count'])
+    high_rated_pct = (high_rated_count / n_filtered) * 100 if n_filtered > 0 else 0
     st.markdown(f"""
     <div class="insight-box">
         <h4>🏆 Quality Standards</h4>
@@ -628,9 +601,9 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
 
-with col3:
-    premium_count = len(filtered_df[filtered_df['cost_category'] == 'Premium'])
-    premium_pct = (premium_count / len(filtered_df)) * 100 if len(filtered_df) > 0 else 0
+with col3, section('insight:premium'):
+    premium_count = int(premium_query.value['count'])
+    premium_pct = (premium_count / n_filtered) * 100 if n_filtered > 0 else 0
     st.markdown(f"""
     <div class="insight-box">
         <h4>💎 Premium Segment</h4>
@@ -653,4 +626,6 @@ st.markdown("""
         <span class="badge">Zomato Data</span>
     </div>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_run()
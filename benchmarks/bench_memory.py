@@ -0,0 +1,33 @@
+# benchmarks/bench_memory.py
+"""Memory report for the processed frame with and without compact dtypes
+
+Run from the repository root:
+    python -m benchmarks.bench_memory [rows]
+"""
+import sys
+import time
+
+from benchmarks.bench_preprocessing import make_raw_frame
+from preprocessing import clean_chunk, finalize_frame, memory_report
+
+def time_groupby(df, by, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        df.groupby(by, observed=True)['rating_numeric'].mean()
+    return (time.perf_counter() - start) / repeat
+
+def run(n_rows):
+    raw = make_raw_frame(n_rows)
+    cleaned = clean_chunk(raw)
+    before = finalize_frame(cleaned, compact=False)
+    before['cost_category'] = before['cost_category'].astype(object)
+    before['quality_tier'] = before['quality_tier'].astype(object)
+    after = finalize_frame(cleaned, compact=True)
+
+    print(memory_report(before, after).to_string())
+    print()
+    print(f"groupby location (object):      {time_groupby(before, 'location') * 1e3:8.2f} ms")
+    print(f"groupby location (categorical): {time_groupby(after, 'location') * 1e3:8.2f} ms")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,29 @@
+# benchmarks/bench_preprocessing.py
+"""Scaling benchmark for the vectorized cleaning stage
+
+Run from the repository root:
+    python -m benchmarks.bench_preprocessing [rows ...]
+"""
+import sys
+import time
+
+from preprocessing import clean_chunk, finalize_frame
+from synthetic import generate_frame
+
+DEFAULT_SIZES = [100_000, 500_000, 1_000_000, 2_000_000]
+
+def make_raw_frame(n_rows, seed=42):
+    """Raw-format columns as they appear in zomato.csv (reviews_list left empty)"""
+    return generate_frame(n_rows, seed=seed, max_reviews=0)
+
+def run(sizes):
+    print(f"{'rows':>12} {'seconds':>10} {'rows/s':>14} {'ns/row':>10}")
+    for n_rows in sizes:
+        raw = make_raw_frame(n_rows)
+        start = time.perf_counter()
+        finalize_frame(clean_chunk(raw))
+        elapsed = time.perf_counter() - start
+        print(f"{n_rows:>12,} {elapsed:>10.3f} {n_rows / elapsed:>14,.0f} {elapsed / n_rows * 1e9:>10.1f}")
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,139 @@
+# benchmarks/bench_suite.py
+"""Headless benchmarks of the analytic hot paths at several data scales
+
+Each case reports wall time, peak traced memory (tracemalloc) and rows per
+second. Results are written as JSON so runs can be compared across versions.
+
+Run from the repository root:
+    python -m benchmarks.bench_suite [--sizes 800 50000 ...] [--output FILE] [--compare OLD.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from data_loader import ZomatoAnalyzer, read_zomato_csv
+from preprocessing import clean_chunk, finalize_frame, split_listings
+from synthetic import write_synthetic
+
+DEFAULT_SIZES = [800, 50_000, 1_000_000, 10_000_000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def measure(func):
+    """Run func once; return (result, seconds, peak traced MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+def sidebar_selection(analyzer):
+    """A typical sidebar state: a few locations and types, rating/votes floors, one cuisine"""
+    df = analyzer.df
+    return analyzer.filter_engine.select(
+        categories={
+            'location': df['location'].unique().tolist()[:3],
+            'cost_category': ['Budget', 'Moderate'],
+            'rest_type': df['rest_type'].unique().tolist()[:2]
+        },
+        ranges={'votes': (50, None), 'rating_numeric': (3.5, None)},
+        cuisines=['North Indian']
+    )
+
+def fresh_pairs(analyzer):
+    # Drop the cached co-occurrence matrix so the full computation is timed
+    analyzer.cuisine_index._cooccurrence = None
+    return analyzer.cuisine_index.top_pairs(20)
+
+def run_size(n_rows, workdir):
+    """All cases at one scale; returns a list of result dicts"""
+    csv_path = os.path.join(workdir, f'zomato_{n_rows}.csv')
+    write_synthetic(csv_path, n_rows)
+
+    cases = []
+    def record(case, func, rows=n_rows):
+        result, seconds, peak_mb = measure(func)
+        cases.append({
+            'case': case,
+            'rows': n_rows,
+            'seconds': round(seconds, 6),
+            'peak_mb': round(peak_mb, 3),
+            'rows_per_s': round(rows / seconds, 1) if seconds > 0 else None
+        })
+        print(f"{n_rows:>12,} {case:<28} {seconds:>10.4f} s {peak_mb:>10.1f} MB {rows / max(seconds, 1e-12):>14,.0f} rows/s")
+        return result
+
+    raw = record('load_csv', lambda: read_zomato_csv(csv_path))
+    record('process', lambda raw=raw: split_listings(finalize_frame(clean_chunk(raw))))
+    del raw
+    record('analyzer_cold', lambda: ZomatoAnalyzer(csv_path))
+    analyzer = record('analyzer_warm', lambda: ZomatoAnalyzer(csv_path))
+    mask = np.zeros(len(analyzer.df), dtype=bool)
+    mask[::2] = True
+    record('cuisine_distribution', analyzer.get_cuisine_distribution)
+    record('cuisine_distribution_masked', lambda: analyzer.get_cuisine_distribution(mask))
+    record('sidebar_filters', lambda: sidebar_selection(analyzer))
+    record('cuisine_pairs', lambda: fresh_pairs(analyzer))
+    record('cuisine_triples', lambda: analyzer.cuisine_index.top_triples(20))
+    return cases
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """Print the time ratio of every case against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = {(r['case'], r['rows']): r for r in json.load(f)['results']}
+    print(f"\n{'rows':>12} {'case':<28} {'before s':>10} {'after s':>10} {'speedup':>8}")
+    for r in results:
+        old = baseline.get((r['case'], r['rows']))
+        if old is None:
+            continue
+        speedup = old['seconds'] / r['seconds'] if r['seconds'] else float('nan')
+        print(f"{r['rows']:>12,} {r['case']:<28} {old['seconds']:>10.4f} {r['seconds']:>10.4f} {speedup:>7.2f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in args.sizes:
+            results.extend(run_size(n_rows, workdir))
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/check_sql_parity.py
+"""Parity check of the DuckDB backend against the in-memory pandas engine
+
+Command-line runner for the comparisons in tests/test_sql_parity.py, on a
+synthetic dump of any size and optionally a real CSV. Reports every
+mismatch, before and after a delta file is upserted, and exits with
+status 1 on any.
+
+Run from the repository root:
+    python -m benchmarks.check_sql_parity [--rows 20000] [--csv zomato.csv]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from data_loader import ZomatoAnalyzer, find_deltas
+from query_service import QueryEngine
+from sql_backend import SQLQueryEngine, sql_available
+from synthetic import write_synthetic
+
+def check(pandas_engine, sql_engine, label):
+    """Compare both engines on every query and selection; returns the number of mismatches"""
+    # Imported once duckdb is known to be there: the test module skips itself without it
+    from tests.test_sql_parity import comparisons
+    compared = failures = 0
+    for name, problem in comparisons(pandas_engine, sql_engine):
+        compared += 1
+        if problem:
+            failures += 1
+            print(f"MISMATCH [{label}] {name}: {problem}")
+    print(f"[{label}] {compared - failures}/{compared} comparisons match")
+    return failures
+
+def run(csv_path, workdir):
+    from tests.test_sql_parity import write_delta
+    delta_dir = os.path.join(workdir, 'deltas')
+    os.makedirs(delta_dir, exist_ok=True)
+    pandas_engine = QueryEngine(ZomatoAnalyzer(csv_path))
+    sql_engine = SQLQueryEngine(csv_path, delta_dir=delta_dir)
+    failures = check(pandas_engine, sql_engine, os.path.basename(csv_path))
+
+    write_delta(csv_path, os.path.join(delta_dir, '0001.csv'))
+    pandas_engine.analyzer.refresh(find_deltas(delta_dir))
+    sql_engine.refresh()
+    failures += check(pandas_engine, sql_engine, os.path.basename(csv_path) + ' + delta')
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000, help='rows of the synthetic CSV')
+    parser.add_argument('--csv', help='also check this CSV (copied, so no artifacts are written next to it)')
+    args = parser.parse_args(argv)
+    if not sql_available():
+        sys.exit("duckdb and pyarrow are required for the parity check (pip install -r requirements-duckdb.txt)")
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        synthetic_path = os.path.join(workdir, 'synthetic', 'zomato.csv')
+        os.makedirs(os.path.dirname(synthetic_path))
+        write_synthetic(synthetic_path, args.rows)
+        failures += run(synthetic_path, os.path.dirname(synthetic_path))
+        if args.csv:
+            csv_path = os.path.join(workdir, 'source', os.path.basename(args.csv))
+            os.makedirs(os.path.dirname(csv_path))
+            shutil.copy(args.csv, csv_path)
+            failures += run(csv_path, os.path.dirname(csv_path))
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
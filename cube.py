@@ -0,0 +1,159 @@
+# cube.py
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+COST_COLUMN = 'approx_cost(for two people)'
+
+CUBE_DIMENSIONS = ['location', 'rest_type', 'cost_category', 'online_order', 'book_table', 'quality_tier']
+CUBE_MEASURES = {'rating': 'rating_numeric', 'votes': 'votes', 'cost': COST_COLUMN}
+
+# Hidden dimension: bit i is set when measure i is present, so statistics can
+# skip missing values (e.g. unrated restaurants) exactly like pandas does
+VALID_DIMENSION = '_valid'
+
+class AggregateCube:
+    """Pre-aggregated statistics over every combination of the dashboard dimensions
+
+    Each cell holds the row count and, per measure, the sum and sum of
+    squares, plus the cross-product sum of every measure pair. Means,
+    standard deviations, percentages and correlations for any filter on
+    the dimensions are then sums over matching cells instead of row scans.
+    """
+
+    def __init__(self, df, dimensions=CUBE_DIMENSIONS, measures=CUBE_MEASURES):
+        self.dimensions = [dim for dim in dimensions if dim in df.columns]
+        self.measures = list(measures)
+        self.measure_columns = dict(measures)
+        self.n_rows = len(df)
+
+        values = {name: df[col].to_numpy(dtype=float) for name, col in measures.items()}
+        valid = {name: ~np.isnan(v) for name, v in values.items()}
+        values = {name: np.where(valid[name], v, 0.0) for name, v in values.items()}
+
+        stats = {'n': np.ones(len(df), dtype=np.int64)}
+        for name in self.measures:
+            stats[f'sum_{name}'] = values[name]
+            stats[f'sq_{name}'] = values[name] ** 2
+        for x, y in combinations(self.measures, 2):
+            stats[f'xp_{x}_{y}'] = values[x] * values[y]
+
+        frame = pd.DataFrame(stats)
+        for dim in self.dimensions:
+            frame[dim] = df[dim].to_numpy()
+        frame[VALID_DIMENSION] = sum(valid[name].astype(np.int64) << i for i, name in enumerate(self.measures))
+
+        self.cells = frame.groupby(
+            self.dimensions + [VALID_DIMENSION], observed=True, dropna=False
+        ).sum().reset_index()
+
+    def apply_delta(self, removed, added):
+        """New cube with the rows of removed taken out and the rows of added put in
+
+        Cell statistics are plain sums, so the cells of the two small frames
+        are subtracted and added instead of re-aggregating the dataset.
+        """
+        keys = self.dimensions + [VALID_DIMENSION]
+        removed_cells = AggregateCube(removed, self.dimensions, self.measure_columns).cells
+        added_cells = AggregateCube(added, self.dimensions, self.measure_columns).cells
+        stats = [col for col in self.cells.columns if col not in keys]
+        removed_cells[stats] = -removed_cells[stats]
+
+        cube = AggregateCube.__new__(AggregateCube)
+        cube.dimensions = self.dimensions
+        cube.measures = self.measures
+        cube.measure_columns = self.measure_columns
+        cube.n_rows = self.n_rows - len(removed) + len(added)
+        cells = pd.concat([self.cells, removed_cells, added_cells], ignore_index=True)
+        cells = cells.groupby(keys, observed=True, dropna=False).sum().reset_index()
+        cube.cells = cells[cells['n'] > 0].reset_index(drop=True)
+        return cube
+
+    def _filter_cells(self, filters, cells=None):
+        cells = self.cells if cells is None else cells
+        for dim, selected in (filters or {}).items():
+            if selected:
+                cells = cells[cells[dim].isin(selected)]
+        return cells
+
+    def _valid_for(self, cells, *names):
+        bits = sum(1 << self.measures.index(name) for name in names)
+        return cells[(cells[VALID_DIMENSION] & bits) == bits]
+
+    def _group(self, cells, by):
+        if not by:
+            return cells.assign(_all=0).groupby('_all')
+        return cells.groupby(by, observed=True, dropna=True)
+
+    def summary(self, by=None, filters=None):
+        """Counts, means, stds and Yes-percentages per group of the `by` dimensions
+
+        filters maps a dimension to the allowed values (empty means no filter).
+        Without `by` a single-row frame for the whole selection is returned.
+        """
+        return self._summarize(self._filter_cells(filters), by)
+
+    def summaries(self, requests, filters=None):
+        """summary() of several (by, filters) requests, answered from one shared pass
+
+        The cells are filtered by the common filters once and rolled up to
+        the union of every requested dimension; each request then groups
+        that smaller frame. A request's own filters narrow the common ones.
+        """
+        cells = self._filter_cells(filters)
+        # The Yes/No flags are always kept: every summary reports their percentages
+        used = {'online_order', 'book_table'}
+        used.update(dim for by, request_filters in requests for dim in list(by or []) + list(request_filters or {}))
+        keys = [dim for dim in self.dimensions if dim in used] + [VALID_DIMENSION]
+        stats = [col for col in cells.columns if col not in self.dimensions and col != VALID_DIMENSION]
+        rolled = cells.groupby(keys, observed=True, dropna=False, sort=False)[stats].sum().reset_index()
+        return [self._summarize(self._filter_cells(request_filters, rolled), by) for by, request_filters in requests]
+
+    def _summarize(self, cells, by):
+        result = self._group(cells, by)['n'].sum().rename('count').to_frame()
+
+        for name in self.measures:
+            grouped = self._group(self._valid_for(cells, name), by)
+            n = grouped['n'].sum()
+            total = grouped[f'sum_{name}'].sum()
+            squares = grouped[f'sq_{name}'].sum()
+            result[f'{name}_count'] = n
+            result[f'{name}_mean'] = total / n
+            result[f'{name}_std'] = np.sqrt(((squares - total ** 2 / n) / (n - 1)).clip(lower=0))
+
+        for flag in ('online_order', 'book_table'):
+            if flag in self.dimensions:
+                flagged = self._group(cells[cells[flag].astype(bool)], by)['n'].sum()
+                result[f'{flag}_pct'] = flagged.reindex(result.index, fill_value=0) / result['count'] * 100
+
+        result[[c for c in result.columns if c.endswith('_count')]] = (
+            result[[c for c in result.columns if c.endswith('_count')]].fillna(0).astype(np.int64)
+        )
+        if by:
+            return result
+        # An empty selection still yields one row: zero counts, NaN statistics
+        return result.reset_index(drop=True).reindex([0]).fillna(
+            {c: 0 for c in result.columns if c.endswith('_count') or c == 'count'}
+        )
+
+    def totals(self, filters=None):
+        """summary() for the whole selection as a Series"""
+        return self.summary(filters=filters).iloc[0]
+
+    def correlation(self, filters=None):
+        """Pairwise Pearson correlation of the measures, as DataFrame.corr() computes it"""
+        cells = self._filter_cells(filters)
+        corr = pd.DataFrame(np.eye(len(self.measures)), index=self.measures, columns=self.measures)
+        for x, y in combinations(self.measures, 2):
+            both = self._valid_for(cells, x, y)
+            n = both['n'].sum()
+            if n < 2:
+                corr.loc[x, y] = corr.loc[y, x] = np.nan
+                continue
+            sx, sy = both[f'sum_{x}'].sum(), both[f'sum_{y}'].sum()
+            cov = both[f'xp_{x}_{y}'].sum() - sx * sy / n
+            var_x = both[f'sq_{x}'].sum() - sx ** 2 / n
+            var_y = both[f'sq_{y}'].sum() - sy ** 2 / n
+            corr.loc[x, y] = corr.loc[y, x] = cov / np.sqrt(var_x * var_y)
+        return corr
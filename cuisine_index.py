@@ -0,0 +1,189 @@
+# cuisine_index.py
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+CUISINE_SEPARATOR = ','
+
+class CuisineIndex:
+    """Cuisine membership of every row, stored as arrays instead of Python lists
+
+    Forward direction (CSR): the cuisine codes of row i are
+    codes[offsets[i]:offsets[i + 1]], each code indexing into vocabulary.
+    Inverted direction: the sorted row ids serving cuisine c are
+    postings[posting_offsets[c]:posting_offsets[c + 1]].
+    """
+
+    def __init__(self, cuisines):
+        self.n_rows = len(cuisines)
+        self._build_forward(cuisines)
+        self._build_postings()
+        self._incidence = None
+        self._cooccurrence = None
+
+    def _build_forward(self, cuisines):
+        # Cuisine strings repeat heavily, so split each distinct combination once
+        combo_of_row, combos = pd.factorize(cuisines.fillna(''))
+        tokens = pd.Series(combos, dtype=object).str.split(CUISINE_SEPARATOR).explode().str.strip()
+        tokens = tokens[tokens != '']
+        tokens = tokens[~pd.MultiIndex.from_arrays([tokens.index, tokens]).duplicated()]
+
+        self.vocabulary = np.array(sorted(tokens.unique()), dtype=object)
+        self.code_of = {name: code for code, name in enumerate(self.vocabulary)}
+        combo_codes = tokens.map(self.code_of).to_numpy(dtype=np.int32)
+        combo_lengths = np.bincount(tokens.index.to_numpy(), minlength=len(combos))
+        combo_offsets = np.concatenate([[0], np.cumsum(combo_lengths)])
+
+        # Expand per-combination code runs to per-row runs without a Python loop
+        lengths = combo_lengths[combo_of_row] if len(combo_of_row) else np.zeros(0, dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        starts = np.repeat(combo_offsets[combo_of_row] - self.offsets[:-1], lengths)
+        self.codes = combo_codes[starts + np.arange(self.offsets[-1])]
+
+    def _build_postings(self):
+        row_ids = np.repeat(np.arange(self.n_rows), self.lengths)
+        order = np.argsort(self.codes, kind='stable')
+        self.postings = row_ids[order]
+        counts = np.bincount(self.codes, minlength=len(self.vocabulary))
+        self.posting_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def rows_for(self, cuisine):
+        """Sorted row ids of restaurants serving cuisine (exact name match)"""
+        code = self.code_of.get(cuisine)
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return self.postings[self.posting_offsets[code]:self.posting_offsets[code + 1]]
+
+    def mask_any(self, cuisines):
+        """Boolean row mask: serves at least one of cuisines"""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for cuisine in cuisines:
+            mask[self.rows_for(cuisine)] = True
+        return mask
+
+    def mask_all(self, cuisines):
+        """Boolean row mask: serves every one of cuisines"""
+        mask = np.ones(self.n_rows, dtype=bool)
+        for cuisine in cuisines:
+            serves = np.zeros(self.n_rows, dtype=bool)
+            serves[self.rows_for(cuisine)] = True
+            mask &= serves
+        return mask
+
+    def row_mask_to_entries(self, mask):
+        """Expand a boolean row mask to a mask over the flat codes array"""
+        return np.repeat(mask, self.lengths)
+
+    def counts(self, mask=None):
+        """Restaurants per cuisine, optionally restricted to a row mask"""
+        codes = self.codes if mask is None else self.codes[self.row_mask_to_entries(mask)]
+        counts = np.bincount(codes, minlength=len(self.vocabulary))
+        distribution = pd.Series(counts, index=self.vocabulary, name='count')
+        return distribution[distribution > 0].sort_values(ascending=False, kind='stable')
+
+    @property
+    def incidence(self):
+        """Sparse restaurant x cuisine 0/1 matrix; the CSR arrays are offsets and codes"""
+        if self._incidence is None:
+            data = np.ones(len(self.codes), dtype=np.int32)
+            self._incidence = sparse.csr_matrix(
+                (data, self.codes, self.offsets), shape=(self.n_rows, len(self.vocabulary))
+            )
+        return self._incidence
+
+    def cooccurrence(self, mask=None):
+        """Cuisine x cuisine co-occurrence counts (X^T X), cached for the full dataset"""
+        if mask is not None:
+            subset = self.incidence[np.flatnonzero(mask)]
+            return (subset.T @ subset).tocsr()
+        if self._cooccurrence is None:
+            self._cooccurrence = (self.incidence.T @ self.incidence).tocsr()
+        return self._cooccurrence
+
+    def top_pairs(self, k=20, mask=None):
+        """Most frequent cuisine pairs, optionally within a row mask"""
+        pairs = sparse.triu(self.cooccurrence(mask), k=1).tocoo()
+        top = _top_k(pairs.data, k)
+        return pd.DataFrame({
+            'Cuisine 1': self.vocabulary[pairs.row[top]],
+            'Cuisine 2': self.vocabulary[pairs.col[top]],
+            'Count': pairs.data[top]
+        })
+
+    def top_triples(self, k=20, mask=None):
+        """Most frequent cuisine triples, optionally within a row mask
+
+        Rows are grouped by cuisine count so each group is a dense
+        (rows x length) code matrix; triples are enumerated over column
+        positions, which keeps the work vectorized over rows.
+        """
+        n_codes = len(self.vocabulary)
+        lengths = self.lengths
+        keys = []
+        for length in np.unique(lengths[lengths >= 3]):
+            rows = lengths == length
+            if mask is not None:
+                rows &= mask
+            starts = self.offsets[:-1][rows]
+            if len(starts) == 0:
+                continue
+            row_codes = np.sort(self.codes[starts[:, None] + np.arange(length)], axis=1).astype(np.int64)
+            for a, b, c in combinations(range(length), 3):
+                keys.append((row_codes[:, a] * n_codes + row_codes[:, b]) * n_codes + row_codes[:, c])
+
+        if not keys:
+            return pd.DataFrame(columns=['Cuisine 1', 'Cuisine 2', 'Cuisine 3', 'Count'])
+        triples, counts = np.unique(np.concatenate(keys), return_counts=True)
+        top = _top_k(counts, k)
+        triples = triples[top]
+        return pd.DataFrame({
+            'Cuisine 1': self.vocabulary[triples // (n_codes * n_codes)],
+            'Cuisine 2': self.vocabulary[triples // n_codes % n_codes],
+            'Cuisine 3': self.vocabulary[triples % n_codes],
+            'Count': counts[top]
+        })
+
+    def apply_delta(self, keep, cuisines):
+        """New index over the rows where keep is True followed by cuisines as new rows
+
+        Only the new rows are tokenized; the codes of kept rows are remapped
+        onto the merged vocabulary.
+        """
+        added = CuisineIndex(cuisines)
+        vocabulary = np.array(sorted(set(self.vocabulary) | set(added.vocabulary)), dtype=object)
+        old_codes = np.searchsorted(vocabulary, self.vocabulary).astype(np.int32)
+        new_codes = np.searchsorted(vocabulary, added.vocabulary).astype(np.int32)
+        lengths = np.concatenate([self.lengths[keep], added.lengths])
+
+        index = CuisineIndex.__new__(CuisineIndex)
+        index.n_rows = len(lengths)
+        index.vocabulary = vocabulary
+        index.code_of = {name: code for code, name in enumerate(vocabulary)}
+        index.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        index.codes = np.concatenate([
+            old_codes[self.codes[self.row_mask_to_entries(keep)]], new_codes[added.codes]
+        ]).astype(np.int32)
+        index._build_postings()
+        index._incidence = None
+        index._cooccurrence = None
+        return index
+
+    def iter_rows(self):
+        """Cuisine names of each row, in row order"""
+        for start, end in zip(self.offsets[:-1], self.offsets[1:]):
+            yield self.vocabulary[self.codes[start:end]].tolist()
+
+
+def _top_k(values, k):
+    """Positions of the k largest values, largest first"""
+    if len(values) > k:
+        candidates = np.argpartition(-values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')]
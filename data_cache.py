@@ -0,0 +1,158 @@
+# data_cache.py
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Bump when the layout of cached artifacts changes so stale files are rebuilt
+CACHE_VERSION = 7
+HASH_BLOCK_SIZE = 1 << 20
+METADATA_KEY = b'zomato_cache'
+
+
+def cache_available():
+    return pq is not None
+
+
+def file_fingerprint(path, with_hash=False):
+    """Describe a source file by size, mtime and (optionally) content hash"""
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['sha256'] = content_hash(path)
+    return fingerprint
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verified_path_for(cache_path):
+    """Sidecar recording the source fingerprint last confirmed by content hash"""
+    return f"{cache_path}.verified.json"
+
+
+def source_matches(source_path, stored, verified_path):
+    """Check a stored file_fingerprint(with_hash=True) against the current source file
+
+    Size and mtime are compared first; when only the mtime differs (e.g. the
+    file was touched or copied) the content hash decides. A hash match is
+    recorded in verified_path, so later checks take the fast path again.
+    """
+    current = file_fingerprint(source_path)
+    if stored.get('size') != current['size']:
+        return False
+    if stored.get('mtime_ns') == current['mtime_ns']:
+        return True
+    verified = dict(current, sha256=stored.get('sha256'))
+    try:
+        with open(verified_path) as f:
+            if json.load(f) == verified:
+                return True
+    except (OSError, ValueError):
+        pass
+    if stored.get('sha256') != content_hash(source_path):
+        return False
+    tmp_path = f"{verified_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(verified, f)
+        os.replace(tmp_path, verified_path)
+    except OSError:
+        # Read-only data directory: the next check hashes again
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def cache_path_for(source_path, variant='raw'):
+    """Parquet artifact stored next to the source file"""
+    base, _ = os.path.splitext(source_path)
+    return f"{base}.{variant}.parquet"
+
+
+def read_cache_metadata(cache_path):
+    """Return the metadata stored in a cached artifact, or None if unreadable"""
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    if METADATA_KEY not in metadata:
+        return None
+    return json.loads(metadata[METADATA_KEY])
+
+
+def is_cache_valid(source_path, cache_path, variant='raw'):
+    """Check a cached artifact against the current state of its source file (see source_matches())"""
+    if not cache_available() or not os.path.exists(cache_path):
+        return False
+    metadata = read_cache_metadata(cache_path)
+    if metadata is None:
+        return False
+    if metadata.get('version') != CACHE_VERSION or metadata.get('variant') != variant:
+        return False
+    return source_matches(source_path, metadata.get('source', {}), verified_path_for(cache_path))
+
+
+def tag_schema(schema, source_path, variant='raw'):
+    """Arrow schema carrying the source fingerprint that is_cache_valid() checks"""
+    metadata = {
+        'version': CACHE_VERSION,
+        'variant': variant,
+        'source': file_fingerprint(source_path, with_hash=True),
+    }
+    schema_metadata = dict(schema.metadata or {})
+    schema_metadata[METADATA_KEY] = json.dumps(metadata).encode()
+    return schema.with_metadata(schema_metadata)
+
+
+def write_frame_cache(df, source_path, cache_path, variant='raw'):
+    """Write a DataFrame to Parquet tagged with the source fingerprint"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(tag_schema(table.schema, source_path, variant).metadata)
+
+    # Write to a temporary file first so concurrent readers never see a partial file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_frame_cache(cache_path, columns=None):
+    """Memory-map a cached Parquet artifact into a DataFrame"""
+    return pd.read_parquet(cache_path, columns=columns, engine='pyarrow', memory_map=True)
+
+
+def load_with_cache(source_path, build, variant='raw', columns=None):
+    """Return build(source_path), reusing the Parquet artifact when it is fresh"""
+    if not cache_available():
+        return build(source_path)
+
+    cache_path = cache_path_for(source_path, variant)
+    if is_cache_valid(source_path, cache_path, variant):
+        return read_frame_cache(cache_path, columns=columns)
+
+    df = build(source_path)
+    try:
+        write_frame_cache(df, source_path, cache_path, variant)
+    except (OSError, pa.ArrowException):
+        # Read-only data directory or unsupported column types: serve uncached
+        pass
+    if columns is not None:
+        df = df[columns]
+    return df
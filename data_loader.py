@@ -1,105 +1,355 @@
 # data_loader.py
+import copy
+import glob
+import os
+import threading
 import pandas as pd
 import numpy as np
-import random
+from cuisine_index import CuisineIndex
+from cube import AggregateCube
+from data_cache import cache_available, file_fingerprint, load_with_cache
+from filters import FilterEngine
+from menu import extract_menu, load_menu, menu_stats
+from synthetic import LISTINGS_PER_RESTAURANT, generate_frame
+from terms import dish_index
+from preprocessing import clean_chunk, compact_dtypes, finalize_frame, split_listings, YES_NO_LABELS
+from reviews import ensure_reviews_table
+
+# Generic CSV paths, checked in order
+CSV_PATHS = [
+    "data/zomato.csv",
+    "./data/zomato.csv",
+    "zomato.csv",
+    "./zomato.csv"
+]
+
+# Delta files (same columns as zomato.csv) upserted on top of the base CSV, in name order
+DELTA_DIR = os.environ.get('ZOMATO_DELTA_DIR', 'data/deltas')
+
+# Chunked ingestion: rows per chunk and the projected columns with their dtypes
+DEFAULT_CHUNKSIZE = 10_000
+STREAM_DTYPES = {
+    'url': str,
+    'address': str,
+    'name': str,
+    'online_order': str,
+    'book_table': str,
+    'rate': str,
+    'votes': str,
+    'location': str,
+    'rest_type': str,
+    'cuisines': str,
+    'dish_liked': str,
+    'approx_cost(for two people)': str,
+    'listed_in(type)': str,
+    'listed_in(city)': str
+}
+
+# Raw text columns dropped from self.df once loaded; per-review analytics read the
+# reviews table (reviews.load_reviews) instead of reviews_list
+RAW_TEXT_COLUMNS = ['reviews_list', 'phone']
+
+# Restaurants in the generated sample data used when no CSV is found
+SAMPLE_RESTAURANTS = 800
+
+# Columns of the top-N restaurant lists
+TOP_COLUMNS = ['name', 'location', 'rating_numeric', 'votes', 'approx_cost(for two people)', 'cuisines']
+
+# Metrics available to ZomatoAnalyzer.compare(): (column, aggregation, scale)
+COMPARISON_METRICS = {
+    'Restaurant Count': ('votes', 'size', 1),
+    'Average Rating': ('rating_numeric', 'mean', 1),
+    'Average Cost': ('approx_cost(for two people)', 'mean', 1),
+    'Average Votes': ('votes', 'mean', 1),
+    'Online Order %': ('online_order', 'mean', 100),
+    'Table Booking %': ('book_table', 'mean', 100)
+}
+
+def find_csv(paths=CSV_PATHS):
+    """Return the first existing Zomato CSV path, or None"""
+    for csv_path in paths:
+        if os.path.exists(csv_path):
+            return csv_path
+    return None
+
+def read_zomato_csv(csv_path):
+    """Parse the raw CSV, dropping the empty trailing columns of the dump"""
+    df = pd.read_csv(csv_path)
+    return df.loc[:, ~df.columns.str.startswith('Unnamed:')]
+
+def find_deltas(delta_dir=None):
+    """Delta CSV files to apply, oldest (lowest name) first"""
+    return sorted(glob.glob(os.path.join(delta_dir or DELTA_DIR, '*.csv')))
+
+def delta_key(delta_path):
+    """Identity of a delta file's current contents"""
+    fingerprint = file_fingerprint(delta_path)
+    return (delta_path, fingerprint['size'], fingerprint['mtime_ns'])
+
+def load_zomato_csv(csv_path):
+    """Load the raw CSV through its Parquet cache"""
+    return load_with_cache(csv_path, read_zomato_csv)
+
+def stream_zomato_csv(csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    """Read the CSV in chunks, keeping only the cleaned analytic columns
+
+    Peak memory is bounded by one raw chunk plus the compact output, since
+    reviews_list, menu_item and phone are never materialized (see RAW_TEXT_COLUMNS).
+    """
+    reader = pd.read_csv(
+        csv_path,
+        usecols=lambda col: col in STREAM_DTYPES,
+        dtype=STREAM_DTYPES,
+        chunksize=chunksize
+    )
+    chunks = [clean_chunk(chunk) for chunk in reader]
+    if not chunks:
+        return clean_chunk(pd.DataFrame(columns=list(STREAM_DTYPES)))
+    return pd.concat(chunks, ignore_index=True)
+
+def load_zomato_stream(csv_path, chunksize=DEFAULT_CHUNKSIZE):
+    """Stream the CSV through its compact Parquet cache"""
+    return load_with_cache(
+        csv_path, lambda path: stream_zomato_csv(path, chunksize), variant='compact'
+    )
+
+def _state_attribute(name):
+    """Analyzer attribute stored in its state dict, which refresh() replaces as a whole"""
+    def set_value(self, value):
+        self._state[name] = value
+    return property(lambda self: self._state.get(name), set_value)
 
 class ZomatoAnalyzer:
-    def __init__(self):
-        self.df = None
+    # Data and derived structures; readers see one consistent version of all of them
+    df = _state_attribute('df')
+    listings = _state_attribute('listings')
+    menu = _state_attribute('menu')
+    applied_deltas = _state_attribute('applied_deltas')
+    cuisine_index = _state_attribute('cuisine_index')
+    filter_engine = _state_attribute('filter_engine')
+    cube = _state_attribute('cube')
+    dish_index = _state_attribute('dish_index')
+
+    def __init__(self, csv_path=None, chunksize=None, dedupe=True):
+        self._state = {}
+        # Source CSV, or None when running on generated sample data
+        self.source = csv_path if csv_path is not None else find_csv()
+        self.chunksize = chunksize
+        # One row per restaurant in self.df; listed_in(...) rows live in self.listings
+        self.dedupe = dedupe
+        self._lock = threading.Lock()
+        self.build()
+    
+    def _scratch(self, state=None):
+        """Copy of this analyzer working on its own copy of the state dict"""
+        scratch = copy.copy(self)
+        scratch._state = dict(state or {})
+        return scratch
+    
+    def build(self):
+        """Load the base dataset and build every derived structure from scratch
+
+        The new state is built on a scratch copy and swapped in with one
+        assignment, so readers never see a new df with an old filter engine.
+        """
+        scratch = self._scratch()
+        scratch._build()
+        self._state = scratch._state
+    
+    def _build(self):
+        self.menu = None
+        # delta_key() of every delta applied on top of the base data, in order
+        self.applied_deltas = []
         self.load_data()
+        self.deduplicate()
+        self.attach_menu_stats()
+        self.drop_review_text()
+        self.cuisine_index = CuisineIndex(self.df['cuisines'])
+        self.filter_engine = FilterEngine(self.df, cuisine_index=self.cuisine_index)
+        self.cube = AggregateCube(self.df)
+        self.dish_index = dish_index(self.df['restaurant_id'], self.df['dish_liked'])
     
     def load_data(self):
         """Load and preprocess the Zomato dataset"""
-        self.generate_sample_data()
+        if self.source is None:
+            self.generate_sample_data()
+            return
+        if self.chunksize:
+            # Streaming mode: chunks are cleaned while reading
+            self.df = finalize_frame(load_zomato_stream(self.source, self.chunksize))
+            return
+        self.df = load_zomato_csv(self.source)
+        self.preprocess_data()
     
     def generate_sample_data(self):
-        """Generate realistic sample data based on your CSV structure"""
-        np.random.seed(42)
-        random.seed(42)
-        n_restaurants = 800
-        
-        locations = ['Banashankari', 'Basavanagudi', 'Jayanagar', 'JP Nagar', 'HSR Layout', 
-                    'Koramangala', 'Indiranagar', 'Whitefield', 'Malleshwaram', 'BTM Layout']
-        
-        restaurant_types = ['Casual Dining', 'Quick Bites', 'Cafe', 'Fine Dining', 'Delivery', 
-                           'Dessert Parlor', 'Bakery', 'Bar', 'Food Court']
-        
-        cuisines_list = ['North Indian', 'Chinese', 'South Indian', 'Italian', 'Mexican', 
-                        'Continental', 'Thai', 'Arabian', 'Beverages', 'Desserts', 
-                        'Fast Food', 'Mughlai', 'Barbecue', 'Asian', 'Mediterranean']
-        
-        listed_in_types = ['Buffet', 'Cafes', 'Delivery', 'Desserts', 'Dine-out', 
-                          'Drinks & nightlife', 'Pubs and bars']
-        
-        # Fixed phone number generation
-        phone_numbers = [f'+91 {random.randint(7000000000, 9999999999)}' for _ in range(n_restaurants)]
-        
-        data = {
-            'url': [f'https://www.zomato.com/bangalore/restaurant-{i}' for i in range(n_restaurants)],
-            'name': [f'Restaurant_{i}' for i in range(n_restaurants)],
-            'online_order': np.random.choice(['Yes', 'No'], n_restaurants, p=[0.7, 0.3]),
-            'book_table': np.random.choice(['Yes', 'No'], n_restaurants, p=[0.4, 0.6]),
-            'rate': np.random.uniform(3.0, 4.5, n_restaurants).round(1),
-            'votes': np.random.randint(50, 5000, n_restaurants),
-            'phone': phone_numbers,
-            'location': np.random.choice(locations, n_restaurants),
-            'rest_type': np.random.choice(restaurant_types, n_restaurants),
-            'dish_liked': ['Pasta, Pizza, Burger' for _ in range(n_restaurants)],
-            'cuisines': [', '.join(np.random.choice(cuisines_list, np.random.randint(1, 4), replace=False)) 
-                        for _ in range(n_restaurants)],
-            'approx_cost(for two people)': np.random.choice([300, 400, 500, 600, 700, 800, 900, 1000, 1200, 1500], n_restaurants),
-            'reviews_list': ['Sample reviews' for _ in range(n_restaurants)],
-            'menu_item': ['[]' for _ in range(n_restaurants)],
-            'listed_in(type)': np.random.choice(listed_in_types, n_restaurants),
-            'listed_in(city)': ['Bangalore' for _ in range(n_restaurants)]
-        }
-        
-        self.df = pd.DataFrame(data)
+        """Generate sample data in the format of zomato.csv (see synthetic.py)"""
+        self.df = generate_frame(
+            SAMPLE_RESTAURANTS * LISTINGS_PER_RESTAURANT, seed=42, n_restaurants=SAMPLE_RESTAURANTS
+        )
         self.preprocess_data()
     
     def preprocess_data(self):
         """Clean and preprocess the dataset"""
-        self.df['rate_clean'] = self.df['rate']
-        self.df['rating_numeric'] = pd.to_numeric(self.df['rate_clean'], errors='coerce')
-        self.df['rating_numeric'].fillna(self.df['rating_numeric'].mean(), inplace=True)
-        
-        def get_cost_category(cost):
-            if cost <= 400: return 'Budget'
-            elif cost <= 700: return 'Moderate'
-            elif cost <= 1000: return 'Expensive'
-            else: return 'Premium'
-        
-        self.df['cost_category'] = self.df['approx_cost(for two people)'].apply(get_cost_category)
-        self.df['cuisines_list'] = self.df['cuisines'].str.split(', ')
-        self.df['popularity_score'] = (self.df['votes'] / 1000) + (self.df['rating_numeric'] * 2)
+        self.df = finalize_frame(clean_chunk(self.df))
+    
+    def deduplicate(self):
+        """Move listing attributes to self.listings and keep one row per restaurant in self.df"""
+        restaurants, self.listings = split_listings(self.df)
+        if self.dedupe:
+            self.df = restaurants
+    
+    def listing_frame(self):
+        """Listing-level view: every listing joined with its restaurant's attributes"""
+        if not self.dedupe:
+            return self.df
+        return self.listings.merge(self.df, on='restaurant_id', how='left')
+    
+    def attach_menu_stats(self):
+        """Parse menu_item into self.menu and replace the raw column with per-restaurant stats"""
+        if self.source is not None:
+            self.menu = load_menu(self.source)
+        elif 'menu_item' in self.df.columns:
+            self.menu = extract_menu(self.df['restaurant_id'], self.df['menu_item'])
+        else:
+            self.menu = extract_menu([], [])
+        self.df = self.df.drop(columns='menu_item', errors='ignore').join(
+            menu_stats(self.menu), on='restaurant_id'
+        )
+        self.df['menu_items'] = self.df['menu_items'].fillna(0).astype(np.int32)
+    
+    def drop_review_text(self):
+        """Write the reviews table of the source CSV, then drop the raw text columns from self.df"""
+        if self.source is not None and 'reviews_list' in self.df.columns and cache_available():
+            ensure_reviews_table(self.source)
+        self.df = self.df.drop(columns=RAW_TEXT_COLUMNS, errors='ignore')
+    
+    def apply_delta(self, delta):
+        """Upsert raw records (a DataFrame or CSV path) keyed by restaurant
+
+        Every listing of a restaurant present in the delta replaces all of
+        that restaurant's current listings. Only the delta rows are cleaned
+        and tokenized; the cube, cuisine index, filter engine, dish index and
+        menu stats are updated from the removed and added rows.
+        Returns the number of rows added to self.df.
+        """
+        if isinstance(delta, str):
+            delta = read_zomato_csv(delta)
+        added = finalize_frame(clean_chunk(delta))
+        if added.empty:
+            return 0
+
+        changed = added['restaurant_id'].unique()
+        added_restaurants, added_listings = split_listings(added)
+        listings = compact_dtypes(pd.concat(
+            [self.listings[~self.listings['restaurant_id'].isin(changed)], added_listings], ignore_index=True
+        ))
+        if self.dedupe:
+            added = added_restaurants
+        keep = ~np.isin(self.df['restaurant_id'].to_numpy(), changed)
+        n_kept = int(np.count_nonzero(keep))
+
+        added_menu = extract_menu(
+            added['restaurant_id'], added['menu_item'] if 'menu_item' in added.columns else [''] * len(added)
+        )
+        menu = pd.concat([self.menu[~self.menu['restaurant_id'].isin(changed)], added_menu], ignore_index=True)
+        menu['item'] = menu['item'].astype('category')
+        added = added.drop(columns='menu_item', errors='ignore').join(menu_stats(added_menu), on='restaurant_id')
+        added['menu_items'] = added['menu_items'].fillna(0).astype(np.int32)
+
+        removed = self.df[~keep]
+        df = compact_dtypes(pd.concat([self.df[keep], added.reindex(columns=self.df.columns)], ignore_index=True))
+        added = df.iloc[n_kept:]
+
+        cuisine_index = self.cuisine_index.apply_delta(keep, added['cuisines'])
+        filter_engine = self.filter_engine.apply_delta(keep, added, cuisine_index)
+        cube = self.cube.apply_delta(removed, added)
+        dishes = copy.deepcopy(self.dish_index)
+        first = ~added['restaurant_id'].duplicated().to_numpy()
+        dishes.replace(added['restaurant_id'].to_numpy()[first], added['dish_liked'].to_numpy()[first])
+
+        # Swap everything in with one assignment so readers see either the old or the new state
+        self._state = dict(
+            self._state, df=df, menu=menu, listings=listings, cuisine_index=cuisine_index,
+            filter_engine=filter_engine, cube=cube, dish_index=dishes
+        )
+        return len(added)
+    
+    def refresh(self, delta_paths=None):
+        """Apply the delta files not applied yet; rebuild if an applied one changed or vanished
+
+        Rebuild and deltas run on a scratch copy of the state, swapped in at the end.
+        """
+        keys = [delta_key(path) for path in (find_deltas() if delta_paths is None else delta_paths)]
+        with self._lock:
+            scratch = self._scratch(self._state)
+            stale = keys[:len(scratch.applied_deltas)] != scratch.applied_deltas
+            if stale:
+                scratch._build()
+            new_keys = keys[len(scratch.applied_deltas):]
+            for key in new_keys:
+                scratch.apply_delta(key[0])
+                scratch.applied_deltas = scratch.applied_deltas + [key]
+            if stale or new_keys:
+                self._state = scratch._state
+        return self.applied_deltas
+    
+    def aggregates(self, rows=None):
+        """Cube for the whole dataset, or one built over selected rows
+
+        Filters the cube cannot express (cuisines, numeric ranges) are
+        applied by selecting rows first; the result has the same API.
+        """
+        if rows is None:
+            return self.cube
+        return AggregateCube(self.df.iloc[rows])
+    
+    def compare(self, dimension, members, metrics=None):
+        """Compare members of a dimension on several metrics in one grouped pass
+
+        dimension is a categorical column (e.g. 'location', 'rest_type') or
+        'cuisine'. Only rows belonging to the members are touched, and every
+        metric is computed by a single groupby aggregation over them.
+        """
+        metrics = metrics or list(COMPARISON_METRICS)
+        if not members:
+            return pd.DataFrame(columns=metrics)
         
-        # Create restaurant quality tiers
-        def get_quality_tier(rating):
-            if rating >= 4.5: return 'Excellent'
-            elif rating >= 4.0: return 'Very Good'
-            elif rating >= 3.5: return 'Good'
-            elif rating >= 3.0: return 'Average'
-            else: return 'Below Average'
+        if dimension == 'cuisine':
+            index = self.cuisine_index
+            codes = [index.code_of[m] for m in members if m in index.code_of]
+            entries = np.isin(index.codes, codes)
+            rows = np.repeat(np.arange(index.n_rows), index.lengths)[entries]
+            keys = index.vocabulary[index.codes[entries]]
+        else:
+            rows = self.filter_engine.select(categories={dimension: members})
+            keys = self.df[dimension].to_numpy()[rows]
         
-        self.df['quality_tier'] = self.df['rating_numeric'].apply(get_quality_tier)
+        columns = sorted({COMPARISON_METRICS[m][0] for m in metrics})
+        selected = self.df[columns].take(rows).reset_index(drop=True)
+        result = selected.groupby(keys).agg(**{
+            metric: COMPARISON_METRICS[metric][:2] for metric in metrics
+        })
+        for metric in metrics:
+            result[metric] *= COMPARISON_METRICS[metric][2]
+        result = result.reindex(members).rename_axis(dimension)
+        if 'Restaurant Count' in result.columns:
+            result['Restaurant Count'] = result['Restaurant Count'].fillna(0).astype(int)
+        return result
     
     def get_restaurant_count_by_location(self):
         return self.df['location'].value_counts()
     
     def get_average_rating_by_location(self):
-        return self.df.groupby('location')['rating_numeric'].mean().sort_values(ascending=False)
+        return self.df.groupby('location', observed=True)['rating_numeric'].mean().sort_values(ascending=False)
     
-    def get_cuisine_distribution(self):
-        all_cuisines = []
-        for cuisines in self.df['cuisines_list']:
-            all_cuisines.extend(cuisines)
-        return pd.Series(all_cuisines).value_counts()
+    def get_cuisine_distribution(self, mask=None):
+        return self.cuisine_index.counts(mask)
     
     def get_cost_distribution(self):
         return self.df['cost_category'].value_counts()
     
     def get_online_order_stats(self):
-        return self.df['online_order'].value_counts()
+        return self.df['online_order'].value_counts().rename(index=YES_NO_LABELS)
     
     def get_table_booking_stats(self):
-        return self.df['book_table'].value_counts()
\ No newline at end of file
+        return self.df['book_table'].value_counts().rename(index=YES_NO_LABELS)
\ No newline at end of file
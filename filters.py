@@ -0,0 +1,166 @@
+# filters.py
+import numpy as np
+import pandas as pd
+
+COST_COLUMN = 'approx_cost(for two people)'
+
+# Columns filtered by membership, and columns filtered by value range
+FILTER_CATEGORICALS = ['location', 'rest_type', 'cost_category', 'online_order', 'book_table']
+FILTER_NUMERICS = ['rating_numeric', 'votes', COST_COLUMN]
+
+def _sorted_values(values):
+    return sorted(set(values), key=str)
+
+def normalize_filters(filters):
+    """Canonical form of a {categories, ranges, cuisines} selection
+
+    Empty selections are dropped (they mean no filter) and values are
+    sorted, so equivalent sidebar states give the same cache key.
+    """
+    filters = filters or {}
+    categories = {
+        column: _sorted_values(values)
+        for column, values in (filters.get('categories') or {}).items() if values
+    }
+    ranges = {
+        column: [None if bound is None else float(bound) for bound in bounds]
+        for column, bounds in (filters.get('ranges') or {}).items()
+        if any(bound is not None for bound in bounds)
+    }
+    normalized = {'categories': categories, 'ranges': ranges}
+    if filters.get('cuisines'):
+        normalized['cuisines'] = _sorted_values(filters['cuisines'])
+    return normalized
+
+class FilterEngine:
+    """Sidebar filters answered from precomputed per-value bitmaps and sorted indexes
+
+    Every categorical value gets a packed row bitmap (1 bit per row), so a
+    multiselect is an OR of a few bitmaps and combining filters is a
+    bitwise AND; numeric sliders binary-search a presorted copy of the
+    column. select() returns row positions and never copies the frame.
+    """
+
+    def __init__(self, df, cuisine_index=None,
+                 categorical_columns=FILTER_CATEGORICALS, numeric_columns=FILTER_NUMERICS):
+        self.n_rows = len(df)
+        self.cuisine_index = cuisine_index
+        self.bitmaps = {
+            col: self._value_bitmaps(df[col]) for col in categorical_columns if col in df.columns
+        }
+        self.sorted_indexes = {
+            col: self._sorted_index(df[col]) for col in numeric_columns if col in df.columns
+        }
+
+    def _pack(self, rows):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def _value_bitmaps(self, values):
+        codes, uniques = pd.factorize(values)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {
+            value: self._pack(order[bounds[i]:bounds[i + 1]])
+            for i, value in enumerate(uniques)
+        }
+
+    def _sorted_index(self, values):
+        values = values.to_numpy(dtype=float)
+        order = np.argsort(values, kind='stable')
+        # NaNs sort last; ranges never reach past n_valid
+        n_valid = int(np.count_nonzero(~np.isnan(values)))
+        return order, values[order], n_valid
+
+    def apply_delta(self, keep, added, cuisine_index=None):
+        """New engine over the rows where keep is True followed by the rows of added
+
+        Bitmaps are compacted and extended rather than rebuilt, and the
+        sorted indexes are merged with the sorted new values.
+        """
+        engine = FilterEngine.__new__(FilterEngine)
+        n_kept = int(np.count_nonzero(keep))
+        engine.n_rows = n_kept + len(added)
+        engine.cuisine_index = cuisine_index
+        engine.bitmaps = {}
+        for col, bitmaps in self.bitmaps.items():
+            codes, uniques = pd.factorize(added[col])
+            uniques = pd.Index(uniques)
+            values = list(bitmaps) + [value for value in uniques if value not in bitmaps]
+            engine.bitmaps[col] = {}
+            for value in values:
+                kept = (
+                    np.unpackbits(bitmaps[value], count=self.n_rows).astype(bool)[keep]
+                    if value in bitmaps else np.zeros(n_kept, dtype=bool)
+                )
+                position = uniques.get_loc(value) if value in uniques else -2
+                engine.bitmaps[col][value] = np.packbits(np.concatenate([kept, codes == position]))
+        engine.sorted_indexes = {
+            col: self._merge_sorted(self.sorted_indexes[col], keep, added[col], n_kept)
+            for col in self.sorted_indexes
+        }
+        return engine
+
+    def _merge_sorted(self, sorted_index, keep, added_values, n_kept):
+        order, sorted_values, n_valid = sorted_index
+        new_position = np.cumsum(keep) - 1
+        kept = keep[order]
+        order, sorted_values = new_position[order[kept]], sorted_values[kept]
+        n_valid = int(np.count_nonzero(kept[:n_valid]))
+
+        added_order, added_values, added_valid = self._sorted_index(added_values)
+        added_order = added_order + n_kept
+        at = np.searchsorted(sorted_values[:n_valid], added_values[:added_valid], side='right')
+        merged_values = np.concatenate([
+            np.insert(sorted_values[:n_valid], at, added_values[:added_valid]),
+            sorted_values[n_valid:], added_values[added_valid:]
+        ])
+        merged_order = np.concatenate([
+            np.insert(order[:n_valid], at, added_order[:added_valid]),
+            order[n_valid:], added_order[added_valid:]
+        ])
+        return merged_order, merged_values, n_valid + added_valid
+
+    def _empty(self):
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def _full(self):
+        return np.packbits(np.ones(self.n_rows, dtype=bool))
+
+    def membership(self, column, selected):
+        """Packed bitmap of rows whose column value is in selected"""
+        bitmaps = self.bitmaps[column]
+        result = self._empty()
+        for value in selected:
+            if value in bitmaps:
+                result |= bitmaps[value]
+        return result
+
+    def value_range(self, column, low=None, high=None):
+        """Packed bitmap of rows with low <= value <= high (inclusive; None is open)"""
+        order, sorted_values, n_valid = self.sorted_indexes[column]
+        start = 0 if low is None else np.searchsorted(sorted_values[:n_valid], low, side='left')
+        end = n_valid if high is None else np.searchsorted(sorted_values[:n_valid], high, side='right')
+        return self._pack(order[start:end])
+
+    def select_mask(self, categories=None, ranges=None, cuisines=None):
+        """Boolean row mask for the combined filters
+
+        categories maps a column to its selected values (an empty selection
+        means no filter), ranges maps a column to (low, high), and cuisines
+        keeps rows serving any of the listed cuisines.
+        """
+        result = self._full()
+        for column, selected in (categories or {}).items():
+            if selected:
+                result &= self.membership(column, selected)
+        for column, (low, high) in (ranges or {}).items():
+            result &= self.value_range(column, low, high)
+        if cuisines and self.cuisine_index is not None:
+            result &= np.packbits(self.cuisine_index.mask_any(cuisines))
+        return np.unpackbits(result, count=self.n_rows).astype(bool)
+
+    def select(self, categories=None, ranges=None, cuisines=None):
+        """Sorted row positions matching the combined filters"""
+        return np.flatnonzero(self.select_mask(categories, ranges, cuisines))
@@ -0,0 +1,68 @@
+# menu.py
+"""Columnar menu table extracted from the menu_item column
+
+menu_item holds the repr of a list of item strings per restaurant. It is
+parsed once into (restaurant_id, item, price) rows, with item stored as a
+dictionary-encoded category, and cached as Parquet next to the CSV. The
+dump lists item names only, so price is NaN unless an item string carries
+one (e.g. "Masala Dosa - Rs. 90").
+"""
+import numpy as np
+import pandas as pd
+
+from data_cache import load_with_cache
+from preprocessing import map_unique
+from reviews import STRING_LITERAL, iter_restaurant_chunks, string_literal
+
+MENU_CHUNKSIZE = 5_000
+# "Rs. 120", "Rs120", "₹ 120" or "INR 120", optionally with a separator before it
+PRICE_PATTERN = r'\s*[-:@]?\s*(?:Rs\.?|₹|INR)\s*(\d+(?:,\d{3})*(?:\.\d+)?)\s*$'
+
+def _empty_menu():
+    return pd.DataFrame({
+        'restaurant_id': np.zeros(0, dtype=np.uint64),
+        'item': pd.Categorical([]),
+        'price': np.zeros(0, dtype=np.float32)
+    })
+
+def extract_menu(restaurant_id, menu_item):
+    """Long-format menu rows for aligned restaurant_id / menu_item arrays
+
+    Tokenizing, unescaping and price parsing each run once per distinct
+    string, since item names repeat across restaurants and within menus.
+    """
+    items = pd.Series(np.asarray(menu_item, dtype=object)).fillna('').str.findall(STRING_LITERAL).explode().dropna()
+    if items.empty:
+        return _empty_menu()
+    items = map_unique(items, lambda uniques: uniques.map(string_literal))
+    prices = map_unique(
+        items, lambda uniques: uniques.str.extract(PRICE_PATTERN, expand=False).str.replace(',', '', regex=False)
+    )
+    names = map_unique(items, lambda uniques: uniques.str.replace(PRICE_PATTERN, '', regex=True).str.strip())
+    return pd.DataFrame({
+        'restaurant_id': np.asarray(restaurant_id, dtype=np.uint64)[items.index.to_numpy()],
+        'item': names.to_numpy(),
+        'price': pd.to_numeric(prices, errors='coerce').to_numpy(dtype=np.float32)
+    })
+
+def build_menu_table(csv_path, chunksize=MENU_CHUNKSIZE):
+    """Parse menu_item for every restaurant of the CSV in bounded-memory chunks"""
+    parts = [
+        extract_menu(chunk['restaurant_id'].to_numpy(), chunk['menu_item'])
+        for chunk in iter_restaurant_chunks(csv_path, 'menu_item', chunksize)
+    ]
+    menu = pd.concat(parts, ignore_index=True) if parts else _empty_menu()
+    menu['item'] = menu['item'].astype('category')
+    return menu
+
+def load_menu(csv_path):
+    """Menu table for csv_path through its Parquet cache"""
+    return load_with_cache(csv_path, build_menu_table, variant='menu')
+
+def menu_stats(menu):
+    """Item count and median item price per restaurant, indexed by restaurant_id"""
+    grouped = menu.groupby('restaurant_id')
+    return pd.DataFrame({
+        'menu_items': grouped.size(),
+        'median_item_price': grouped['price'].median()
+    })
@@ -0,0 +1,291 @@
+# plotting.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from profiling import profiled, section
+
+try:
+    from wordcloud import WordCloud
+except ImportError:
+    WordCloud = None
+
+# Above this many rows scatter plots are reduced on the server
+SCATTER_MAX_POINTS = int(os.environ.get('ZOMATO_SCATTER_MAX_POINTS', 5000))
+# 'sample' keeps individual (hoverable) points; 'density' ships a 2D histogram
+SCATTER_MODE = os.environ.get('ZOMATO_SCATTER_MODE', 'sample')
+DENSITY_BINS = 60
+# Total size of serialized figures kept by the figure cache
+FIGURE_CACHE_MAX_BYTES = int(os.environ.get('ZOMATO_FIGURE_CACHE_MB', 64)) * 1024 * 1024
+
+def stratified_sample(df, max_points, stratify=None, seed=42):
+    """Uniform sample of max_points rows, proportional within each stratum"""
+    if len(df) <= max_points:
+        return df
+    fraction = max_points / len(df)
+    if stratify is None:
+        return df.sample(frac=fraction, random_state=seed)
+    # Small strata keep at least one point so no legend entry disappears
+    sampled = df.groupby(stratify, observed=True, group_keys=False).sample(frac=fraction, random_state=seed)
+    missing = df[~df[stratify].isin(sampled[stratify].unique())].groupby(stratify, observed=True).head(1)
+    return pd.concat([sampled, missing])
+
+def density_bins(df, x, y, bins=DENSITY_BINS):
+    """2D histogram of (x, y): bin centers and counts"""
+    values = df[[x, y]].dropna()
+    counts, x_edges, y_edges = np.histogram2d(values[x], values[y], bins=bins)
+    return {
+        'x': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y': (y_edges[:-1] + y_edges[1:]) / 2,
+        'z': counts.T
+    }
+
+@st.cache_data(max_entries=64)
+def reduce_points(_df, cache_key, x, y, color=None, max_points=SCATTER_MAX_POINTS, mode=SCATTER_MODE):
+    """Reduced point set for a scatter plot, cached per cache_key
+
+    _df is not hashed; cache_key must identify the data version and the
+    filter state that produced it.
+    """
+    if mode == 'density':
+        return density_bins(_df, x, y)
+    return stratified_sample(_df, max_points, stratify=color)
+
+def scatter_figure(df, cache_key, x, y, color=None, size=None, hover_data=None, title=None,
+                   labels=None, max_points=SCATTER_MAX_POINTS, mode=SCATTER_MODE):
+    """Scatter plot whose payload stays bounded regardless of row count
+
+    Small inputs are plotted as-is; larger ones are either stratified-sampled
+    or turned into a density heatmap. Points are rendered with WebGL.
+    """
+    labels = labels or {}
+    if len(df) > max_points and mode == 'density':
+        bins = reduce_points(df, cache_key, x, y, max_points=max_points, mode=mode)
+        fig = go.Figure(go.Heatmap(
+            x=bins['x'], y=bins['y'], z=bins['z'], colorscale='Reds', colorbar={'title': 'Restaurants'}
+        ))
+        fig.update_layout(
+            title=f"{title} (density of {len(df):,} restaurants)",
+            xaxis_title=labels.get(x, x),
+            yaxis_title=labels.get(y, y)
+        )
+        return fig
+
+    points = df
+    if len(df) > max_points:
+        points = reduce_points(df, cache_key, x, y, color=color, max_points=max_points, mode=mode)
+        title = f"{title} (sample of {len(points):,} / {len(df):,})"
+    return px.scatter(
+        points,
+        x=x,
+        y=y,
+        color=color,
+        size=size,
+        hover_data=hover_data,
+        title=title,
+        labels=labels,
+        render_mode='webgl'
+    )
+
+# Box plots ship at most this many outlier points per group
+MAX_OUTLIERS_PER_GROUP = 50
+
+def box_summary(df, by, value, max_outliers=MAX_OUTLIERS_PER_GROUP):
+    """Quartiles, Tukey whiskers and (capped) outliers per group
+
+    Quartiles use linear interpolation, matching Plotly's default
+    quartilemethod, so precomputed boxes look the same as client-side ones.
+    """
+    data = df[[by, value]].dropna()
+    grouped = data.groupby(by, observed=True, sort=False)[value]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+    stats['count'] = grouped.size()
+    iqr = stats['q3'] - stats['q1']
+    stats['low'] = stats['q1'] - 1.5 * iqr
+    stats['high'] = stats['q3'] + 1.5 * iqr
+
+    # Broadcast each group's fences back to its rows to split inliers from outliers
+    keys = data[by].to_numpy()
+    values = data[value].to_numpy()
+    inside = (values >= stats['low'].reindex(keys).to_numpy()) & (values <= stats['high'].reindex(keys).to_numpy())
+    whiskers = data[inside].groupby(by, observed=True, sort=False)[value].agg(['min', 'max'])
+    stats['lowerfence'] = whiskers['min']
+    stats['upperfence'] = whiskers['max']
+
+    outliers = data[~inside].assign(_distance=lambda d: (d[value] - stats['median'].reindex(d[by].to_numpy()).to_numpy()).abs())
+    outliers = (
+        outliers.sort_values('_distance', ascending=False)
+        .groupby(by, observed=True, sort=False).head(max_outliers)
+        .drop(columns='_distance')
+    )
+    return {'stats': stats.drop(columns=['low', 'high']), 'outliers': outliers}
+
+@st.cache_data(max_entries=64)
+def cached_box_summary(_df, cache_key, by, value):
+    """box_summary() cached per cache_key (data version + filter state); _df is not hashed"""
+    return box_summary(_df, by, value)
+
+def box_figure(summary, by, value, title=None, labels=None, color='#636efa'):
+    """Box plot built from precomputed summaries: one box per group plus outlier markers
+
+    With color=None every group gets its own colour from the default palette.
+    """
+    labels = labels or {}
+    stats, outliers = summary['stats'], summary['outliers']
+    palette = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for i, (group, row) in enumerate(stats.iterrows()):
+        group_color = color or palette[i % len(palette)]
+        fig.add_trace(go.Box(
+            x=[str(group)],
+            q1=[row['q1']],
+            median=[row['median']],
+            q3=[row['q3']],
+            lowerfence=[row['lowerfence']],
+            upperfence=[row['upperfence']],
+            name=str(group),
+            legendgroup=str(group),
+            marker_color=group_color,
+            showlegend=color is None
+        ))
+        group_outliers = outliers.loc[outliers[by] == group, value]
+        if len(group_outliers):
+            fig.add_trace(go.Scatter(
+                x=[str(group)] * len(group_outliers),
+                y=group_outliers,
+                mode='markers',
+                marker={'color': group_color, 'size': 4},
+                name=str(group),
+                legendgroup=str(group),
+                showlegend=False
+            ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels.get(by, by),
+        yaxis_title=labels.get(value, value)
+    )
+    return fig
+
+def histogram_summary(values, nbins=20, weights=None):
+    """Equal-width bin counts of a numeric series; weights counts each value that many times"""
+    values = pd.Series(values)
+    valid = values.notna().to_numpy()
+    values = values.to_numpy()[valid]
+    if len(values) == 0:
+        return {'centers': np.array([]), 'counts': np.array([]), 'width': 0}
+    if weights is not None:
+        weights = np.asarray(weights)[valid]
+    counts, edges = np.histogram(values, bins=nbins, weights=weights)
+    if weights is not None:
+        counts = counts.round().astype(np.int64)
+    return {'centers': (edges[:-1] + edges[1:]) / 2, 'counts': counts, 'width': edges[1] - edges[0]}
+
+@st.cache_data(max_entries=64)
+def cached_histogram_summary(_values, cache_key, nbins=20):
+    """histogram_summary() cached per cache_key; _values is not hashed"""
+    return histogram_summary(_values, nbins)
+
+def histogram_figure(summary, title=None, x_label=None, color=None):
+    """Histogram built from precomputed bin counts"""
+    fig = go.Figure(go.Bar(
+        x=summary['centers'],
+        y=summary['counts'],
+        width=summary['width'],
+        marker_color=color
+    ))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title='count', bargap=0)
+    return fig
+
+def input_hash(*inputs):
+    """Stable digest of the inputs a chart depends on (scalars, tuples or pandas objects)"""
+    digest = hashlib.sha256()
+    for value in inputs:
+        if isinstance(value, (pd.Series, pd.DataFrame, pd.Index)):
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        elif isinstance(value, np.ndarray):
+            digest.update(value.tobytes())
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class FigureCache:
+    """LRU cache of serialized Plotly figures, bounded by total JSON size
+
+    Entries are keyed by (chart id, input hash), so a chart is rebuilt only
+    when something it depends on changes, not on every rerun.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, key, spec):
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            # A figure larger than the whole budget is never kept
+            if len(spec) > self.max_bytes:
+                return
+            self._entries[key] = spec
+            self.size += len(spec)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def figure(self, chart_id, inputs, build):
+        """Figure for chart_id, from cache or by calling build() on a miss
+
+        inputs must cover everything build() reads; all styling belongs
+        inside build() since later changes to the returned figure are not cached.
+        """
+        key = (chart_id, input_hash(*inputs))
+        spec = self.get(key)
+        if spec is None:
+            spec = build().to_json()
+            self.put(key, spec)
+        return go.Figure(json.loads(spec))
+
+@st.cache_resource
+def get_figure_cache():
+    """Figure cache shared by app.py and every page"""
+    return FigureCache()
+
+def cached_figure(chart_id, inputs, build):
+    """Shortcut for get_figure_cache().figure(...), profiled as figure:<id> with build:<id> on a miss"""
+    with section(f'figure:{chart_id}'):
+        return get_figure_cache().figure(chart_id, inputs, profiled(f'build:{chart_id}')(build))
+
+@st.cache_data(max_entries=32)
+def wordcloud_image(frequencies, colormap='Reds'):
+    """Word cloud of a {term: count} mapping as an RGB array, or None without wordcloud"""
+    if WordCloud is None or not frequencies:
+        return None
+    cloud = WordCloud(width=800, height=400, background_color='white', colormap=colormap)
+    return cloud.generate_from_frequencies(frequencies).to_array()
@@ -0,0 +1,153 @@
+# preprocessing.py
+import numpy as np
+import pandas as pd
+
+COST_COLUMN = 'approx_cost(for two people)'
+
+# Matches "4.1/5", "4.1 /5" and bare "4.1"; "NEW" and "-" are left unrated
+RATING_PATTERN = r'^\s*(\d+(?:\.\d+)?)\s*(?:/\s*5)?\s*$'
+
+# Low-cardinality columns stored dictionary-encoded, and Yes/No flags stored as booleans
+CATEGORY_COLUMNS = ['location', 'rest_type', 'listed_in(type)', 'listed_in(city)']
+FLAG_COLUMNS = ['online_order', 'book_table']
+# Attributes of a listing rather than of the venue; a restaurant has one row per listing
+LISTING_COLUMNS = ['listed_in(type)', 'listed_in(city)']
+YES_NO_LABELS = {True: 'Yes', False: 'No'}
+
+# Tier definitions: (bin edges, labels, right-closed bins)
+COST_TIERS = (
+    [-np.inf, 400, 700, 1000, np.inf],
+    ['Budget', 'Moderate', 'Expensive', 'Premium'],
+    True
+)
+QUALITY_TIERS = (
+    [-np.inf, 3.0, 3.5, 4.0, 4.5, np.inf],
+    ['Below Average', 'Average', 'Good', 'Very Good', 'Excellent'],
+    False
+)
+
+def map_unique(values, func):
+    """Apply a vectorized string parser once per distinct value
+
+    Rating, cost and vote strings repeat heavily, so parsing the factorized
+    uniques and broadcasting back by code is much cheaper than parsing rows.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = func(pd.Series(uniques, dtype=object))
+    result = parsed.to_numpy()[codes]
+    if (codes < 0).any():
+        result = pd.Series(result).where(codes >= 0).to_numpy()
+    return pd.Series(result, index=values.index)
+
+def normalize_url(urls):
+    """Strip the query string (the long base64 context= parameter); missing urls stay missing"""
+    return urls.astype(str).str.extract(r'^([^?]*)', expand=False).where(urls.notna())
+
+def restaurant_ids(urls):
+    """Stable 64-bit id per normalized url, used to join derived tables back to restaurants"""
+    return pd.Series(pd.util.hash_array(urls.to_numpy(dtype=object)), index=urls.index)
+
+def restaurant_keys(df):
+    """Upsert key of each record: normalized url, or name|address when the url is missing"""
+    keys = normalize_url(df['url'])
+    if 'name' in df.columns and 'address' in df.columns:
+        keys = keys.where(df['url'].notna(), df['name'].astype(str) + '|' + df['address'].astype(str))
+    return keys
+
+def extract_rating(rate):
+    """Return the rating numerator as a string, NaN when unrated"""
+    if pd.api.types.is_numeric_dtype(rate):
+        return rate
+    return map_unique(rate, lambda uniques: uniques.str.extract(RATING_PATTERN, expand=False))
+
+def parse_cost(cost):
+    """Parse cost strings such as "1,200" into floats"""
+    if pd.api.types.is_numeric_dtype(cost):
+        return cost.astype(float)
+    return map_unique(
+        cost, lambda uniques: pd.to_numeric(uniques.str.replace(',', '', regex=False), errors='coerce')
+    ).astype(float)
+
+def parse_votes(votes):
+    if not pd.api.types.is_numeric_dtype(votes):
+        votes = map_unique(votes, lambda uniques: pd.to_numeric(uniques, errors='coerce'))
+    return pd.to_numeric(votes, errors='coerce').fillna(0).astype(int)
+
+def bin_values(values, tiers):
+    """Vectorized tier assignment with pd.cut into an ordered Categorical
+
+    NaN values stay unassigned.
+    """
+    bins, labels, right = tiers
+    return pd.cut(values, bins=bins, labels=labels, right=right)
+
+def compact_dtypes(df):
+    """Dictionary-encode low-cardinality columns and turn Yes/No flags into booleans"""
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Categories are sorted, so codes are stable for a given set of values
+            df[col] = df[col].astype('category')
+    for col in FLAG_COLUMNS:
+        if col in df.columns and not pd.api.types.is_bool_dtype(df[col]):
+            df[col] = df[col].eq('Yes')
+    return df
+
+def memory_report(before, after):
+    """Per-column deep memory usage of two versions of the same frame, in MB"""
+    report = pd.DataFrame({
+        'before_mb': before.memory_usage(deep=True, index=False) / 1e6,
+        'after_mb': after.memory_usage(deep=True, index=False) / 1e6,
+        'before_dtype': before.dtypes.astype(str),
+        'after_dtype': after.dtypes.astype(str)
+    })
+    report.loc['TOTAL', ['before_mb', 'after_mb']] = report[['before_mb', 'after_mb']].sum()
+    report['saved_pct'] = (1 - report['after_mb'] / report['before_mb']) * 100
+    return report.round(3)
+
+def clean_chunk(df, cost_tiers=COST_TIERS):
+    """Row-local cleaning, safe to run independently on each chunk"""
+    if 'online_order' in df.columns:
+        # Drop records shifted by broken multi-line fields in the raw dump
+        df = df[df['online_order'].isin(['Yes', 'No'])]
+    df = df.copy()
+
+    if 'url' in df.columns:
+        df['restaurant_id'] = restaurant_ids(restaurant_keys(df))
+        df['url'] = normalize_url(df['url'])
+    if 'cuisines' in df.columns:
+        df['cuisines'] = df['cuisines'].fillna('Unknown')
+    if 'votes' in df.columns:
+        df['votes'] = parse_votes(df['votes'])
+    if COST_COLUMN in df.columns:
+        df[COST_COLUMN] = parse_cost(df[COST_COLUMN])
+        df['cost_category'] = bin_values(df[COST_COLUMN], cost_tiers)
+    if 'rate' in df.columns:
+        df['rate_clean'] = extract_rating(df['rate'])
+        df['rating_numeric'] = pd.to_numeric(df['rate_clean'], errors='coerce')
+    return df
+
+def split_listings(df):
+    """Split a listing-level frame into a restaurant dimension and a listings fact table
+
+    Rows are deduplicated on the restaurant_id hash: the dimension keeps
+    the first listing of each restaurant without the listing columns, and
+    the fact table holds one (restaurant_id, listing columns) row per listing.
+    """
+    listing_columns = [col for col in LISTING_COLUMNS if col in df.columns]
+    listings = df[['restaurant_id'] + listing_columns].drop_duplicates().reset_index(drop=True)
+    restaurants = df[~df['restaurant_id'].duplicated().to_numpy()].drop(columns=listing_columns)
+    return restaurants.reset_index(drop=True), listings
+
+def finalize_frame(df, quality_tiers=QUALITY_TIERS, fill_rating=False, compact=True):
+    """Steps that need the whole dataset, run once after all chunks are cleaned"""
+    df = df.reset_index(drop=True)
+    if fill_rating:
+        df['rating_numeric'] = df['rating_numeric'].fillna(df['rating_numeric'].mean())
+    if 'votes' in df.columns:
+        df['popularity_score'] = (df['votes'] / 1000) + (df['rating_numeric'] * 2)
+
+    # Create restaurant quality tiers
+    df['quality_tier'] = bin_values(df['rating_numeric'], quality_tiers)
+    if compact:
+        df = compact_dtypes(df)
+    return df
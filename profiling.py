@@ -0,0 +1,150 @@
+# profiling.py
+"""Per-rerun timing and memory instrumentation of the app's sections
+
+Set ZOMATO_PROFILE=1 to enable. Each script run then records, per
+section, the wall time, rows processed and tracemalloc allocation deltas;
+finish_run() shows them in a sidebar panel and appends them to a JSON-lines
+log (ZOMATO_PROFILE_LOG). When disabled, section() and profiled() cost a
+function call and nothing is traced.
+
+tracemalloc is process-wide, so memory figures of reruns that overlap in
+time (several browser sessions) include each other's allocations.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+PROFILE_ENABLED = os.environ.get('ZOMATO_PROFILE', '').lower() in ('1', 'true', 'yes')
+PROFILE_LOG = os.environ.get('ZOMATO_PROFILE_LOG', os.path.join('logs', 'profile.jsonl'))
+
+# Each Streamlit script run executes in its own thread
+_state = threading.local()
+
+def profiling_enabled():
+    return PROFILE_ENABLED
+
+def _current_run():
+    return getattr(_state, 'run', None)
+
+def start_run(page):
+    """Begin recording the sections of this script run"""
+    if not PROFILE_ENABLED:
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _state.run = {
+        'run_id': uuid.uuid4().hex,
+        'page': page,
+        'started': time.time(),
+        'start': time.perf_counter(),
+        'sections': []
+    }
+    # Open sections, innermost last: [start bytes, running peak bytes]
+    _state.stack = []
+
+@contextmanager
+def section(name, rows=None):
+    """Time a block of the current run; set record['rows'] inside it if rows is not known up front"""
+    record = {'section': name, 'rows': rows}
+    run = _current_run()
+    if run is None:
+        yield record
+        return
+
+    stack = _state.stack
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        # Hand the peak reached so far to the enclosing section before resetting it
+        stack[-1][1] = max(stack[-1][1], peak)
+    tracemalloc.reset_peak()
+    frame = [current, current]
+    stack.append(frame)
+    start = time.perf_counter()
+    record.update({'depth': len(stack) - 1, 'start_s': start - run['start']})
+    try:
+        yield record
+    finally:
+        seconds = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        stack.pop()
+        peak = max(frame[1], peak)
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        record.update({
+            'seconds': seconds,
+            'alloc_mb': (current - frame[0]) / 1e6,
+            'peak_mb': (peak - frame[0]) / 1e6
+        })
+        run['sections'].append(record)
+
+def profiled(name):
+    """Decorator form of section(); rows is the length of the result when it has one"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(name) as record:
+                result = func(*args, **kwargs)
+                if record['rows'] is None and hasattr(result, '__len__'):
+                    record['rows'] = len(result)
+                return result
+        return wrapper
+    return decorator
+
+def run_frame(run):
+    """Sections of a run in start order, as a DataFrame"""
+    sections = pd.DataFrame(
+        run['sections'], columns=['section', 'depth', 'start_s', 'seconds', 'rows', 'alloc_mb', 'peak_mb']
+    )
+    # Records are appended when a section ends, so nested sections come before their parent
+    return sections.sort_values('start_s', kind='stable').reset_index(drop=True)
+
+def write_log(run, log_path=None):
+    """Append one JSON line per section of run"""
+    log_path = log_path or PROFILE_LOG
+    directory = os.path.dirname(log_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(log_path, 'a') as f:
+        for record in run['sections']:
+            f.write(json.dumps({
+                'run_id': run['run_id'],
+                'page': run['page'],
+                'timestamp': run['started'],
+                **record
+            }) + '\n')
+
+def finish_run():
+    """Close the run: show the sidebar panel and append the sections to the log"""
+    run = _current_run()
+    if run is None:
+        return
+    _state.run = None
+    run['sections'].append({
+        'section': 'total', 'depth': 0, 'start_s': 0.0, 'rows': None,
+        'seconds': time.perf_counter() - run['start'], 'alloc_mb': None, 'peak_mb': None
+    })
+    try:
+        write_log(run)
+    except OSError:
+        # Read-only working directory: the panel still shows this run
+        pass
+
+    sections = run_frame(run)
+    sections['section'] = ['  ' * depth + name for depth, name in zip(sections['depth'], sections['section'])]
+    sections['ms'] = sections.pop('seconds') * 1000
+    with st.sidebar.expander("⏱️ Performance (this rerun)"):
+        st.dataframe(
+            sections.drop(columns=['depth', 'start_s']).round({'ms': 1, 'alloc_mb': 2, 'peak_mb': 2}),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"Logged to {PROFILE_LOG}")
@@ -0,0 +1,98 @@
+# query_client.py
+"""Thin client of query_service.py with the same methods as QueryEngine
+
+Set ZOMATO_QUERY_SERVICE (e.g. http://127.0.0.1:8765) to have the
+dashboard send its queries to a running service instead of computing
+them in-process.
+"""
+import json
+import os
+from io import StringIO
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+
+from query_plan import QueryPlan
+
+QUERY_SERVICE_URL = os.environ.get('ZOMATO_QUERY_SERVICE')
+QUERY_TIMEOUT = float(os.environ.get('ZOMATO_QUERY_TIMEOUT', 30))
+
+class QueryServiceError(RuntimeError):
+    """The service rejected a query or could not answer it"""
+
+def decode_result(payload):
+    """Query result from the JSON body written by query_service.encode_result()"""
+    value = payload['value']
+    if payload['kind'] == 'value':
+        return value
+    frame = pd.read_json(StringIO(json.dumps(value)), orient='table')
+    if payload['kind'] == 'series':
+        return frame['value'].rename(payload.get('name'))
+    return frame
+
+
+class QueryClient:
+    def __init__(self, base_url=None, timeout=QUERY_TIMEOUT):
+        self.base_url = (base_url or QUERY_SERVICE_URL).rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path, query=None):
+        data = None if query is None else json.dumps(query).encode('utf-8')
+        request = Request(self.base_url + path, data=data, headers={'Content-Type': 'application/json'})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)
+        except HTTPError as e:
+            try:
+                message = json.load(e).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise QueryServiceError(f"{path}: {message}") from e
+
+    def health(self):
+        return self._request('/health')
+
+    def execute(self, filters, requests):
+        """Results of several (method, params) requests, in one round trip"""
+        payloads = self._request('/batch', {
+            'filters': filters,
+            'requests': [{'method': method, 'params': params} for method, params in requests]
+        })
+        return [self._decode(method, payload) for (method, _), payload in zip(requests, payloads)]
+
+    def _decode(self, method, payload):
+        result = decode_result(payload)
+        if method == 'histogram':
+            return {**result, 'centers': np.array(result['centers']), 'counts': np.array(result['counts'])}
+        return result
+
+    def plan(self, filters=None):
+        """Lazy QueryPlan over a selection, sent to the service as one batch"""
+        return QueryPlan(self, filters)
+
+    def overview(self):
+        return decode_result(self._request('/overview'))
+
+    def kpis(self, filters=None, where=None):
+        return decode_result(self._request('/kpis', {'filters': filters, 'where': where}))
+
+    def group_by(self, filters=None, by=None):
+        return decode_result(self._request('/group_by', {'filters': filters, 'by': by}))
+
+    def top_n(self, filters=None, n=10, order_by='rating_numeric', columns=None):
+        return decode_result(self._request('/top_n', {
+            'filters': filters, 'n': n, 'order_by': order_by, 'columns': columns
+        }))
+
+    def histogram(self, filters=None, column='rating_numeric', nbins=20):
+        return self._decode('histogram', self._request('/histogram', {
+            'filters': filters, 'column': column, 'nbins': nbins
+        }))
+
+    def cuisine_distribution(self, filters=None, n=None):
+        return decode_result(self._request('/cuisines', {'filters': filters, 'n': n}))
+
+    def correlation(self, filters=None):
+        return decode_result(self._request('/correlation', {'filters': filters}))
@@ -0,0 +1,94 @@
+# query_plan.py
+"""Lazy query plans: the queries of one rerun, run as one fused batch
+
+A page asks a QueryPlan for everything it will show (KPIs, group-bys,
+top-N lists, histograms, cuisine counts, correlations) and gets Deferred handles back.
+Nothing runs until the first handle is read; then every pending request
+goes to the engine's execute() together, which shares the selection and
+the scans between them. Identical requests share one handle.
+"""
+import json
+
+from filters import normalize_filters
+
+# Query methods every engine answers, with the canonical form of their parameters
+QUERY_METHODS = {
+    'kpis': lambda p: {'where': normalize_filters({'categories': p.get('where')})['categories']},
+    'group_by': lambda p: {'by': list(p.get('by') or [])},
+    'top_n': lambda p: {
+        'n': int(p.get('n', 10)), 'order_by': p.get('order_by', 'rating_numeric'), 'columns': p.get('columns')
+    },
+    'histogram': lambda p: {'column': p.get('column', 'rating_numeric'), 'nbins': int(p.get('nbins', 20))},
+    'cuisine_distribution': lambda p: {'n': None if p.get('n') is None else int(p['n'])},
+    'correlation': lambda p: {}
+}
+
+def normalize_request(method, params=None):
+    """Canonical parameters of a query; unknown methods raise KeyError"""
+    return QUERY_METHODS[method](params or {})
+
+def query_key(method, query):
+    """Cache key of a normalized query"""
+    return method + ':' + json.dumps(query, sort_keys=True, separators=(',', ':'))
+
+
+class Deferred:
+    """Result of a planned query, computed when first read"""
+
+    def __init__(self, plan):
+        self._plan = plan
+        self._done = False
+        self._value = None
+
+    @property
+    def value(self):
+        if not self._done:
+            self._plan.execute()
+        return self._value
+
+
+class QueryPlan:
+    """Queries on one filter selection, collected lazily and executed together"""
+
+    def __init__(self, engine, filters=None):
+        self.engine = engine
+        self.filters = normalize_filters(filters)
+        self._handles = {}
+        self._pending = []
+
+    def _request(self, method, **params):
+        params = normalize_request(method, params)
+        key = query_key(method, params)
+        if key not in self._handles:
+            self._handles[key] = Deferred(self)
+            self._pending.append((key, method, params))
+        return self._handles[key]
+
+    def kpis(self, where=None):
+        return self._request('kpis', where=where)
+
+    def group_by(self, by):
+        return self._request('group_by', by=by)
+
+    def top_n(self, n=10, order_by='rating_numeric', columns=None):
+        return self._request('top_n', n=n, order_by=order_by, columns=columns)
+
+    def histogram(self, column='rating_numeric', nbins=20):
+        return self._request('histogram', column=column, nbins=nbins)
+
+    def cuisine_distribution(self, n=None):
+        return self._request('cuisine_distribution', n=n)
+
+    def correlation(self):
+        return self._request('correlation')
+
+    def execute(self):
+        """Run every pending request in one engine.execute() call"""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        results = self.engine.execute(self.filters, [(method, params) for _, method, params in pending])
+        for (key, _, _), result in zip(pending, results):
+            handle = self._handles[key]
+            handle._value = result
+            handle._done = True
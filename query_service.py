@@ -0,0 +1,362 @@
+# query_service.py
+"""Local HTTP service answering dashboard queries as JSON
+
+One warm process holds the ZomatoAnalyzer and serves filtered KPIs,
+group-bys, top-N lists, histograms and cuisine distributions to any
+number of dashboard workers (see query_client.py). Responses are cached
+by data version and normalized query, so equivalent filter states from
+different sessions are computed once.
+
+Run from the repository root:
+    python query_service.py [--host 127.0.0.1] [--port 8765]
+
+Endpoints: GET /health, GET /overview; POST /kpis, /group_by, /top_n,
+/histogram, /cuisines and /correlation with a JSON query body, and POST /batch with
+{filters, requests: [{method, params}, ...]} to run a QueryPlan's
+requests in one round trip (answered as a JSON list).
+"""
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from data_cache import file_fingerprint
+from data_loader import TOP_COLUMNS, ZomatoAnalyzer, find_csv
+from filters import normalize_filters
+from plotting import FigureCache, histogram_summary
+from query_plan import QueryPlan, normalize_request, query_key
+from sql_backend import SQLQueryEngine, sql_available
+
+QUERY_HOST = os.environ.get('ZOMATO_QUERY_HOST', '127.0.0.1')
+QUERY_PORT = int(os.environ.get('ZOMATO_QUERY_PORT', 8765))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('ZOMATO_QUERY_CACHE_MB', 64)) * 1024 * 1024
+# 'pandas' (in-memory ZomatoAnalyzer) or 'duckdb' (SQL over Parquet, see sql_backend.py)
+QUERY_BACKEND = os.environ.get('ZOMATO_BACKEND', 'pandas')
+
+def _without_nan(value):
+    # NaN is not valid JSON: statistics of empty selections are sent as null
+    if isinstance(value, dict):
+        return {k: _without_nan(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_without_nan(v) for v in value]
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def encode_result(result):
+    """JSON bytes of a query result; frames and series keep their index and dtypes"""
+    if isinstance(result, pd.Series):
+        payload = {'kind': 'series', 'name': result.name,
+                   'value': json.loads(result.rename('value').to_frame().to_json(orient='table', double_precision=15))}
+    elif isinstance(result, pd.DataFrame):
+        payload = {'kind': 'frame', 'value': json.loads(result.to_json(orient='table', double_precision=15))}
+    else:
+        payload = {'kind': 'value', 'value': _without_nan(result)}
+    return json.dumps(payload, default=_json_default).encode('utf-8')
+
+
+class QueryEngine:
+    """Dashboard queries answered from one analyzer
+
+    Used in-process by the pages, and behind the HTTP service. Selections
+    that only filter cube dimensions are rolled up from the analyzer's
+    cube; others build a cube over the selected rows. The last selection
+    is kept, so the several queries of one dashboard rerun share it.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        # ((df, filters key), (rows, cube, cube filters)) of the last selection
+        self._last = None
+
+    def refresh(self):
+        """Pick up new delta files"""
+        self.analyzer.refresh()
+
+    def data_version(self):
+        """Base source fingerprint plus the applied delta files"""
+        source = self.analyzer.source
+        fingerprint = file_fingerprint(source) if source is not None else {}
+        return [source, fingerprint.get('size'), fingerprint.get('mtime_ns'),
+                [list(key) for key in self.analyzer.applied_deltas]]
+
+    def _selection(self, filters):
+        # (row positions or None for all rows, cube, cube filters) of a selection
+        filters = normalize_filters(filters)
+        df = self.analyzer.df
+        key = query_key('', filters)
+        last = self._last
+        if last is not None and last[0][0] is df and last[0][1] == key:
+            return last[1]
+
+        cube = self.analyzer.cube
+        if not (filters['categories'] or filters['ranges'] or filters.get('cuisines')):
+            selection = (None, cube, None)
+        else:
+            rows = self.analyzer.filter_engine.select(**filters)
+            if not filters['ranges'] and not filters.get('cuisines') and set(filters['categories']) <= set(cube.dimensions):
+                selection = (rows, cube, filters['categories'])
+            else:
+                selection = (rows, self.analyzer.aggregates(rows), None)
+        self._last = ((df, key), selection)
+        return selection
+
+    def rows(self, filters=None):
+        """Row positions of a selection, or None for all rows"""
+        return self._selection(filters)[0]
+
+    def overview(self):
+        """Dataset-wide values the sidebar needs: filter options and totals"""
+        df = self.analyzer.df
+        cuisines = self.analyzer.get_cuisine_distribution()
+        cost = df['approx_cost(for two people)']
+        return {
+            'source': self.analyzer.source,
+            'data_version': self.data_version(),
+            'locations': df['location'].unique().tolist(),
+            'cost_categories': df['cost_category'].unique().tolist(),
+            'rest_types': df['rest_type'].unique().tolist(),
+            # Restaurants per cuisine, most common first
+            'cuisines': cuisines.to_dict(),
+            'votes_max': int(df['votes'].max()) if 'votes' in df.columns else None,
+            'cost_range': [int(cost.min()), int(cost.max())] if cost.notna().any() else None,
+            'totals': self.analyzer.cube.totals().to_dict()
+        }
+
+    def execute(self, filters, requests):
+        """Results of several (method, params) requests on one selection, computed together
+
+        The selection is made once; every KPI and group-by request is
+        answered from one pass over the cube cells, top-N lists and
+        histograms share one take of the selected rows, cuisine
+        distributions share one count, and correlations come from the
+        cube cells too.
+        """
+        requests = [(method, normalize_request(method, params)) for method, params in requests]
+        rows, cube, cube_filters = self._selection(filters)
+        df = self.analyzer.df
+        results = [None] * len(requests)
+
+        summarized = [i for i, (method, _) in enumerate(requests) if method in ('kpis', 'group_by')]
+        if summarized:
+            summaries = cube.summaries(
+                [(requests[i][1].get('by'), requests[i][1].get('where')) for i in summarized], cube_filters
+            )
+            for i, summary in zip(summarized, summaries):
+                results[i] = summary.iloc[0] if requests[i][0] == 'kpis' else summary
+
+        taken = [i for i, (method, _) in enumerate(requests) if method in ('top_n', 'histogram')]
+        if taken:
+            for i in taken:
+                if requests[i][0] == 'top_n':
+                    params = requests[i][1]
+                    params['columns'] = [col for col in (params['columns'] or TOP_COLUMNS) if col in df.columns]
+            needed = list(dict.fromkeys(
+                col for i in taken for col in (
+                    requests[i][1]['columns'] + [requests[i][1]['order_by']]
+                    if requests[i][0] == 'top_n' else [requests[i][1]['column']]
+                )
+            ))
+            # Only the needed columns of the selected rows are copied, once
+            selected = df[needed] if rows is None else df.iloc[rows, df.columns.get_indexer(needed)]
+            for i in taken:
+                method, params = requests[i]
+                if method == 'top_n':
+                    # nlargest() falls back to an unstable sort when n covers the whole
+                    # selection; re-sorting its n rows keeps ties in row order either way
+                    top = selected.nlargest(params['n'], params['order_by']).sort_index()
+                    results[i] = top.sort_values(params['order_by'], ascending=False, kind='stable')[params['columns']]
+                else:
+                    results[i] = histogram_summary(selected[params['column']], params['nbins'])
+
+        counted = [i for i, (method, _) in enumerate(requests) if method == 'cuisine_distribution']
+        if counted:
+            mask = None
+            if rows is not None:
+                mask = np.zeros(len(df), dtype=bool)
+                mask[rows] = True
+            counts = self.analyzer.get_cuisine_distribution(mask)
+            for i in counted:
+                n = requests[i][1]['n']
+                results[i] = counts if n is None else counts.head(n)
+
+        for i, (method, _) in enumerate(requests):
+            if method == 'correlation':
+                results[i] = cube.correlation(cube_filters)
+        return results
+
+    def plan(self, filters=None):
+        """Lazy QueryPlan over a selection"""
+        return QueryPlan(self, filters)
+
+    def kpis(self, filters=None, where=None):
+        """Totals (count, means, stds, percentages) of a selection, optionally narrowed by cube dimensions"""
+        return self.execute(filters, [('kpis', {'where': where})])[0]
+
+    def group_by(self, filters=None, by=None):
+        """Cube summary of a selection per group of the `by` dimensions"""
+        return self.execute(filters, [('group_by', {'by': by})])[0]
+
+    def top_n(self, filters=None, n=10, order_by='rating_numeric', columns=None):
+        """The n restaurants of a selection with the largest order_by"""
+        return self.execute(filters, [('top_n', {'n': n, 'order_by': order_by, 'columns': columns})])[0]
+
+    def histogram(self, filters=None, column='rating_numeric', nbins=20):
+        """Equal-width bin counts of a numeric column over a selection"""
+        return self.execute(filters, [('histogram', {'column': column, 'nbins': nbins})])[0]
+
+    def cuisine_distribution(self, filters=None, n=None):
+        """Restaurants per cuisine within a selection, most common first"""
+        return self.execute(filters, [('cuisine_distribution', {'n': n})])[0]
+
+    def correlation(self, filters=None):
+        """Pairwise correlation of the rating, votes and cost measures over a selection"""
+        return self.execute(filters, [('correlation', {})])[0]
+
+
+# endpoint: engine method
+ENDPOINTS = {
+    '/kpis': 'kpis',
+    '/group_by': 'group_by',
+    '/top_n': 'top_n',
+    '/histogram': 'histogram',
+    '/cuisines': 'cuisine_distribution',
+    '/correlation': 'correlation'
+}
+
+
+class QueryService:
+    """A query engine plus the response cache, shared by the request threads"""
+
+    def __init__(self, engine, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.engine = engine
+        self.cache = FigureCache(max_bytes)
+
+    def answer(self, endpoint, query=None):
+        """JSON bytes for a single-query request, from cache or computed"""
+        query = query or {}
+        if endpoint == '/overview':
+            self.engine.refresh()
+            key = (json.dumps(self.engine.data_version()), 'overview')
+            response = self.cache.get(key)
+            if response is None:
+                response = encode_result(self.engine.overview())
+                self.cache.put(key, response)
+            return response
+        params = {name: value for name, value in query.items() if name != 'filters'}
+        return self.answer_batch(query.get('filters'), [(ENDPOINTS[endpoint], params)])[0]
+
+    def answer_batch(self, filters, requests):
+        """JSON bytes of each (method, params) request; cache misses are executed as one batch"""
+        # Pick up new delta files; the data version in the key retires stale responses
+        self.engine.refresh()
+        version = json.dumps(self.engine.data_version())
+        filters = normalize_filters(filters)
+        requests = [(method, normalize_request(method, params)) for method, params in requests]
+        keys = [(version, query_key(method, {'filters': filters, **params})) for method, params in requests]
+        responses = [self.cache.get(key) for key in keys]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            results = self.engine.execute(filters, [requests[i] for i in missing])
+            for i, result in zip(missing, results):
+                responses[i] = encode_result(result)
+                self.cache.put(keys[i], responses[i])
+        return responses
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+    def _answer(self, query=None):
+        if self.path not in ('/overview', '/batch') and self.path not in ENDPOINTS:
+            return self._error(404, f"unknown endpoint {self.path}")
+        try:
+            if self.path == '/batch':
+                requests = [(request['method'], request.get('params')) for request in query.get('requests', [])]
+                responses = self.service.answer_batch(query.get('filters'), requests)
+                return self._send(200, b'[' + b','.join(responses) + b']')
+            self._send(200, self.service.answer(self.path, query))
+        except (KeyError, ValueError, TypeError) as e:
+            self._error(400, f"{type(e).__name__}: {e}")
+
+    def do_GET(self):
+        if self.path == '/health':
+            cache = self.service.cache
+            return self._send(200, json.dumps({
+                'status': 'ok', 'entries': len(cache), 'hits': cache.hits, 'misses': cache.misses
+            }).encode('utf-8'))
+        if self.path != '/overview':
+            return self._error(405 if self.path in ENDPOINTS or self.path == '/batch' else 404, f"GET {self.path} not supported")
+        self._answer()
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            query = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            return self._error(400, f"invalid JSON body: {e}")
+        self._answer(query)
+
+    def log_message(self, format, *args):
+        # Quiet by default: one line per dashboard query is noise
+        pass
+
+
+def create_engine(csv_path=None, chunksize=None, backend=QUERY_BACKEND):
+    """Query engine of a deployment: DuckDB over Parquet, or an in-memory analyzer
+
+    The DuckDB backend needs a source CSV and the duckdb package; without
+    them the in-memory engine is used.
+    """
+    csv_path = csv_path if csv_path is not None else find_csv()
+    if backend == 'duckdb' and csv_path is not None and sql_available():
+        return SQLQueryEngine(csv_path)
+    return QueryEngine(ZomatoAnalyzer(csv_path=csv_path, chunksize=chunksize))
+
+def make_server(engine, host=QUERY_HOST, port=QUERY_PORT):
+    """ThreadingHTTPServer answering queries from engine (a QueryEngine or SQLQueryEngine)"""
+    handler = type('BoundQueryHandler', (QueryHandler,), {'service': QueryService(engine)})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=QUERY_HOST)
+    parser.add_argument('--port', type=int, default=QUERY_PORT)
+    parser.add_argument('--csv', help='source CSV (default: the first of data_loader.CSV_PATHS found)')
+    parser.add_argument('--backend', choices=['pandas', 'duckdb'], default=QUERY_BACKEND)
+    args = parser.parse_args(argv)
+
+    chunksize = int(os.environ.get('ZOMATO_CHUNKSIZE', 0)) or None
+    engine = create_engine(args.csv, chunksize, args.backend)
+    server = make_server(engine, args.host, args.port)
+    print(f"Serving {engine.overview()['source'] or 'sample data'} ({type(engine).__name__}) "
+          f"on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
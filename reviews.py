@@ -0,0 +1,205 @@
+# reviews.py
+"""Ingestion of the reviews_list column into a long-format reviews table
+
+reviews_list holds the repr of a list of ('Rated 4.0', 'RATED\\n  text')
+tuples per restaurant and makes up most of zomato.csv. It is tokenized
+here without eval and written as a directory of Parquet parts (one per
+input chunk) next to the CSV so later runs only read the columns they need.
+
+The app parses in-process. Build the table offline with a process pool
+(one worker per CPU by default) before starting it:
+    python reviews.py zomato.csv [--workers N]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE_VERSION, cache_available, file_fingerprint, source_matches
+from preprocessing import restaurant_ids, restaurant_keys
+
+REVIEW_CHUNKSIZE = 2_000
+# Worker processes used by the app; more than 1 starts a pool inside the server process
+REVIEW_WORKERS = int(os.environ.get('ZOMATO_REVIEW_WORKERS', 1))
+MANIFEST_NAME = '_manifest.json'
+VERIFIED_NAME = '_verified.json'
+
+# A single- or double-quoted Python string literal, and one ('Rated x', 'text') tuple of them
+STRING_LITERAL = r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*\""""
+REVIEW_PATTERN = re.compile(rf"\(\s*({STRING_LITERAL})\s*,\s*({STRING_LITERAL})\s*\)", re.DOTALL)
+RATED_PATTERN = re.compile(r'Rated\s+(\d+(?:\.\d+)?)')
+_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)", re.DOTALL)
+_SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '\\': '\\', "'": "'", '"': '"'}
+
+def _unescape(match):
+    code = match.group(1)
+    if code[0] in 'xuU' and len(code) > 1:
+        return chr(int(code[1:], 16))
+    return _SIMPLE_ESCAPES.get(code, '\\' + code)
+
+def string_literal(token):
+    """Value of a quoted Python string literal"""
+    return _ESCAPE.sub(_unescape, token[1:-1])
+
+def parse_reviews_list(text):
+    """(rating, review text) pairs from one reviews_list value
+
+    Truncated lists (common in the raw dump) yield the complete tuples
+    before the cut; ratings that cannot be read are NaN.
+    """
+    if not isinstance(text, str):
+        return []
+    reviews = []
+    for rated, body in REVIEW_PATTERN.findall(text):
+        rating = RATED_PATTERN.search(rated)
+        body = string_literal(body)
+        if body.startswith('RATED'):
+            body = body[len('RATED'):]
+        reviews.append((float(rating.group(1)) if rating else np.nan, body.strip()))
+    return reviews
+
+def parse_review_chunk(chunk):
+    """Long-format reviews of one chunk of (restaurant_id, reviews_list) rows"""
+    ids, numbers, ratings, texts = [], [], [], []
+    for restaurant_id, text in zip(chunk['restaurant_id'].to_numpy(), chunk['reviews_list'].to_numpy()):
+        for number, (rating, body) in enumerate(parse_reviews_list(text)):
+            ids.append(restaurant_id)
+            numbers.append(number)
+            ratings.append(rating)
+            texts.append(body)
+    return pd.DataFrame({
+        'restaurant_id': np.array(ids, dtype=np.uint64),
+        'review_no': np.array(numbers, dtype=np.int32),
+        'rating': np.array(ratings, dtype=np.float32),
+        'text': pd.Series(texts, dtype=object)
+    })
+
+def _empty_reviews():
+    return parse_review_chunk(pd.DataFrame({'restaurant_id': [], 'reviews_list': []}))
+
+def iter_restaurant_chunks(csv_path, column, chunksize=REVIEW_CHUNKSIZE):
+    """Stream (restaurant_id, column) chunks, one row per restaurant
+
+    Restaurants listed several times (once per listed_in type) carry the
+    same reviews and menu, so only the first listing of each url is kept.
+    """
+    seen = set()
+    usecols = ['url', 'name', 'address', 'online_order', column]
+    reader = pd.read_csv(
+        csv_path, usecols=lambda col: col in usecols, dtype=str, chunksize=chunksize
+    )
+    for chunk in reader:
+        # Same validity rule as clean_chunk(): skip records shifted by broken fields
+        chunk = chunk[chunk['online_order'].isin(['Yes', 'No'])]
+        ids = restaurant_ids(restaurant_keys(chunk))
+        keep = ~ids.duplicated().to_numpy() & ~ids.isin(seen).to_numpy()
+        seen.update(ids[keep])
+        yield pd.DataFrame({
+            'restaurant_id': ids[keep].to_numpy(dtype=np.uint64),
+            column: chunk[column].to_numpy()[keep]
+        })
+
+def iter_review_chunks(csv_path, chunksize=REVIEW_CHUNKSIZE):
+    return iter_restaurant_chunks(csv_path, 'reviews_list', chunksize)
+
+def _parsed_chunks(chunks, workers):
+    """parse_review_chunk() over chunks, in order, with at most 2 x workers chunks in flight"""
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse_review_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(parse_review_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def reviews_dir_for(csv_path):
+    base, _ = os.path.splitext(csv_path)
+    return f"{base}.reviews"
+
+def _read_manifest(reviews_dir):
+    try:
+        with open(os.path.join(reviews_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_reviews_table_valid(csv_path, reviews_dir):
+    """Check the reviews table against the current state of its source CSV"""
+    manifest = _read_manifest(reviews_dir)
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        return False
+    return source_matches(csv_path, manifest.get('source', {}), os.path.join(reviews_dir, VERIFIED_NAME))
+
+def build_reviews_table(csv_path, reviews_dir=None, chunksize=REVIEW_CHUNKSIZE, workers=REVIEW_WORKERS):
+    """Parse reviews_list into Parquet parts under reviews_dir; returns the directory
+
+    Parts are written to a temporary directory that replaces the old table
+    only once complete, so readers never see a partial table.
+    """
+    reviews_dir = reviews_dir or reviews_dir_for(csv_path)
+    tmp_dir = f"{reviews_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        n_reviews = 0
+        for part, reviews in enumerate(_parsed_chunks(iter_review_chunks(csv_path, chunksize), workers)):
+            reviews.to_parquet(os.path.join(tmp_dir, f"part-{part:05d}.parquet"), index=False)
+            n_reviews += len(reviews)
+        manifest = {
+            'version': CACHE_VERSION,
+            'source': file_fingerprint(csv_path, with_hash=True),
+            'reviews': n_reviews
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f)
+        shutil.rmtree(reviews_dir, ignore_errors=True)
+        os.replace(tmp_dir, reviews_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return reviews_dir
+
+def ensure_reviews_table(csv_path, workers=REVIEW_WORKERS):
+    """Directory of the reviews table for csv_path, parsing it first if missing or stale"""
+    reviews_dir = reviews_dir_for(csv_path)
+    if not is_reviews_table_valid(csv_path, reviews_dir):
+        build_reviews_table(csv_path, reviews_dir, workers=workers)
+    return reviews_dir
+
+def load_reviews(csv_path, columns=None, workers=REVIEW_WORKERS):
+    """Reviews table for csv_path, parsing it first if missing or stale
+
+    Pass columns (e.g. ['restaurant_id', 'rating']) to skip the review text.
+    """
+    if not cache_available():
+        parts = list(_parsed_chunks(iter_review_chunks(csv_path), workers))
+        reviews = pd.concat(parts, ignore_index=True) if parts else _empty_reviews()
+        return reviews if columns is None else reviews[columns]
+
+    reviews_dir = ensure_reviews_table(csv_path, workers)
+    if not _read_manifest(reviews_dir).get('reviews'):
+        reviews = _empty_reviews()
+        return reviews if columns is None else reviews[columns]
+    # Files starting with '_' (the manifest) are skipped by the Parquet dataset reader
+    return pd.read_parquet(reviews_dir, columns=columns, engine='pyarrow')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv', help='source CSV; the table is written next to it')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+    reviews_dir = build_reviews_table(args.csv, workers=args.workers)
+    print(f"{_read_manifest(reviews_dir)['reviews']:,} reviews written to {reviews_dir}")
+
+if __name__ == '__main__':
+    main()
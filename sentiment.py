@@ -0,0 +1,113 @@
+# sentiment.py
+"""Batch TextBlob sentiment for the reviews table
+
+Scores are cached on disk by a hash of the review text, so a restart or a
+refreshed CSV only scores reviews that were never seen before. With
+ZOMATO_REVIEW_WORKERS above 1, scoring runs in a process pool, one batch
+of texts per task.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from textblob import TextBlob
+except ImportError:
+    TextBlob = None
+
+from data_cache import cache_available, cache_path_for, read_frame_cache
+from reviews import REVIEW_WORKERS, load_reviews
+
+SENTIMENT_BATCH_SIZE = 500
+# Reviews with polarity below this count as negative
+NEGATIVE_POLARITY = 0.0
+
+def sentiment_available():
+    return TextBlob is not None
+
+def text_hashes(texts):
+    """Stable 64-bit hash of each review text"""
+    return pd.util.hash_array(pd.Series(texts, dtype=object).fillna('').to_numpy(dtype=object))
+
+def score_texts(texts):
+    """(polarity, subjectivity) arrays for a batch of texts"""
+    scores = np.array([TextBlob(text).sentiment for text in texts], dtype=np.float32).reshape(-1, 2)
+    return scores[:, 0], scores[:, 1]
+
+def _score_batches(texts, workers, batch_size=SENTIMENT_BATCH_SIZE):
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    if workers <= 1 or len(batches) <= 1:
+        results = [score_texts(batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(score_texts, batches))
+    if not results:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+def read_score_cache(cache_path):
+    """Cached scores indexed by text hash (empty when there is no cache yet)"""
+    if cache_available() and os.path.exists(cache_path):
+        try:
+            return read_frame_cache(cache_path).set_index('text_hash')
+        except (OSError, ValueError):
+            pass
+    empty = pd.DataFrame({
+        'text_hash': np.zeros(0, dtype=np.uint64),
+        'polarity': np.zeros(0, dtype=np.float32),
+        'subjectivity': np.zeros(0, dtype=np.float32)
+    })
+    return empty.set_index('text_hash')
+
+def write_score_cache(scores, cache_path):
+    """Atomically replace the score cache"""
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        scores.reset_index().to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def score_reviews(texts, cache_path=None, workers=REVIEW_WORKERS):
+    """Polarity and subjectivity per text, scoring only texts missing from the cache"""
+    hashes = text_hashes(texts)
+    cached = read_score_cache(cache_path) if cache_path else read_score_cache('')
+
+    # Duplicate texts (e.g. copy-pasted reviews) are scored once
+    unique_hashes, first = np.unique(hashes, return_index=True)
+    missing = ~np.isin(unique_hashes, cached.index.to_numpy())
+    if missing.any():
+        new_texts = pd.Series(texts, dtype=object).fillna('').to_numpy()[first[missing]].tolist()
+        polarity, subjectivity = _score_batches(new_texts, workers)
+        scored = pd.DataFrame(
+            {'polarity': polarity, 'subjectivity': subjectivity},
+            index=pd.Index(unique_hashes[missing], name='text_hash')
+        )
+        cached = pd.concat([cached, scored])
+        if cache_path and cache_available():
+            try:
+                write_score_cache(cached, cache_path)
+            except OSError:
+                # Read-only data directory: keep the scores for this run only
+                pass
+    return cached.reindex(hashes).reset_index(drop=True)
+
+def restaurant_sentiment(restaurant_id, polarity, negative_polarity=NEGATIVE_POLARITY):
+    """Mean polarity and share of negative reviews per restaurant"""
+    scores = pd.DataFrame({'restaurant_id': restaurant_id, 'polarity': polarity})
+    scores['negative'] = scores['polarity'] < negative_polarity
+    grouped = scores.groupby('restaurant_id')
+    return pd.DataFrame({
+        'mean_polarity': grouped['polarity'].mean(),
+        'negative_share': grouped['negative'].mean(),
+        'scored_reviews': grouped.size()
+    })
+
+def load_restaurant_sentiment(csv_path, workers=REVIEW_WORKERS):
+    """Per-restaurant sentiment aggregates for csv_path, indexed by restaurant_id"""
+    reviews = load_reviews(csv_path, columns=['restaurant_id', 'text'], workers=workers)
+    scores = score_reviews(reviews['text'], cache_path_for(csv_path, 'sentiment'), workers=workers)
+    return restaurant_sentiment(reviews['restaurant_id'].to_numpy(), scores['polarity'].to_numpy())
@@ -0,0 +1,412 @@
+# sql_backend.py
+"""Out-of-core query backend: DuckDB SQL over a restaurant-level Parquet file
+
+The source CSV is streamed once, chunk by chunk, into a Parquet table
+with one row per restaurant (the first listing, as split_listings()
+keeps), stored next to the CSV like the other cached artifacts. Queries
+then run in-process in DuckDB as columnar scans of that file, so the
+dataset never has to fit in a pandas DataFrame. Delta files are cleaned
+into their own Parquet files and layered on top by restaurant_id.
+
+SQLQueryEngine answers the same queries as query_service.QueryEngine;
+select it with ZOMATO_BACKEND=duckdb. duckdb is optional: install it with
+pip install -r requirements-duckdb.txt. benchmarks/check_sql_parity.py
+compares the two.
+"""
+import os
+import threading
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from data_cache import cache_available, cache_path_for, file_fingerprint, is_cache_valid, tag_schema
+from data_loader import STREAM_DTYPES, TOP_COLUMNS, delta_key, find_deltas
+from filters import normalize_filters
+from plotting import histogram_summary
+from preprocessing import clean_chunk, finalize_frame
+from query_plan import QueryPlan, normalize_request, query_key
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+SQL_VARIANT = 'restaurants'
+SQL_CHUNKSIZE = 100_000
+SQL_THREADS = int(os.environ.get('ZOMATO_SQL_THREADS', 0)) or None
+SQL_MEMORY_LIMIT = os.environ.get('ZOMATO_SQL_MEMORY_LIMIT')
+
+# Restaurant columns stored in the Parquet table; the raw text columns stay in the CSV
+RESTAURANT_COLUMNS = [
+    'restaurant_id', 'name', 'url', 'address', 'online_order', 'book_table', 'votes', 'location',
+    'rest_type', 'dish_liked', 'cuisines', 'approx_cost(for two people)', 'cost_category',
+    'rating_numeric', 'popularity_score', 'quality_tier'
+]
+# Same measures and flags as the AggregateCube summaries
+SQL_MEASURES = {'rating': 'rating_numeric', 'votes': 'votes', 'cost': 'approx_cost(for two people)'}
+SQL_FLAGS = ['online_order', 'book_table']
+# Cuisine tokens of a row, split and trimmed like CuisineIndex does
+CUISINE_LIST = (
+    "list_distinct(list_filter(list_transform(string_split(cuisines, ','), c -> trim(c)), c -> c <> ''))"
+)
+
+def sql_available():
+    return duckdb is not None and cache_available()
+
+def quote(column):
+    """SQL identifier for a column name"""
+    return '"' + column.replace('"', '""') + '"'
+
+def literal(text):
+    """SQL string literal (file paths cannot be bound as parameters in a view)"""
+    return "'" + text.replace("'", "''") + "'"
+
+def restaurant_frame(raw):
+    """Cleaned restaurant rows of a raw chunk, in the storage layout of the Parquet table"""
+    df = finalize_frame(clean_chunk(raw))
+    df = df[[col for col in RESTAURANT_COLUMNS if col in df.columns]]
+    # Parquet stores strings dictionary-encoded already; pandas categories do not survive chunking
+    categorical = df.select_dtypes('category').columns
+    return df.assign(**{col: df[col].astype(object) for col in categorical})
+
+def _restaurant_schema():
+    schema = [
+        ('restaurant_id', pa.uint64()), ('online_order', pa.bool_()), ('book_table', pa.bool_()),
+        ('votes', pa.int64()), ('approx_cost(for two people)', pa.float64()),
+        ('rating_numeric', pa.float64()), ('popularity_score', pa.float64())
+    ]
+    types = dict(schema)
+    return pa.schema(
+        [(col, types.get(col, pa.string())) for col in RESTAURANT_COLUMNS] + [('pos', pa.int64())]
+    )
+
+def _write_restaurants(frames, source_path, parquet_path):
+    """Write restaurant frames to parquet_path, keeping the first row of each restaurant"""
+    schema = tag_schema(_restaurant_schema(), source_path, SQL_VARIANT)
+    seen = set()
+    pos = 0
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for df in frames:
+                ids = df['restaurant_id']
+                keep = ~ids.duplicated().to_numpy() & ~ids.isin(seen).to_numpy()
+                seen.update(ids[keep])
+                df = df[keep].reindex(columns=RESTAURANT_COLUMNS).assign(pos=np.arange(pos, pos + keep.sum()))
+                pos += len(df)
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+        os.replace(tmp_path, parquet_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return parquet_path
+
+def build_restaurant_table(csv_path, parquet_path=None, chunksize=SQL_CHUNKSIZE):
+    """Stream the CSV into its restaurant-level Parquet table; memory is bounded by one chunk"""
+    reader = pd.read_csv(
+        csv_path, usecols=lambda col: col in STREAM_DTYPES, dtype=STREAM_DTYPES, chunksize=chunksize
+    )
+    return _write_restaurants(
+        (restaurant_frame(chunk) for chunk in reader), csv_path,
+        parquet_path or cache_path_for(csv_path, SQL_VARIANT)
+    )
+
+def restaurant_table(source_path, chunksize=SQL_CHUNKSIZE):
+    """Path of the Parquet table of a CSV (base or delta), building it first if missing or stale"""
+    parquet_path = cache_path_for(source_path, SQL_VARIANT)
+    if not is_cache_valid(source_path, parquet_path, SQL_VARIANT):
+        build_restaurant_table(source_path, parquet_path, chunksize)
+    return parquet_path
+
+
+class SQLQueryEngine:
+    """Dashboard queries as DuckDB SQL over the Parquet restaurant tables
+
+    The `restaurants` view unions the base table with every delta table;
+    a restaurant's rows come from the last file that contains it, ordered
+    by (source_no, pos) exactly like the in-memory upserts order self.df.
+    """
+
+    def __init__(self, csv_path, chunksize=SQL_CHUNKSIZE, delta_dir=None):
+        if not sql_available():
+            raise ImportError("the DuckDB backend needs the duckdb and pyarrow packages")
+        self.source = csv_path
+        self.chunksize = chunksize
+        self.delta_dir = delta_dir
+        self.base_table = restaurant_table(csv_path, chunksize)
+        config = {}
+        if SQL_THREADS:
+            config['threads'] = SQL_THREADS
+        if SQL_MEMORY_LIMIT:
+            # Larger-than-memory sorts and aggregations spill to disk past this limit
+            config['memory_limit'] = SQL_MEMORY_LIMIT
+        self.connection = duckdb.connect(config=config)
+        self.applied_deltas = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Layer delta files added or changed since the last call on top of the base table"""
+        keys = [delta_key(path) for path in find_deltas(self.delta_dir)]
+        with self._lock:
+            if keys != self.applied_deltas:
+                self._create_view(keys)
+        return self.applied_deltas
+
+    def _create_view(self, keys):
+        tables = [self.base_table] + [restaurant_table(key[0], self.chunksize) for key in keys]
+        parts = []
+        for source_no, table in enumerate(tables):
+            later = ', '.join(literal(path) for path in tables[source_no + 1:])
+            part = f"SELECT *, {source_no} AS source_no FROM read_parquet({literal(table)})"
+            if later:
+                part += f" WHERE restaurant_id NOT IN (SELECT restaurant_id FROM read_parquet([{later}]))"
+            parts.append(part)
+        self.connection.execute(
+            f"CREATE OR REPLACE VIEW restaurants AS SELECT *, {CUISINE_LIST} AS cuisine_list "
+            f"FROM ({' UNION ALL '.join(parts)})"
+        )
+        self.columns = [row[0] for row in self.connection.execute("DESCRIBE restaurants").fetchall()]
+        self.applied_deltas = keys
+
+    def data_version(self):
+        fingerprint = file_fingerprint(self.source)
+        return [self.source, fingerprint['size'], fingerprint['mtime_ns'],
+                [list(key) for key in self.applied_deltas]]
+
+    def _query(self, sql, params=()):
+        # A cursor per query: DuckDB connections must not be shared across threads
+        return self.connection.cursor().execute(sql, list(params)).df()
+
+    def _column(self, column):
+        if column not in self.columns:
+            raise KeyError(column)
+        return quote(column)
+
+    def _where(self, filters=None, where=None, not_null=()):
+        """WHERE clause and parameters of a selection, the same semantics as FilterEngine.select()"""
+        filters = normalize_filters(filters)
+        clauses, params = [], []
+        # where narrows the selection further, even on a column it already filters
+        categories = list(filters['categories'].items()) + [(col, v) for col, v in (where or {}).items() if v]
+        for column, values in categories:
+            clauses.append(f"{self._column(column)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        for column, (low, high) in filters['ranges'].items():
+            if low is not None:
+                clauses.append(f"{self._column(column)} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{self._column(column)} <= ?")
+                params.append(high)
+        if filters.get('cuisines'):
+            clauses.append("list_has_any(cuisine_list, ?::VARCHAR[])")
+            params.append(filters['cuisines'])
+        clauses.extend(f"{self._column(column)} IS NOT NULL" for column in not_null)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _summary_columns(self, condition=None, prefix=''):
+        # Summary aggregates, over the rows where condition holds when one is given
+        only = '' if condition is None else f" FILTER (WHERE {condition})"
+        columns = [f"count(*){only} AS {prefix}count"]
+        for name, column in SQL_MEASURES.items():
+            column = quote(column)
+            columns += [
+                f"count({column}){only} AS {prefix}{name}_count",
+                f"avg({column}){only} AS {prefix}{name}_mean",
+                f"stddev_samp({column}){only} AS {prefix}{name}_std"
+            ]
+        columns += [
+            f"100.0 * count_if({quote(flag)}){only} / nullif(count(*){only}, 0) AS {prefix}{flag}_pct"
+            for flag in SQL_FLAGS
+        ]
+        return ', '.join(columns)
+
+    def _summaries(self, filters, requests):
+        """kpis and group_by requests answered by one GROUPING SETS scan
+
+        Each group_by is one grouping set and plain KPIs are the grand
+        total (); KPIs narrowed by `where` are FILTER aggregates of that
+        total, over a flag column computed once per distinct condition.
+        """
+        sets = list(dict.fromkeys(tuple(params['by']) for method, params in requests if method == 'group_by' and params['by']))
+        keys = list(dict.fromkeys(column for grouping_set in sets for column in grouping_set))
+        conditions = list(dict.fromkeys(
+            query_key('where', params['where']) for method, params in requests if method == 'kpis' and params['where']
+        ))
+        wheres = {query_key('where', params['where']): params['where'] for method, params in requests if method == 'kpis'}
+
+        flags, flag_params = [], []
+        for j, key in enumerate(conditions):
+            clauses = []
+            for column, values in wheres[key].items():
+                clauses.append(f"{self._column(column)} IN ({', '.join('?' * len(values))})")
+                flag_params.extend(values)
+            flags.append(f"({' AND '.join(clauses)}) AS _where{j}")
+        clause, params = self._where(filters)
+        columns = [self._column(column) for column in keys]
+        if keys:
+            columns.append(f"grouping({', '.join(self._column(column) for column in keys)}) AS _grouping")
+        columns.append(self._summary_columns())
+        columns += [self._summary_columns(f"_where{j}", f"w{j}_") for j in range(len(conditions))]
+        sql = (
+            f"SELECT {', '.join(columns)} FROM "
+            f"(SELECT *{''.join(', ' + flag for flag in flags)} FROM restaurants{clause})"
+        )
+        if keys:
+            grouping_sets = ', '.join('(' + ', '.join(self._column(column) for column in s) + ')' for s in sets)
+            sql += f" GROUP BY GROUPING SETS ((), {grouping_sets})"
+        frame = self._query(sql, flag_params + params)
+
+        base = ['count'] + [f"{name}_{stat}" for name in SQL_MEASURES for stat in ('count', 'mean', 'std')]
+        base += [f"{flag}_pct" for flag in SQL_FLAGS]
+        counts = [col for col in base if col.endswith('count')]
+        total = frame[frame['_grouping'] == (1 << len(keys)) - 1].iloc[0] if keys else frame.iloc[0]
+        results = []
+        for method, params in requests:
+            if method == 'kpis':
+                prefix = f"w{conditions.index(query_key('where', params['where']))}_" if params['where'] else ''
+                results.append(total[[prefix + col for col in base]].set_axis(base).astype(float).rename(0))
+                continue
+            by = params['by']
+            if not by:
+                results.append(total[base].astype(float).to_frame().T.reset_index(drop=True))
+                continue
+            mask = sum(1 << (len(keys) - 1 - k) for k, column in enumerate(keys) if column not in by)
+            part = frame[(frame['_grouping'] == mask) & frame[by].notna().all(axis=1)]
+            part = part[by + base].infer_objects().sort_values(by).set_index(by)
+            part[counts] = part[counts].astype(np.int64)
+            results.append(part)
+        return results
+
+    def _top_n(self, filters, n, order_by, columns):
+        # Ties keep row order, like DataFrame.nlargest()
+        columns = [col for col in (columns or TOP_COLUMNS) if col in self.columns]
+        clause, params = self._where(filters, not_null=[order_by])
+        return self._query(
+            f"SELECT {', '.join(self._column(col) for col in columns)} FROM restaurants{clause} "
+            f"ORDER BY {self._column(order_by)} DESC, source_no, pos LIMIT {int(n)}",
+            params
+        )
+
+    def _histogram(self, filters, column, nbins):
+        # Binned from the distinct values and their counts
+        clause, params = self._where(filters, not_null=[column])
+        values = self._query(
+            f"SELECT {self._column(column)} AS value, count(*) AS n FROM restaurants{clause} GROUP BY 1", params
+        )
+        return histogram_summary(values['value'], int(nbins), weights=values['n'])
+
+    def _cuisine_counts(self, filters):
+        clause, params = self._where(filters)
+        counts = self._query(
+            f"SELECT cuisine, count(*) AS count FROM "
+            f"(SELECT unnest(cuisine_list) AS cuisine FROM restaurants{clause}) "
+            f"GROUP BY cuisine ORDER BY count DESC, cuisine",
+            params
+        )
+        return pd.Series(counts['count'].to_numpy(dtype=np.int64), index=counts['cuisine'].to_numpy(dtype=object), name='count')
+
+    def _correlation(self, filters):
+        # Pairwise Pearson correlation of the measures, laid out like AggregateCube.correlation()
+        names = list(SQL_MEASURES)
+        pairs = list(combinations(names, 2))
+        clause, params = self._where(filters)
+        values = self._query(
+            "SELECT " + ', '.join(
+                f"corr({quote(SQL_MEASURES[x])}, {quote(SQL_MEASURES[y])}) AS c{k}" for k, (x, y) in enumerate(pairs)
+            ) + f" FROM restaurants{clause}",
+            params
+        ).iloc[0]
+        corr = pd.DataFrame(np.eye(len(names)), index=names, columns=names)
+        for k, (x, y) in enumerate(pairs):
+            corr.loc[x, y] = corr.loc[y, x] = values[f'c{k}']
+        return corr
+
+    def execute(self, filters, requests):
+        """Results of several (method, params) requests on one selection, computed together
+
+        All KPI and group-by requests share one scan, and cuisine
+        distributions share one count; top-N lists, histograms and
+        correlations are a query each.
+        """
+        requests = [(method, normalize_request(method, params)) for method, params in requests]
+        results = [None] * len(requests)
+        summarized = [i for i, (method, _) in enumerate(requests) if method in ('kpis', 'group_by')]
+        if summarized:
+            for i, result in zip(summarized, self._summaries(filters, [requests[i] for i in summarized])):
+                results[i] = result
+        counted = [i for i, (method, _) in enumerate(requests) if method == 'cuisine_distribution']
+        if counted:
+            counts = self._cuisine_counts(filters)
+            for i in counted:
+                n = requests[i][1]['n']
+                results[i] = counts if n is None else counts.head(n)
+        for i, (method, params) in enumerate(requests):
+            if method == 'top_n':
+                results[i] = self._top_n(filters, **params)
+            elif method == 'histogram':
+                results[i] = self._histogram(filters, **params)
+            elif method == 'correlation':
+                results[i] = self._correlation(filters)
+        return results
+
+    def plan(self, filters=None):
+        """Lazy QueryPlan over a selection"""
+        return QueryPlan(self, filters)
+
+    def overview(self):
+        """Dataset-wide values the sidebar needs: filter options and totals"""
+        def first_seen(column):
+            # Values in order of first appearance, like Series.unique()
+            return self._query(
+                f"SELECT {quote(column)} AS value FROM restaurants GROUP BY 1 ORDER BY min((source_no, pos))"
+            )['value'].tolist()
+        limits = self._query(
+            f"SELECT max(votes) AS votes_max, min({quote(SQL_MEASURES['cost'])}) AS cost_min, "
+            f"max({quote(SQL_MEASURES['cost'])}) AS cost_max FROM restaurants"
+        ).iloc[0]
+        totals, cuisines = self.execute(None, [('kpis', {}), ('cuisine_distribution', {})])
+        return {
+            'source': self.source,
+            'data_version': self.data_version(),
+            'locations': first_seen('location'),
+            'cost_categories': first_seen('cost_category'),
+            'rest_types': first_seen('rest_type'),
+            'cuisines': cuisines.to_dict(),
+            'votes_max': None if pd.isna(limits['votes_max']) else int(limits['votes_max']),
+            'cost_range': None if pd.isna(limits['cost_min']) else [int(limits['cost_min']), int(limits['cost_max'])],
+            'totals': totals.to_dict()
+        }
+
+    def kpis(self, filters=None, where=None):
+        """Totals (count, means, stds, percentages) of a selection, optionally narrowed by where"""
+        return self.execute(filters, [('kpis', {'where': where})])[0]
+
+    def group_by(self, filters=None, by=None):
+        """Summary of a selection per group of the `by` columns; groups with a null key are dropped"""
+        return self.execute(filters, [('group_by', {'by': by})])[0]
+
+    def top_n(self, filters=None, n=10, order_by='rating_numeric', columns=None):
+        """The n restaurants of a selection with the largest order_by"""
+        return self.execute(filters, [('top_n', {'n': n, 'order_by': order_by, 'columns': columns})])[0]
+
+    def histogram(self, filters=None, column='rating_numeric', nbins=20):
+        """Equal-width bin counts of a numeric column over a selection"""
+        return self.execute(filters, [('histogram', {'column': column, 'nbins': nbins})])[0]
+
+    def correlation(self, filters=None):
+        """Pairwise correlation of the rating, votes and cost measures over a selection"""
+        return self.execute(filters, [('correlation', {})])[0]
+
+    def cuisine_distribution(self, filters=None, n=None):
+        """Restaurants per cuisine within a selection, most common first"""
+        return self.execute(filters, [('cuisine_distribution', {'n': n})])[0]
@@ -0,0 +1,337 @@
+# synthetic.py
+"""Synthetic zomato.csv data at any scale, for load testing
+
+Every column follows the format of the real dump: "4.1/5" / "NEW" / "-"
+ratings, "1,200" costs, repr-encoded reviews_list and menu_item, CRLF
+separated phone numbers and about four listings per restaurant. Values
+are derived from a counter-based hash of (seed, restaurant or row number)
+rather than a sequential RNG, so any chunk can be generated on its own,
+output does not depend on the chunk size, and every listing of a
+restaurant agrees on its restaurant-level attributes.
+
+Run from the repository root:
+    python synthetic.py OUTPUT.csv|OUTPUT.parquet [--rows N] [--seed S] [--chunksize C]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_ROWS = 10_000_000
+DEFAULT_CHUNKSIZE = 500_000
+DEFAULT_SEED = 42
+# Average number of listings (listed_in type/city rows) per restaurant, as in the real dump
+LISTINGS_PER_RESTAURANT = 4
+MAX_REVIEWS = 3
+MAX_CUISINES = 4
+MAX_DISHES = 7
+MAX_MENU_ITEMS = 6
+# Columns of the dump, in file order. All of them are raw strings, as read from
+# the CSV (votes included), so every Parquet chunk shares one all-string schema
+RAW_COLUMNS = [
+    'url', 'address', 'name', 'online_order', 'book_table', 'rate', 'votes', 'phone', 'location',
+    'rest_type', 'dish_liked', 'cuisines', 'approx_cost(for two people)', 'reviews_list', 'menu_item',
+    'listed_in(type)', 'listed_in(city)'
+]
+
+LOCATIONS = [
+    'BTM', 'HSR', 'Koramangala 5th Block', 'JP Nagar', 'Whitefield', 'Indiranagar', 'Jayanagar',
+    'Marathahalli', 'Bannerghatta Road', 'Bellandur', 'Electronic City', 'Sarjapur Road',
+    'Banashankari', 'Basavanagudi', 'Malleshwaram', 'Brigade Road', 'MG Road', 'Church Street',
+    'Lavelle Road', 'Ulsoor', 'Frazer Town', 'Rajajinagar', 'Kalyan Nagar', 'New BEL Road'
+]
+LISTED_IN_CITIES = [
+    'BTM', 'HSR', 'Koramangala 5th Block', 'JP Nagar', 'Whitefield', 'Indiranagar', 'Jayanagar',
+    'Marathahalli', 'Bannerghatta Road', 'Bellandur', 'Banashankari', 'Basavanagudi',
+    'Malleshwaram', 'Brigade Road', 'MG Road', 'Church Street', 'Lavelle Road', 'Frazer Town',
+    'Rajajinagar', 'Kalyan Nagar', 'New BEL Road', 'Residency Road', 'Sarjapur Road', 'Old Airport Road'
+]
+REST_TYPES = [
+    'Quick Bites', 'Casual Dining', 'Cafe', 'Delivery', 'Dessert Parlor', 'Takeaway, Delivery',
+    'Casual Dining, Bar', 'Bakery', 'Beverage Shop', 'Bar', 'Food Court', 'Sweet Shop',
+    'Bar, Casual Dining', 'Lounge', 'Pub', 'Fine Dining', 'Casual Dining, Cafe', 'Kiosk'
+]
+# Relative frequency of each REST_TYPES entry
+REST_TYPE_WEIGHTS = [38, 21, 7, 5, 4, 3, 3, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1]
+LISTED_IN_TYPES = ['Delivery', 'Dine-out', 'Desserts', 'Cafes', 'Drinks & nightlife', 'Buffet', 'Pubs and bars']
+LISTED_IN_TYPE_WEIGHTS = [50, 34, 7, 3, 3, 2, 1]
+CUISINES = [
+    'North Indian', 'Chinese', 'South Indian', 'Fast Food', 'Biryani', 'Continental', 'Desserts',
+    'Cafe', 'Beverages', 'Italian', 'Street Food', 'Bakery', 'Pizza', 'Burger', 'Seafood',
+    'Andhra', 'Mughlai', 'Ice Cream', 'Rolls', 'Kerala', 'Arabian', 'Asian', 'Momos',
+    'Thai', 'Healthy Food', 'Mexican', 'Salad', 'Finger Food', 'Japanese', 'Mediterranean'
+]
+DISHES = [
+    'Biryani', 'Pasta', 'Pizza', 'Burgers', 'Cocktails', 'Masala Dosa', 'Filter Coffee',
+    'Paneer Tikka', 'Butter Chicken', 'Mocktails', 'Sandwiches', 'Noodles', 'Momos', 'Brownie',
+    'Waffles', 'Nachos', 'Fish', 'Dal Makhani', 'Naan', 'Chicken Grill', 'Rolls', 'Salads',
+    'Mutton Biryani', 'Ghee Rice', 'Idli', 'Vada', 'Cold Coffee', 'Hot Chocolate', 'Fries', 'Tea'
+]
+MENU_ITEMS = [
+    'Veg Biryani', 'Chicken Biryani', 'Paneer Butter Masala', 'Gobi Manchurian', 'Veg Fried Rice',
+    'Chicken Fried Rice', 'Masala Dosa', 'Idli Vada', 'Chicken 65', 'Butter Naan', 'Tandoori Roti',
+    'Dal Tadka', 'Jeera Rice', 'Chilli Chicken', 'Hakka Noodles', 'Veg Burger', 'French Fries',
+    'Margherita Pizza', 'Chocolate Brownie', 'Cold Coffee', 'Fresh Lime Soda', 'Gulab Jamun'
+]
+NAME_PREFIXES = [
+    'Sri', 'Royal', 'Spice', 'Urban', 'The', 'Hotel', 'Cafe', 'Namma', 'Little', 'Big',
+    'New', 'Golden', 'Green', 'Red', 'Third Wave', 'Chai', 'Meghana', 'Empire', 'Paradise', 'Bombay'
+]
+NAME_SUFFIXES = [
+    'Kitchen', 'Bistro', 'Dhaba', 'Darshini', 'Bhavan', 'Grill', 'House', 'Point', 'Corner',
+    'Brewery', 'Lounge', 'Express', 'Treats', 'Cafe', 'Foods', 'Biryani', 'Canteen', 'Social'
+]
+STREETS = [
+    '100 Feet Road', '80 Feet Road', '1st Main', '2nd Cross', '5th Block', 'Outer Ring Road',
+    'Main Road', 'Service Road', '12th Main', '7th Cross', 'Residency Road', 'Hosur Road'
+]
+REVIEW_OPENINGS = [
+    'Visited with friends on a weekend.', 'Ordered through the app for dinner.', 'Went here for lunch.',
+    'Came here after a long day at work.', 'Tried this place for the first time.', 'Regular visitor here.'
+]
+REVIEW_BODIES = [
+    'The food was delicious and the portions were generous.', 'Service was slow and the staff seemed confused.',
+    'Ambience is great and the music was just right.', 'The biryani was bland and overpriced.',
+    'Quick delivery and the packaging was neat.', 'Nothing special, average taste overall.',
+    'Loved the desserts, will come back again.', 'The place was crowded and noisy.'
+]
+# (string, relative frequency) of approx_cost(for two people)
+COSTS = ['150', '200', '300', '400', '500', '600', '700', '800', '1,000', '1,200', '1,500', '2,000', '3,000']
+COST_WEIGHTS = [3, 8, 14, 15, 13, 9, 6, 7, 6, 5, 4, 2, 1]
+
+# Stream numbers of the hash, one per independently drawn attribute
+(
+    _RESTAURANT, _NAME_PREFIX, _NAME_SUFFIX, _STREET, _DOOR, _ONLINE, _BOOK, _RATE_A, _RATE_B,
+    _RATE_C, _RATE_KIND, _VOTES, _PHONE_KIND, _PHONE, _PHONE2, _PHONE2_KIND, _LOCATION,
+    _REST_TYPE, _N_CUISINES, _CUISINE, _CUISINE_STEP, _N_DISHES, _DISH, _DISH_STEP, _COST,
+    _N_REVIEWS, _REVIEW_RATING, _REVIEW_OPENING, _REVIEW_BODY, _N_MENU, _MENU, _MENU_STEP,
+    _LISTED_TYPE, _LISTED_CITY, _CONTEXT
+) = range(35)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+def _splitmix(x):
+    """SplitMix64 finalizer over a uint64 array (wrapping arithmetic)"""
+    with np.errstate(over='ignore'):
+        z = x + _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * _MIX1
+        z = (z ^ (z >> np.uint64(27))) * _MIX2
+        return z ^ (z >> np.uint64(31))
+
+def _hash(seed, keys, stream, slot=0):
+    """64-bit hash of each key for one (seed, stream, slot) combination"""
+    salt = _splitmix(np.array([seed * 1_000_003 + stream * 1_009 + slot], dtype=np.uint64))[0]
+    return _splitmix(np.asarray(keys, dtype=np.uint64) ^ salt)
+
+def _uniform(seed, keys, stream, slot=0):
+    """Uniform floats in [0, 1) for each key"""
+    return (_hash(seed, keys, stream, slot) >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+def _integers(seed, keys, stream, low, high, slot=0):
+    """Uniform integers in [low, high) for each key"""
+    return low + (_uniform(seed, keys, stream, slot) * (high - low)).astype(np.int64)
+
+def _pick(options, u, weights=None):
+    """options[i] for each uniform u, optionally with relative weights"""
+    options = np.asarray(options, dtype=object)
+    if weights is None:
+        return options[np.minimum((u * len(options)).astype(np.int64), len(options) - 1)]
+    cumulative = np.cumsum(weights, dtype=np.float64)
+    return options[np.searchsorted(cumulative / cumulative[-1], u, side='right')]
+
+def _join(parts, counts, separator):
+    """Join the first counts[i] of the parallel object arrays in parts, row by row"""
+    joined = parts[0].copy()
+    for position in range(1, len(parts)):
+        joined = np.where(counts > position, joined + separator + parts[position], joined)
+    return joined
+
+def _distinct_codes(seed, keys, n_options, max_count, stream, step_stream):
+    """max_count option codes per key, all distinct: a random start and a stride small enough not to wrap"""
+    start = _integers(seed, keys, stream, 0, n_options)
+    step = _integers(seed, keys, step_stream, 1, max(2, n_options // max_count))
+    return [(start + position * step) % n_options for position in range(max_count)]
+
+def _digits(values):
+    return pd.Series(values).astype(str).to_numpy(dtype=object)
+
+def _slug(values):
+    return np.asarray([value.lower().replace(' ', '-') for value in values], dtype=object)
+
+def _quoted_list(parts, counts):
+    """Python repr of a list of strings (counts[i] of them; '[]' when zero)"""
+    quoted = [np.asarray("'" + part + "'", dtype=object) for part in parts]
+    return np.where(counts > 0, '[' + _join(quoted, counts, ', ') + ']', '[]')
+
+def restaurant_attributes(restaurant_no, seed=DEFAULT_SEED, max_reviews=MAX_REVIEWS):
+    """Restaurant-level columns for an array of restaurant numbers
+
+    The same restaurant number always yields the same values for a seed.
+    """
+    keys = np.asarray(restaurant_no, dtype=np.uint64)
+    n = len(keys)
+
+    prefix = _integers(seed, keys, _NAME_PREFIX, 0, len(NAME_PREFIXES))
+    suffix = _integers(seed, keys, _NAME_SUFFIX, 0, len(NAME_SUFFIXES))
+    name = np.asarray(NAME_PREFIXES, dtype=object)[prefix] + ' ' + np.asarray(NAME_SUFFIXES, dtype=object)[suffix]
+    location_code = _integers(seed, keys, _LOCATION, 0, len(LOCATIONS))
+    location = np.asarray(LOCATIONS, dtype=object)[location_code]
+    # Name and location slugs plus the restaurant number keep every url distinct
+    slug = (
+        _slug(NAME_PREFIXES)[prefix] + '-' + _slug(NAME_SUFFIXES)[suffix]
+        + '-' + _slug(LOCATIONS)[location_code] + '-' + _digits(keys)
+    )
+    address = (
+        _digits(_integers(seed, keys, _DOOR, 1, 1000)) + ', ' + _pick(STREETS, _uniform(seed, keys, _STREET))
+        + ', ' + location + ', Bangalore'
+    )
+
+    # Ratings cluster around 3.7 (mean of three uniforms); some are NEW, '-' or missing
+    mean = (_uniform(seed, keys, _RATE_A) + _uniform(seed, keys, _RATE_B) + _uniform(seed, keys, _RATE_C)) / 3
+    rating = np.round(2.4 + 2.5 * mean, 1)
+    kind = _uniform(seed, keys, _RATE_KIND)
+    # A few ratings carry a space before the slash ("3.9 /5"), as in the dump
+    rate = np.char.add(np.char.mod('%.1f', rating), np.where(kind < 0.03, ' /5', '/5')).astype(object)
+    rate[(kind >= 0.03) & (kind < 0.08)] = 'NEW'
+    rate[(kind >= 0.08) & (kind < 0.10)] = '-'
+    rate[kind >= 0.92] = np.nan
+    unrated = (kind >= 0.03) & (kind < 0.10)
+    # Vote counts are heavily skewed: most restaurants have a few dozen, a few have thousands
+    votes = np.floor(np.exp(_uniform(seed, keys, _VOTES) * np.log(16_000))).astype(np.int64) - 1
+    votes[unrated] = 0
+
+    mobile = '+91 ' + _digits(_integers(seed, keys, _PHONE, 7_000_000_000, 10_000_000_000))
+    landline = '080 ' + _digits(_integers(seed, keys, _PHONE, 22_000_000, 50_000_000))
+    phone = np.where(_uniform(seed, keys, _PHONE_KIND) < 0.6, mobile, landline)
+    second = '+91 ' + _digits(_integers(seed, keys, _PHONE2, 7_000_000_000, 10_000_000_000))
+    phone2_kind = _uniform(seed, keys, _PHONE2_KIND)
+    phone = np.where(phone2_kind < 0.4, phone + '\r\n' + second, phone).astype(object)
+    phone[phone2_kind >= 0.98] = np.nan
+
+    n_cuisines = _integers(seed, keys, _N_CUISINES, 1, MAX_CUISINES + 1)
+    cuisine_codes = _distinct_codes(seed, keys, len(CUISINES), MAX_CUISINES, _CUISINE, _CUISINE_STEP)
+    cuisines = _join([np.asarray(CUISINES, dtype=object)[codes] for codes in cuisine_codes], n_cuisines, ', ')
+
+    # About half the restaurants have no liked dishes (NaN in the dump)
+    n_dishes = _integers(seed, keys, _N_DISHES, -MAX_DISHES, MAX_DISHES + 1).clip(0)
+    dish_codes = _distinct_codes(seed, keys, len(DISHES), MAX_DISHES, _DISH, _DISH_STEP)
+    dish_liked = _join([np.asarray(DISHES, dtype=object)[codes] for codes in dish_codes], n_dishes, ', ')
+    dish_liked = np.where(n_dishes > 0, dish_liked, np.nan)
+
+    # Most menus are '[]' in the dump; the rest list item names only
+    n_menu = _integers(seed, keys, _N_MENU, -2 * MAX_MENU_ITEMS, MAX_MENU_ITEMS + 1).clip(0)
+    menu_codes = _distinct_codes(seed, keys, len(MENU_ITEMS), MAX_MENU_ITEMS, _MENU, _MENU_STEP)
+    menu_item = _quoted_list([np.asarray(MENU_ITEMS, dtype=object)[codes] for codes in menu_codes], n_menu)
+
+    # reviews_list: repr of [('Rated 4.0', 'RATED\n  text'), ...] with the newline escaped
+    n_reviews = _integers(seed, keys, _N_REVIEWS, 0, max_reviews + 1)
+    reviews = [
+        "('Rated " + np.char.mod('%.1f', np.round(2 * np.clip(
+            rating - 1 + 2 * _uniform(seed, keys, _REVIEW_RATING, slot), 1, 5
+        )) / 2).astype(object) + "', 'RATED\\n  "
+        + _pick(REVIEW_OPENINGS, _uniform(seed, keys, _REVIEW_OPENING, slot)) + ' '
+        + _pick(REVIEW_BODIES, _uniform(seed, keys, _REVIEW_BODY, slot)) + "')"
+        for slot in range(max(max_reviews, 1))
+    ]
+    reviews_list = np.where(n_reviews > 0, '[' + _join(reviews, n_reviews, ', ') + ']', '[]')
+
+    return pd.DataFrame({
+        'slug': slug,
+        'address': address,
+        'name': name,
+        'online_order': np.where(_uniform(seed, keys, _ONLINE) < 0.59, 'Yes', 'No'),
+        'book_table': np.where(_uniform(seed, keys, _BOOK) < 0.13, 'Yes', 'No'),
+        'rate': rate,
+        'votes': _digits(votes),
+        'phone': phone,
+        'location': location,
+        'rest_type': _pick(REST_TYPES, _uniform(seed, keys, _REST_TYPE), REST_TYPE_WEIGHTS),
+        'dish_liked': dish_liked,
+        'cuisines': cuisines,
+        'approx_cost(for two people)': _pick(COSTS, _uniform(seed, keys, _COST), COST_WEIGHTS),
+        'reviews_list': reviews_list,
+        'menu_item': menu_item
+    }, index=pd.RangeIndex(n))
+
+def synthetic_frame(start, stop, n_restaurants, seed=DEFAULT_SEED, max_reviews=MAX_REVIEWS):
+    """Rows [start, stop) of a synthetic dump with n_restaurants restaurants
+
+    Each row is a listing of a hashed restaurant number, so restaurants get
+    a varying number of listings, spread over the whole file like the real
+    dump (which is ordered by listed_in city and type).
+    """
+    rows = np.arange(start, stop, dtype=np.uint64)
+    restaurant_no = _integers(seed, rows, _RESTAURANT, 0, max(1, n_restaurants))
+    unique_no, inverse = np.unique(restaurant_no, return_inverse=True)
+    frame = restaurant_attributes(unique_no, seed, max_reviews).take(inverse).reset_index(drop=True)
+
+    # The context query string differs per listing; normalize_url() strips it
+    context = _digits(_hash(seed, rows, _CONTEXT))
+    frame.insert(0, 'url', 'https://www.zomato.com/bangalore/' + frame.pop('slug') + '?context=' + context)
+    frame['listed_in(type)'] = _pick(LISTED_IN_TYPES, _uniform(seed, rows, _LISTED_TYPE), LISTED_IN_TYPE_WEIGHTS)
+    frame['listed_in(city)'] = _pick(LISTED_IN_CITIES, _uniform(seed, rows, _LISTED_CITY))
+    return frame
+
+def iter_synthetic_chunks(n_rows, chunksize=DEFAULT_CHUNKSIZE, seed=DEFAULT_SEED, n_restaurants=None,
+                          max_reviews=MAX_REVIEWS):
+    """Yield the synthetic dump in chunks of at most chunksize rows"""
+    n_restaurants = n_restaurants or max(1, n_rows // LISTINGS_PER_RESTAURANT)
+    for start in range(0, n_rows, chunksize):
+        yield synthetic_frame(start, min(start + chunksize, n_rows), n_restaurants, seed, max_reviews)
+
+def generate_frame(n_rows, seed=DEFAULT_SEED, n_restaurants=None, max_reviews=MAX_REVIEWS):
+    """The whole synthetic dump as one DataFrame (for sizes that fit in memory)"""
+    n_restaurants = n_restaurants or max(1, n_rows // LISTINGS_PER_RESTAURANT)
+    return synthetic_frame(0, n_rows, n_restaurants, seed, max_reviews)
+
+def write_synthetic(path, n_rows, chunksize=DEFAULT_CHUNKSIZE, seed=DEFAULT_SEED, n_restaurants=None,
+                    max_reviews=MAX_REVIEWS):
+    """Write a synthetic dump chunk by chunk to a .csv or .parquet file; returns path
+
+    Memory is bounded by one chunk. Parquet output gets one row group per chunk.
+    """
+    chunks = iter_synthetic_chunks(n_rows, chunksize, seed, n_restaurants, max_reviews)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if path.endswith('.parquet'):
+            if pq is None:
+                raise ImportError("pyarrow is required for Parquet output")
+            # A fixed schema: a chunk whose optional column is all null would
+            # otherwise be inferred as type null and not match the file
+            schema = pa.schema([(col, pa.string()) for col in RAW_COLUMNS])
+            with pq.ParquetWriter(tmp_path, schema) as writer:
+                for chunk in chunks:
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        else:
+            for number, chunk in enumerate(chunks):
+                chunk.to_csv(tmp_path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='.csv or .parquet file to write')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--restaurants', type=int, help=f'default: rows / {LISTINGS_PER_RESTAURANT}')
+    parser.add_argument('--max-reviews', type=int, default=MAX_REVIEWS)
+    args = parser.parse_args(argv)
+    write_synthetic(args.output, args.rows, args.chunksize, args.seed, args.restaurants, args.max_reviews)
+    print(f"Wrote {args.rows:,} rows to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# terms.py
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from cuisine_index import _top_k
+
+try:
+    from wordcloud import STOPWORDS
+except ImportError:
+    STOPWORDS = frozenset()
+
+DISH_SEPARATOR = ','
+# Lowercase words of three or more letters
+TOKEN_PATTERN = r"[a-z][a-z']{2,}"
+# Words every restaurant review uses, on top of the standard English stopwords
+REVIEW_STOPWORDS = frozenset(STOPWORDS) | {
+    'also', 'one', 'will', 'really', 'just', 'got', 'even', 'much', 'well', 'try',
+    'tried', 'ordered', 'order', 'place', 'food', 'visit', 'visited', 'went', 'time'
+}
+
+def dish_tokens(documents):
+    """Dish names of each comma-separated dish_liked value, indexed by document position"""
+    tokens = documents.fillna('').str.split(DISH_SEPARATOR).explode().str.strip()
+    return tokens[tokens != '']
+
+def review_tokens(documents):
+    """Lowercase word tokens of each review text, indexed by document position"""
+    tokens = documents.fillna('').str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    return tokens[~tokens.isin(REVIEW_STOPWORDS)]
+
+class TermIndex:
+    """Sparse key x term count matrix (one row per restaurant) that grows in place
+
+    add() tokenizes only the new documents: unseen terms extend the
+    vocabulary, unseen keys get new rows, and counts for known keys are
+    added to their row. Top-term queries for any set of keys are a sum
+    over the selected rows.
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.vocabulary = []
+        self.code_of = {}
+        self.keys = pd.Index([], dtype=np.uint64)
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.int32)
+
+    def add(self, keys, documents):
+        """Add the term counts of documents (one per key) to the index"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        tokens = self.tokenizer(pd.Series(documents, dtype=object).reset_index(drop=True))
+
+        for term in pd.unique(tokens[~tokens.isin(self.code_of.keys())]):
+            self.code_of[term] = len(self.vocabulary)
+            self.vocabulary.append(term)
+        unique_keys = pd.unique(keys)
+        new_keys = unique_keys[self.keys.get_indexer(unique_keys) < 0]
+        if len(new_keys):
+            self.keys = self.keys.append(pd.Index(new_keys, dtype=np.uint64))
+
+        rows = self.keys.get_indexer(keys)[tokens.index.to_numpy()]
+        cols = tokens.map(self.code_of).to_numpy(dtype=np.int64)
+        shape = (len(self.keys), len(self.vocabulary))
+        update = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=shape)
+        self.matrix.resize(shape)
+        self.matrix = (self.matrix + update).tocsr()
+        return self
+
+    def drop(self, keys):
+        """Zero the rows of keys (their keys stay, so rows never shift)"""
+        scale = np.ones(len(self.keys), dtype=np.int32)
+        scale[self.rows_for(keys)] = 0
+        self.matrix = (sparse.diags(scale, dtype=np.int32) @ self.matrix).tocsr().astype(np.int32)
+        self.matrix.eliminate_zeros()
+        return self
+
+    def replace(self, keys, documents):
+        """Swap the counts of keys for those of their new documents"""
+        return self.drop(keys).add(keys, documents)
+
+    def rows_for(self, keys):
+        """Matrix rows of the given keys; unknown keys are skipped"""
+        rows = self.keys.get_indexer(pd.unique(np.asarray(keys, dtype=np.uint64)))
+        return rows[rows >= 0]
+
+    def term_counts(self, keys=None):
+        """Total count of every term, over all rows or only the rows of keys"""
+        matrix = self.matrix if keys is None else self.matrix[self.rows_for(keys)]
+        return np.asarray(matrix.sum(axis=0)).ravel()
+
+    def top_terms(self, k=50, keys=None):
+        """Most frequent terms as a Series, optionally restricted to keys"""
+        counts = self.term_counts(keys)
+        top = _top_k(counts, k)
+        top = top[counts[top] > 0]
+        return pd.Series(counts[top], index=np.array(self.vocabulary, dtype=object)[top], name='count')
+
+
+def dish_index(restaurant_id, dish_liked):
+    """TermIndex over dish_liked, counting each restaurant's first listing once"""
+    first = ~pd.Series(restaurant_id).duplicated().to_numpy()
+    return TermIndex(dish_tokens).add(np.asarray(restaurant_id)[first], np.asarray(dish_liked, dtype=object)[first])
+
+def review_term_index(restaurant_id, texts):
+    """TermIndex over review texts, one row per restaurant"""
+    return TermIndex(review_tokens).add(restaurant_id, texts)
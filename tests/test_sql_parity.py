@@ -0,0 +1,142 @@
+# tests/test_sql_parity.py
+"""Parity of the DuckDB backend with the in-memory pandas engine
+
+Every dashboard query runs over a grid of filter selections on both
+engines, one query at a time and as one fused plan per selection, before
+and after a delta file is upserted. benchmarks/check_sql_parity.py runs
+the same comparisons from the command line.
+"""
+import os
+
+import pytest
+
+pytest.importorskip('duckdb')
+pytest.importorskip('pyarrow')
+
+import numpy as np
+import pandas as pd
+
+from data_loader import ZomatoAnalyzer, find_deltas
+from query_service import QueryEngine
+from sql_backend import SQLQueryEngine
+from synthetic import generate_frame, write_synthetic
+
+# Small enough to run quickly, large enough for ties in the top-N lists
+ROWS = 5_000
+# Tolerances of float statistics. The cube's sum-of-squares formula leaves the
+# std of a constant group at sqrt(rounding error) instead of 0, hence ATOL
+RTOL = 1e-7
+ATOL = 1e-4
+
+def selections(overview):
+    """Filter selections covering each filter kind alone and combined, plus an empty result"""
+    locations, rest_types, cuisines = overview['locations'], overview['rest_types'], list(overview['cuisines'])
+    return {
+        'all': None,
+        'locations': {'categories': {'location': locations[:3]}},
+        'cube_dimensions': {'categories': {'cost_category': ['Budget', 'Moderate'], 'online_order': [True]}},
+        'ranges': {'ranges': {'votes': (50, None), 'rating_numeric': (3.5, 4.2)}},
+        'cuisines': {'cuisines': cuisines[:2]},
+        'sidebar': {
+            'categories': {'location': locations[:3], 'cost_category': [], 'rest_type': rest_types[:3]},
+            'ranges': {'votes': (0, None), 'rating_numeric': (3.0, None)},
+            'cuisines': cuisines[:3]
+        },
+        'empty': {'categories': {'location': ['No such location']}}
+    }
+
+def queries(overview):
+    """(name, method, kwargs) of every query to compare under one selection"""
+    cases = [
+        ('kpis', 'kpis', {}),
+        ('kpis_high_rated', 'kpis', {'where': {'quality_tier': ['Very Good', 'Excellent']}}),
+        ('kpis_premium', 'kpis', {'where': {'cost_category': ['Premium']}}),
+        ('top_rated', 'top_n', {}),
+        ('top_voted', 'top_n', {'n': 25, 'order_by': 'votes'}),
+        ('rating_histogram', 'histogram', {}),
+        ('votes_histogram', 'histogram', {'column': 'votes', 'nbins': 30}),
+        ('cuisines', 'cuisine_distribution', {}),
+        ('top_cuisines', 'cuisine_distribution', {'n': 10}),
+        ('correlation', 'correlation', {})
+    ]
+    for by in (['location'], ['rest_type'], ['cost_category'], ['online_order'], ['book_table'],
+               ['quality_tier'], ['location', 'online_order']):
+        cases.append(('group_by_' + '_'.join(by), 'group_by', {'by': by}))
+    return cases
+
+def compare(expected, actual):
+    """None when the results match, else a short description of the difference"""
+    try:
+        if isinstance(expected, pd.DataFrame):
+            if not isinstance(expected.index, pd.MultiIndex) and expected.index.name is None:
+                # Row labels of top-N lists are positions in self.df, which SQL does not have
+                expected, actual = expected.reset_index(drop=True), actual.reset_index(drop=True)
+            pd.testing.assert_frame_equal(
+                expected, actual, check_dtype=False, check_index_type=False, check_categorical=False,
+                check_exact=False, rtol=RTOL, atol=ATOL
+            )
+        elif isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(
+                expected, actual, check_dtype=False, check_index_type=False, check_names=False,
+                check_exact=False, rtol=RTOL, atol=ATOL
+            )
+        elif isinstance(expected, dict):
+            for key in expected:
+                problem = compare(expected[key], actual[key])
+                if problem:
+                    return f"{key}: {problem}"
+        elif isinstance(expected, np.ndarray):
+            np.testing.assert_allclose(expected, actual, rtol=RTOL, atol=ATOL)
+        elif isinstance(expected, float):
+            np.testing.assert_allclose(expected, actual, rtol=RTOL, atol=ATOL)
+        elif expected != actual:
+            return f"{expected!r} != {actual!r}"
+    except AssertionError as e:
+        return str(e).strip().splitlines()[0] if str(e).strip() else 'differs'
+    return None
+
+def comparisons(pandas_engine, sql_engine):
+    """Yield (name, problem or None) for every comparison of the two engines"""
+    overview = pandas_engine.overview()
+    yield 'overview', compare(
+        {k: v for k, v in overview.items() if k != 'data_version'},
+        {k: v for k, v in sql_engine.overview().items() if k != 'data_version'}
+    )
+    for selection, filters in selections(overview).items():
+        expected = []
+        for name, method, kwargs in queries(overview):
+            expected.append(getattr(pandas_engine, method)(filters, **kwargs))
+            yield f"{selection} / {name}", compare(expected[-1], getattr(sql_engine, method)(filters, **kwargs))
+        for engine in (pandas_engine, sql_engine):
+            plan = engine.plan(filters)
+            handles = [getattr(plan, method)(**kwargs) for _, method, kwargs in queries(overview)]
+            for (name, _, _), want, handle in zip(queries(overview), expected, handles):
+                yield f"{type(engine).__name__} plan {selection} / {name}", compare(want, handle.value)
+
+def write_delta(csv_path, delta_path, n_changed=200, n_new=300, seed=7):
+    """Delta CSV: existing restaurants with new votes and ratings, plus new restaurants"""
+    changed = pd.read_csv(csv_path, nrows=n_changed, dtype=str)
+    changed['votes'] = (pd.to_numeric(changed['votes'], errors='coerce').fillna(0) + 1000).astype(int).astype(str)
+    changed['rate'] = '4.9/5'
+    new = generate_frame(n_new, seed=seed, max_reviews=0)
+    pd.concat([changed, new.astype(str).where(new.notna())], ignore_index=True).to_csv(delta_path, index=False)
+
+@pytest.fixture
+def engines(tmp_path):
+    """(csv path, delta directory, pandas engine, DuckDB engine) over a small synthetic dump"""
+    csv_path = str(tmp_path / 'zomato.csv')
+    delta_dir = str(tmp_path / 'deltas')
+    os.makedirs(delta_dir)
+    write_synthetic(csv_path, ROWS)
+    return csv_path, delta_dir, QueryEngine(ZomatoAnalyzer(csv_path)), SQLQueryEngine(csv_path, delta_dir=delta_dir)
+
+def test_parity(engines):
+    _, _, pandas_engine, sql_engine = engines
+    assert [(name, problem) for name, problem in comparisons(pandas_engine, sql_engine) if problem] == []
+
+def test_parity_after_delta(engines):
+    csv_path, delta_dir, pandas_engine, sql_engine = engines
+    write_delta(csv_path, os.path.join(delta_dir, '0001.csv'))
+    pandas_engine.analyzer.refresh(find_deltas(delta_dir))
+    sql_engine.refresh()
+    assert [(name, problem) for name, problem in comparisons(pandas_engine, sql_engine) if problem] == []
@@ -0,0 +1,15 @@
+# tests/test_synthetic.py
+import pandas as pd
+import pytest
+
+from synthetic import RAW_COLUMNS, generate_frame, write_synthetic
+
+pytest.importorskip('pyarrow')
+
+def test_parquet_in_small_chunks(tmp_path):
+    # Chunks of 2 rows leave optional columns (rate, phone, dish_liked) all null in some chunks
+    path = str(tmp_path / 'zomato.parquet')
+    write_synthetic(path, 40, chunksize=2, seed=1)
+    written = pd.read_parquet(path)
+    assert list(written.columns) == RAW_COLUMNS
+    pd.testing.assert_frame_equal(written, generate_frame(40, seed=1))
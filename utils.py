@@ -1,10 +1,101 @@
 # utils.py
+import os
 import streamlit as st
-from data_loader import ZomatoAnalyzer
+from data_cache import file_fingerprint
+from data_loader import ZomatoAnalyzer, find_csv, find_deltas, delta_key
+from query_client import QUERY_SERVICE_URL, QueryClient
+from query_service import QUERY_BACKEND, QueryEngine
+from sql_backend import SQLQueryEngine, sql_available
+from reviews import load_reviews
+from sentiment import load_restaurant_sentiment, sentiment_available
+from terms import review_term_index
+
+def get_source_version():
+    """Key identifying the base source data and ingestion mode"""
+    # Set ZOMATO_CHUNKSIZE to ingest the full dump in bounded-memory chunks
+    chunksize = int(os.environ.get('ZOMATO_CHUNKSIZE', 0)) or None
+    csv_path = find_csv()
+    if csv_path is None:
+        return (None, None, None, chunksize)
+    fingerprint = file_fingerprint(csv_path)
+    return (csv_path, fingerprint['size'], fingerprint['mtime_ns'], chunksize)
+
+def get_data_version():
+    """Key identifying the current data: base source plus the delta files on top of it"""
+    return get_source_version() + (tuple(delta_key(path) for path in find_deltas()),)
+
+@st.cache_resource(max_entries=2)
+def load_analyzer(source_version):
+    """Build the processed dataset once per base source version"""
+    csv_path, _, _, chunksize = source_version
+    return ZomatoAnalyzer(csv_path=csv_path, chunksize=chunksize)
 
-@st.cache_resource
 def get_analyzer():
-    return ZomatoAnalyzer()
+    """Shared analyzer for app.py and every page, with any new delta files upserted"""
+    analyzer = load_analyzer(get_source_version())
+    analyzer.refresh()
+    return analyzer
+
+@st.cache_resource(max_entries=2)
+def load_sql_engine(source_version):
+    """DuckDB engine over the Parquet restaurant table once per base source version"""
+    return SQLQueryEngine(source_version[0])
+
+def get_queries():
+    """Dashboard queries: the query service when ZOMATO_QUERY_SERVICE is set, else answered in-process
+
+    ZOMATO_BACKEND=duckdb answers them with SQL over Parquet instead of the in-memory analyzer.
+    """
+    if QUERY_SERVICE_URL:
+        return QueryClient(QUERY_SERVICE_URL)
+    source_version = get_source_version()
+    if QUERY_BACKEND == 'duckdb' and source_version[0] is not None and sql_available():
+        engine = load_sql_engine(source_version)
+        engine.refresh()
+        return engine
+    return QueryEngine(get_analyzer())
+
+@st.cache_resource(max_entries=2)
+def load_review_ratings(source_version):
+    """Per-review ratings (without the review text) once per source version"""
+    return load_reviews(source_version[0], columns=['restaurant_id', 'review_no', 'rating'])
+
+def get_review_ratings():
+    """Per-review ratings of the source CSV, or None when running on sample data"""
+    source_version = get_source_version()
+    if source_version[0] is None:
+        return None
+    return load_review_ratings(source_version)
+
+@st.cache_resource(max_entries=2)
+def load_sentiment(source_version):
+    """Per-restaurant review sentiment once per source version"""
+    return load_restaurant_sentiment(source_version[0])
+
+def get_restaurant_sentiment():
+    """Sentiment aggregates indexed by restaurant_id, or None without reviews or textblob"""
+    source_version = get_source_version()
+    if source_version[0] is None or not sentiment_available():
+        return None
+    return load_sentiment(source_version)
+
+@st.cache_resource(max_entries=2)
+def load_review_terms(source_version):
+    """Term index over the review texts once per source version"""
+    reviews = load_reviews(source_version[0], columns=['restaurant_id', 'text'])
+    return review_term_index(reviews['restaurant_id'].to_numpy(), reviews['text'])
+
+def get_review_term_index():
+    """Restaurant x review-term index, or None when running on sample data"""
+    source_version = get_source_version()
+    if source_version[0] is None:
+        return None
+    return load_review_terms(source_version)
+
+def drop_unused_categories(df):
+    """Copy of df without empty categories, which Plotly Express cannot group on"""
+    categorical = df.select_dtypes('category').columns
+    return df.assign(**{col: df[col].cat.remove_unused_categories() for col in categorical})
 
 def format_currency(amount):
     return f"₹{amount:,.0f}"